@@ -0,0 +1,131 @@
+"""
+Compares building domain models from database rows with full validation
+(cls(**row)) against the trusted path models can opt into with
+trusted_hydration (ObjectModel._hydrate). No database is needed: rows are
+generated to look like what SurrealDB returns for each table.
+
+    python benchmark_hydration.py --rows 5000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+
+# Add the project root to the Python path to allow importing open_notebook
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '.'))
+sys.path.insert(0, project_root)
+
+from open_notebook.domain.notebook import Note, Source, SourceInsight  # noqa: E402
+
+logger.remove()
+logger.add(sys.stderr, level="INFO")
+
+
+def random_text(words: int) -> str:
+    return " ".join(
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10)))
+        for _ in range(words)
+    )
+
+
+def random_timestamp() -> str:
+    # SurrealDB returns datetimes as RFC 3339 strings with nanoseconds
+    moment = datetime.now(timezone.utc) - timedelta(seconds=random.randint(0, 10**7))
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f") + "123Z"
+
+
+def random_id(table: str) -> str:
+    return f"{table}:{''.join(random.choices(string.ascii_lowercase + string.digits, k=20))}"
+
+
+def source_row() -> dict:
+    return dict(
+        id=random_id("source"),
+        title=random_text(6),
+        topics=[random_text(1) for _ in range(5)],
+        asset=dict(url=f"https://example.com/{random_text(1)}", file_path=None),
+        full_text=random_text(2000),
+        created=random_timestamp(),
+        updated=random_timestamp(),
+    )
+
+
+def note_row(dimensions: int) -> dict:
+    return dict(
+        id=random_id("note"),
+        title=random_text(5),
+        note_type="human",
+        content=random_text(300),
+        embedding=[random.uniform(-1, 1) for _ in range(dimensions)],
+        created=random_timestamp(),
+        updated=random_timestamp(),
+    )
+
+
+def insight_row(dimensions: int) -> dict:
+    return dict(
+        id=random_id("source_insight"),
+        source=random_id("source"),
+        insight_type="summary",
+        content=random_text(200),
+        embedding=[random.uniform(-1, 1) for _ in range(dimensions)],
+        created=random_timestamp(),
+        updated=random_timestamp(),
+    )
+
+
+def best_of(repeat: int, build) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def benchmark(model_class, rows: list, repeat: int) -> None:
+    # Both paths must produce the same model
+    for row in rows[:20]:
+        validated = model_class(**row).model_dump()
+        trusted = model_class._hydrate(row).model_dump()
+        if validated != trusted:
+            raise AssertionError(
+                f"{model_class.__name__}: trusted hydration differs from validation"
+            )
+
+    validated = best_of(repeat, lambda: [model_class(**row) for row in rows])
+    trusted = best_of(repeat, lambda: [model_class._hydrate(row) for row in rows])
+    logger.info(
+        f"{model_class.__name__:<14} {len(rows)} rows: "
+        f"validated {validated * 1000:8.1f} ms, "
+        f"trusted {trusted * 1000:8.1f} ms, "
+        f"speedup {validated / trusted:.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=768, help="embedding size")
+    args = parser.parse_args()
+
+    random.seed(0)
+    logger.info(f"Generating {args.rows} rows per model...")
+    cases = [
+        (Source, [source_row() for _ in range(args.rows)]),
+        (Note, [note_row(args.dimensions) for _ in range(args.rows)]),
+        (SourceInsight, [insight_row(args.dimensions) for _ in range(args.rows)]),
+    ]
+    for model_class, rows in cases:
+        benchmark(model_class, rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Runs a synthetic ingestion and search workload through the repo_* functions
+against the in-process MemoryBackend, so no SurrealDB server is needed.
+Sources are related to a notebook, chunked into source_embedding rows with
+repo_insert_many, and then searched with fn::text_search and
+fn::vector_search, exactly as the domain layer issues them.
+
+    python benchmark_storage.py --sources 200 --chunks 50 --searches 100
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+from loguru import logger
+
+# Add the project root to the Python path to allow importing open_notebook
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '.'))
+sys.path.insert(0, project_root)
+
+from open_notebook.database.memory import MemoryBackend  # noqa: E402
+from open_notebook.database.repository import (  # noqa: E402
+    repo_create,
+    repo_insert_many,
+    repo_query,
+    repo_relate_many,
+    set_backend,
+)
+
+logger.remove()
+logger.add(sys.stderr, level="INFO")
+
+
+def random_text(words: int) -> str:
+    return " ".join(
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10)))
+        for _ in range(words)
+    )
+
+
+def random_vector(dimensions: int) -> list:
+    return [random.uniform(-1, 1) for _ in range(dimensions)]
+
+
+def timed(label: str, count: int, run):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"{label:<16} {count:>8} in {elapsed * 1000:9.1f} ms "
+        f"({count / elapsed if elapsed else 0:10.0f}/s)"
+    )
+    return result
+
+
+def ingest(sources: int, chunks: int, dimensions: int) -> str:
+    notebook_id = repo_create("notebook", dict(name="benchmark"))[0]["id"]
+    source_ids = timed(
+        "sources",
+        sources,
+        lambda: repo_insert_many(
+            "source",
+            [dict(title=random_text(6), full_text=random_text(500)) for _ in range(sources)],
+        ),
+    )
+    repo_relate_many(source_ids, "reference", notebook_id)
+    rows = [
+        dict(source=source_id, order=i, content=random_text(150), embedding=random_vector(dimensions))
+        for source_id in source_ids
+        for i in range(chunks)
+    ]
+    timed(
+        "embeddings",
+        len(rows),
+        lambda: repo_insert_many("source_embedding", rows, record_fields=["source"]),
+    )
+    return notebook_id
+
+
+def search(searches: int, dimensions: int) -> None:
+    terms = [random_text(1) for _ in range(searches)]
+    vectors = [random_vector(dimensions) for _ in range(searches)]
+    timed(
+        "text searches",
+        searches,
+        lambda: [
+            repo_query(
+                "select * from fn::text_search($query, 10, true, true);", {"query": term}
+            )
+            for term in terms
+        ],
+    )
+    timed(
+        "vector searches",
+        searches,
+        lambda: [
+            repo_query(
+                "select * from fn::vector_search($embed, 10, true, true, 0.1);",
+                {"embed": vector},
+            )
+            for vector in vectors
+        ],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=50, help="embeddings per source")
+    parser.add_argument("--searches", type=int, default=100)
+    parser.add_argument("--dimensions", type=int, default=768, help="embedding size")
+    args = parser.parse_args()
+
+    random.seed(0)
+    set_backend(MemoryBackend())
+    notebook_id = ingest(args.sources, args.chunks, args.dimensions)
+    chunk_counts = timed(
+        "chunk counts",
+        1,
+        lambda: repo_query(
+            "SELECT source, count() AS chunks FROM source_embedding "
+            "WHERE source IN (SELECT VALUE in FROM reference WHERE out = $notebook) "
+            "GROUP BY source",
+            {"notebook": notebook_id},
+        ),
+    )
+    if sum(row["chunks"] for row in chunk_counts) != args.sources * args.chunks:
+        raise AssertionError("Not every inserted embedding was found again")
+    search(args.searches, args.dimensions)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any, Union, Tuple, Literal
+import asyncio
 import os
 from dotenv import load_dotenv
 import sys
 from fastapi.middleware.cors import CORSMiddleware
 import datetime
-from fastapi import Depends
 import logging
-from sblpy.async_connection import AsyncSurrealConnection as AsyncSurreal
 
 # Add project root to sys.path to allow imports from open_notebook
 # This is a common pattern when running a script from a subdirectory
@@ -24,6 +23,9 @@ load_dotenv(dotenv_path=dotenv_path)
 
 # Now we can import from open_notebook
 # Assuming Note and Source are also in notebook.py or accessible via open_notebook.domain
+from open_notebook.database.instrumentation import track_queries
+from open_notebook.database.repository import aclose_pool, close_write_queue
+from open_notebook.domain.cache import request_cache_scope
 from open_notebook.domain.notebook import Notebook, Note, Source, Asset, ChatSession, Task # Note: Source and Note are in notebook.py
 from open_notebook.domain.chat import ChatMessage # Added ChatMessage
 from open_notebook.domain.models import model_manager # Added model_manager
@@ -47,8 +49,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allows all methods
     allow_headers=["*"], # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Query-Count"], # Pagination cursor, queries per request
 )
 
+# Each request reads records through its own cache, so it never serves rows
+# cached by another request or written by another process in the meantime,
+# and counts the queries it runs
+@app.middleware("http")
+async def request_scope_middleware(request, call_next):
+    with request_cache_scope(), track_queries() as queries:
+        response = await call_next(request)
+    # Query count per request makes N+1 patterns visible to clients and tests
+    response.headers["X-Query-Count"] = str(queries.count)
+    repeated = queries.repeated(minimum=5)
+    if repeated:
+        logging.warning(
+            f"{request.method} {request.url.path} ran {queries.count} queries; repeated: {repeated}"
+        )
+    return response
+
 # --- Request Models (for POST/PUT data validation) ---
 class NotebookCreateRequest(BaseModel):
     name: str # Changed from title to match Notebook model field
@@ -116,53 +135,30 @@ def get_full_id(table_name: str, id_part: str) -> str:
         return id_part
     return f"{table_name}:{id_part}"
 
-# --- Database Connection Dependency ---
-# Global variable to hold the database client instance
-_db_client: Optional[AsyncSurreal] = None
-
-async def get_db_conn() -> AsyncSurreal:
-    global _db_client
-    if _db_client is None:
-        host = os.getenv("SURREAL_ADDRESS", "localhost")
-        # Default SurrealDB port is 8000, not 8501 (which is often for apps like Streamlit/FastAPI http)
-        port = int(os.getenv("SURREAL_PORT", "8000")) 
-        user = os.getenv("SURREAL_USER", "root")
-        password = os.getenv("SURREAL_PASS", "root")
-        db_name = os.getenv("SURREAL_DB", "open_notebook")
-        namespace = os.getenv("SURREAL_NS", "open_notebook_ns")
-        
-        client = AsyncSurreal(f"ws://{host}:{port}/rpc")
-        try:
-            await client.connect()
-            await client.signin({"user": user, "pass": password})
-            await client.use(namespace, db_name)
-            _db_client = client
-            # If your ObjectModel classes expect ObjectModel.db to be set globally:
-            # from open_notebook.domain.base import ObjectModel
-            # ObjectModel.db = _db_client 
-            # This line above is crucial if your domain methods don't use the passed `db` parameter
-            # but rely on a class-level `db` attribute.
-            logging.info(f"Successfully connected to SurrealDB: ns={namespace}, db={db_name}")
-        except Exception as e:
-            logging.error(f"Failed to connect to SurrealDB: {e}")
-            # Depending on your policy, you might raise an HTTPException here
-            # or let connecting endpoints fail if _db_client remains None.
-            # For now, we'll let it try to connect once. If it fails, endpoints will likely fail.
-            pass # Or raise HTTPException(status_code=503, detail="Database not available")
-    
-    if _db_client is None:
-        # This means the initial connection attempt failed or was skipped.
-        raise HTTPException(status_code=503, detail="Database connection is not available.")
-    
-    return _db_client
+# --- Pagination ---
+# List endpoints take ?limit=&cursor=. Without either they return everything,
+# as before; with them they return one page and, when there are more rows, the
+# cursor for the next one in the X-Next-Cursor response header.
+DEFAULT_PAGE_SIZE = int(os.environ.get("API_DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", 1000))
+
+def is_paginated(limit: Optional[int], cursor: Optional[str]) -> bool:
+    return limit is not None or cursor is not None
+
+def page_items(response: Response, page) -> list:
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
+# --- Database Connection Lifecycle ---
+# Endpoints use the async repository (arepo_* / ObjectModel.aget, asave, ...),
+# which keeps a pool of SurrealDB connections per event loop.
 @app.on_event("shutdown")
 async def shutdown_db_client_event():
-    global _db_client
-    if _db_client:
-        await _db_client.close()
-        _db_client = None
-        logging.info("SurrealDB connection closed.")
+    # Queued writes (SURREAL_WRITE_BEHIND) are committed before the pools go away
+    await asyncio.to_thread(close_write_queue)
+    await aclose_pool()
+    logging.info("SurrealDB connection pool closed.")
 
 # --- Notebook Endpoints ---
 @app.post("/api/notebooks", response_model=Notebook, status_code=status.HTTP_201_CREATED)
@@ -170,7 +166,7 @@ async def create_notebook_endpoint(notebook_data: NotebookCreateRequest):
     try:
         # The Notebook model expects 'name' and 'description'
         notebook = Notebook(name=notebook_data.name, description=notebook_data.description or "")
-        notebook.save() # save() method handles ID generation and timestamps
+        await notebook.asave() # save() method handles ID generation and timestamps
         return notebook
     except InvalidInputError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -178,9 +174,18 @@ async def create_notebook_endpoint(notebook_data: NotebookCreateRequest):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @app.get("/api/notebooks", response_model=List[Notebook])
-async def get_all_notebooks_endpoint():
+async def get_all_notebooks_endpoint(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
-        return Notebook.get_all()
+        if is_paginated(limit, cursor):
+            page = await Notebook.aget_page(limit or DEFAULT_PAGE_SIZE, cursor, order_by="updated desc")
+            return page_items(response, page)
+        return await Notebook.aget_all()
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -188,7 +193,7 @@ async def get_all_notebooks_endpoint():
 async def get_notebook_endpoint(notebook_short_id: str):
     try:
         full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        return Notebook.get(full_id)
+        return await Notebook.aget(full_id)
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except DatabaseOperationError as e:
@@ -198,11 +203,11 @@ async def get_notebook_endpoint(notebook_short_id: str):
 async def update_notebook_endpoint(notebook_short_id: str, notebook_data: NotebookUpdateRequest):
     try:
         full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(full_id)
+        notebook = await Notebook.aget(full_id)
         update_data = notebook_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(notebook, key, value)
-        notebook.save()
+        await notebook.asave()
         return notebook
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -215,8 +220,8 @@ async def update_notebook_endpoint(notebook_short_id: str, notebook_data: Notebo
 async def delete_notebook_endpoint(notebook_short_id: str):
     try:
         full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(full_id)
-        notebook.delete() # Assuming ObjectModel has a delete method
+        notebook = await Notebook.aget(full_id)
+        await notebook.adelete() # Assuming ObjectModel has a delete method
         return
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -225,14 +230,24 @@ async def delete_notebook_endpoint(notebook_short_id: str):
 
 # --- Notes Endpoints ---
 @app.get("/api/notebooks/{notebook_short_id}/notes", response_model=List[Note])
-async def get_notes_for_notebook_endpoint(notebook_short_id: str):
+async def get_notes_for_notebook_endpoint(
+    notebook_short_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(notebook_full_id) # Ensure notebook exists
+        notebook = await Notebook.aget(notebook_full_id) # Ensure notebook exists
         # The Notebook class has a .notes property that fetches related notes
-        return notebook.notes 
+        if is_paginated(limit, cursor):
+            page = await notebook.aget_notes_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            return page_items(response, page)
+        return await notebook.aget_notes()
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -241,7 +256,7 @@ async def create_note_for_notebook_endpoint(notebook_short_id: str, note_data: N
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
         # Ensure notebook exists before adding a note to it
-        Notebook.get(notebook_full_id) 
+        await Notebook.aget(notebook_full_id) 
 
         note = Note(
             title=note_data.title,
@@ -249,8 +264,8 @@ async def create_note_for_notebook_endpoint(notebook_short_id: str, note_data: N
             note_type='human' # Default for user-created notes
             # id will be generated by ObjectModel.save() or SurrealDB
         )
-        note.save() # This should save the note and assign an ID
-        note.add_to_notebook(notebook_full_id) # Relate it to the notebook
+        await note.asave() # This should save the note and assign an ID
+        await note.aadd_to_notebook(notebook_full_id) # Relate it to the notebook
         return note
     except NotFoundError as e: # For notebook not found
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
@@ -263,7 +278,7 @@ async def create_note_for_notebook_endpoint(notebook_short_id: str, note_data: N
 async def update_note_endpoint(notebook_short_id: str, note_short_id: str, note_data: NoteUpdateRequest):
     try:
         note_full_id = get_full_id(Note.table_name, note_short_id)
-        note = Note.get(note_full_id)
+        note = await Note.aget(note_full_id)
 
         # Check if the note belongs to the given notebook - this might require an extra query or different logic
         # For now, assuming direct update if note is found. Add verification if needed.
@@ -271,7 +286,7 @@ async def update_note_endpoint(notebook_short_id: str, note_short_id: str, note_
         update_data = note_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(note, key, value)
-        note.save()
+        await note.asave()
         return note
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -285,13 +300,13 @@ async def delete_note_endpoint(notebook_short_id: str, note_short_id: str):
     try:
         # Optional: Verify notebook exists
         # notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        # Notebook.get(notebook_full_id)
+        # await Notebook.aget(notebook_full_id)
 
         note_full_id = get_full_id(Note.table_name, note_short_id)
-        note = Note.get(note_full_id)
+        note = await Note.aget(note_full_id)
         # Consider how to handle un-relating from notebook if delete only removes the note globally.
         # The `delete()` method on ObjectModel should handle the actual deletion from the database.
-        note.delete()
+        await note.adelete()
         return
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -300,14 +315,24 @@ async def delete_note_endpoint(notebook_short_id: str, note_short_id: str):
 
 # --- Sources Endpoints ---
 @app.get("/api/notebooks/{notebook_short_id}/sources", response_model=List[Source])
-async def get_sources_for_notebook_endpoint(notebook_short_id: str):
+async def get_sources_for_notebook_endpoint(
+    notebook_short_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(notebook_full_id) # Ensure notebook exists
+        notebook = await Notebook.aget(notebook_full_id) # Ensure notebook exists
         # The Notebook class has a .sources property that fetches related sources
-        return notebook.sources
+        if is_paginated(limit, cursor):
+            page = await notebook.aget_sources_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            return page_items(response, page)
+        return await notebook.aget_sources()
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -316,7 +341,7 @@ async def create_source_for_notebook_endpoint(notebook_short_id: str, source_dat
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
         # Ensure notebook exists
-        Notebook.get(notebook_full_id)
+        await Notebook.aget(notebook_full_id)
 
         asset_data = Asset(
             source_type=source_data.type
@@ -340,8 +365,8 @@ async def create_source_for_notebook_endpoint(notebook_short_id: str, source_dat
         
         source = Source(**source_instance_params)
 
-        source.save() # Save the source to get an ID
-        source.add_to_notebook(notebook_full_id) # Relate it to the notebook
+        await source.asave() # Save the source to get an ID
+        await source.aadd_to_notebook(notebook_full_id) # Relate it to the notebook
         return source
     except NotFoundError as e: # For notebook not found
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
@@ -355,13 +380,13 @@ async def create_source_for_notebook_endpoint(notebook_short_id: str, source_dat
 async def update_source_endpoint(notebook_short_id: str, source_short_id: str, source_data: SourceUpdateRequest):
     try:
         source_full_id = get_full_id(Source.table_name, source_short_id)
-        source = Source.get(source_full_id)
+        source = await Source.aget(source_full_id)
         # Add verification if this source belongs to the notebook_short_id if necessary
 
         if source_data.title is not None:
             source.title = source_data.title
         # Add other updatable fields here
-        source.save()
+        await source.asave()
         return source
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -374,9 +399,9 @@ async def update_source_endpoint(notebook_short_id: str, source_short_id: str, s
 async def delete_source_endpoint(notebook_short_id: str, source_short_id: str):
     try:
         source_full_id = get_full_id(Source.table_name, source_short_id)
-        source = Source.get(source_full_id)
+        source = await Source.aget(source_full_id)
         # Consider how to handle un-relating from notebook if delete only removes the source globally.
-        source.delete()
+        await source.adelete()
         return
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -390,12 +415,12 @@ async def create_chat_session_endpoint(notebook_short_id: str, chat_data: ChatSe
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
         # Ensure notebook exists
-        Notebook.get(notebook_full_id)
+        await Notebook.aget(notebook_full_id)
 
         chat_session_title = chat_data.title or f"Chat on {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
         chat_session = ChatSession(title=chat_session_title)
-        chat_session.save()
-        chat_session.relate_to_notebook(notebook_full_id) # Relate it to the notebook
+        await chat_session.asave()
+        await chat_session.arelate_to_notebook(notebook_full_id) # Relate it to the notebook
         return chat_session
     except NotFoundError as e: # For notebook not found
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
@@ -405,24 +430,44 @@ async def create_chat_session_endpoint(notebook_short_id: str, chat_data: ChatSe
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @app.get("/api/notebooks/{notebook_short_id}/chats", response_model=List[ChatSession])
-async def get_chat_sessions_for_notebook_endpoint(notebook_short_id: str):
+async def get_chat_sessions_for_notebook_endpoint(
+    notebook_short_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(notebook_full_id)
-        return notebook.chat_sessions # This property fetches related ChatSession objects
+        notebook = await Notebook.aget(notebook_full_id)
+        if is_paginated(limit, cursor):
+            page = await notebook.aget_chat_sessions_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            return page_items(response, page)
+        return await notebook.aget_chat_sessions() # This fetches related ChatSession objects
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @app.get("/api/chats/{chat_session_short_id}/messages", response_model=List[ChatMessage])
-async def get_messages_for_chat_session_endpoint(chat_session_short_id: str):
+async def get_messages_for_chat_session_endpoint(
+    chat_session_short_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         session_full_id = get_full_id(ChatSession.table_name, chat_session_short_id)
-        chat_session = ChatSession.get(session_full_id)
-        return chat_session.messages # This property fetches and sorts ChatMessage objects
+        chat_session = await ChatSession.aget(session_full_id)
+        if is_paginated(limit, cursor):
+            page = await chat_session.aget_messages_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            return page_items(response, page)
+        return await chat_session.aget_messages() # This fetches and sorts ChatMessage objects
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Chat session not found: {str(e)}")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -430,25 +475,23 @@ async def get_messages_for_chat_session_endpoint(chat_session_short_id: str):
 async def send_message_to_chat_session_endpoint(chat_session_short_id: str, message_data: ChatMessageCreateRequest):
     try:
         session_full_id = get_full_id(ChatSession.table_name, chat_session_short_id)
-        chat_session = ChatSession.get(session_full_id)
+        chat_session = await ChatSession.aget(session_full_id)
 
-        # 1. Create and save user's message
+        # 1. Fetch message history for context, before the new message is queued,
+        # so the read doesn't have to wait for it to be written
+        history_messages_domain = await chat_session.aget_messages()
+
+        # 2. Create and save user's message
         user_message = ChatMessage(
             chat_session_id=chat_session.id,
             sender="user",
             content=message_data.content
             # timestamp and order will be handled by defaults or ChatMessage logic if any
         )
-        user_message.save()
-
-        # 2. Fetch message history for context
-        history_messages_domain = chat_session.messages # This gets all messages, including the new user one
+        await user_message.asave()
+        history_messages_domain.append(user_message)
         langchain_history = []
-        # Exclude the last message if it's the one we just added, to avoid duplication in context to LLM
-        # Or, ensure chat_session.messages property re-fetches if not automatically updated post-save.
-        # For safety, let's re-fetch or filter the current user message from history sent to LLM.
-        # The chat_session.messages property does a fresh DB query, so it will include the new user_message.
-        
+
         for msg in history_messages_domain:
             if msg.sender == "user":
                 langchain_history.append(HumanMessage(content=msg.content))
@@ -490,7 +533,7 @@ async def send_message_to_chat_session_endpoint(chat_session_short_id: str, mess
             sender="ai",
             content=ai_content
         )
-        ai_message.save()
+        await ai_message.asave()
 
         # Return the new user message and the new AI message
         return [user_message, ai_message]
@@ -568,13 +611,12 @@ class SourceResponse(BaseModel): # Assuming this is your primary response model
 async def run_source_transformation_endpoint(
     source_id: str,
     request: TransformationRequest,
-    db: AsyncSurreal = Depends(get_db_conn)
 ):
     full_source_id = get_full_id(source_id, "source")
     
     try:
         # Use the domain model's get method
-        source_obj = Source.get(full_source_id, db=db)
+        source_obj = await Source.aget(full_source_id)
     except Exception as e: # Catch generic Exception if NotFoundError is not specific enough or not raised by get
         # Log the exception e
         raise HTTPException(status_code=404, detail=f"Source not found: {str(e)}")
@@ -622,7 +664,7 @@ async def run_source_transformation_endpoint(
     try:
         # Persist changes using the domain model's save method or similar
         # This assumes .save() handles the DB interaction and updates the object in place or returns the updated one.
-        source_obj.save(db=db) # Or however your domain objects are persisted
+        await source_obj.asave() # Or however your domain objects are persisted
     except Exception as e:
         # Log error e
         raise HTTPException(status_code=500, detail=f"Failed to save source after transformation: {str(e)}")
@@ -636,7 +678,7 @@ async def create_task_for_notebook_endpoint(notebook_short_id: str, task_data: T
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
         # Ensure notebook exists
-        Notebook.get(notebook_full_id) 
+        await Notebook.aget(notebook_full_id) 
 
         task = Task(
             description=task_data.description,
@@ -645,7 +687,7 @@ async def create_task_for_notebook_endpoint(notebook_short_id: str, task_data: T
             order=task_data.order,
             status=task_data.status or "todo"
         )
-        task.save() # This should save the task and assign an ID
+        await task.asave() # This should save the task and assign an ID
         # Unlike notes/sources, Task model has notebook_id directly.
         # If an edge relation was used, an equivalent to `task.add_to_notebook(notebook_full_id)` would be here.
         return task
@@ -657,14 +699,24 @@ async def create_task_for_notebook_endpoint(notebook_short_id: str, task_data: T
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @app.get("/api/notebooks/{notebook_short_id}/tasks", response_model=List[Task])
-async def get_tasks_for_notebook_endpoint(notebook_short_id: str):
+async def get_tasks_for_notebook_endpoint(
+    notebook_short_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         notebook_full_id = get_full_id(Notebook.table_name, notebook_short_id)
-        notebook = Notebook.get(notebook_full_id) # Ensure notebook exists
+        notebook = await Notebook.aget(notebook_full_id) # Ensure notebook exists
         # The Notebook class has a .tasks property that fetches related tasks
-        return notebook.tasks 
+        if is_paginated(limit, cursor):
+            page = await notebook.aget_tasks_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            return page_items(response, page)
+        return await notebook.aget_tasks()
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Notebook not found: {str(e)}")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except DatabaseOperationError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -672,11 +724,11 @@ async def get_tasks_for_notebook_endpoint(notebook_short_id: str):
 async def update_task_endpoint(task_short_id: str, task_data: TaskUpdateRequest):
     try:
         full_id = get_full_id(Task.table_name, task_short_id)
-        task = Task.get(full_id)
+        task = await Task.aget(full_id)
         update_data = task_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(task, key, value)
-        task.save()
+        await task.asave()
         return task
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -689,8 +741,8 @@ async def update_task_endpoint(task_short_id: str, task_data: TaskUpdateRequest)
 async def delete_task_endpoint(task_short_id: str):
     try:
         full_id = get_full_id(Task.table_name, task_short_id)
-        task = Task.get(full_id)
-        task.delete()
+        task = await Task.aget(full_id)
+        await task.adelete()
         return
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class StorageBackend(ABC):
+    """
+    Something other than a SurrealDB server that runs the repo_* queries.
+
+    Backends receive the same SurrealQL and bound variables the server would
+    and return rows in the same shape, so the domain layer does not know which
+    one it talks to. Install one with repository.set_backend().
+    """
+
+    @abstractmethod
+    def query(self, query_str: str, vars: Optional[Dict[str, Any]] = None) -> Any:
+        pass
+
+    async def aquery(self, query_str: str, vars: Optional[Dict[str, Any]] = None) -> Any:
+        return self.query(query_str, vars)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,241 @@
+"""
+Timing and accounting for the queries run through repo_query/arepo_query.
+
+Every statement is reduced to a fingerprint (literals, record ids and numbers
+replaced by ?) so that queries differing only in their values are counted
+together. Durations, row counts and payload sizes go into an in-process
+histogram per fingerprint; statements slower than SURREAL_SLOW_QUERY_MS are
+logged together with the domain method that issued them.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+from loguru import logger
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf")
+)
+
+METRICS_ENABLED = os.environ.get("SURREAL_QUERY_METRICS", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+# 0 disables the slow-query log
+SLOW_QUERY_MS = float(os.environ.get("SURREAL_SLOW_QUERY_MS", 500))
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_RECORD_ID_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*):(?:⟨[^⟩]*⟩|`[^`]*`|[A-Za-z0-9_]+)")
+_NUMBER_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:e-?\d+)?\b", re.IGNORECASE)
+_LIST_RE = re.compile(r"\[\s*(?:\w+:)?\?(?:\s*,\s*(?:\w+:)?\?)*\s*\]")
+_ID_LIST_RE = re.compile(r"(\w+:\?)(?:\s*,\s*\w+:\?)+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Frames from these modules are skipped when looking for the caller of a query
+_INTERNAL_MODULES = (
+    "open_notebook.database.",
+    "contextlib",
+    "asyncio.",
+    "concurrent.",
+    "threading",
+)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalize a statement so that queries differing only in values match."""
+    normalized = _STRING_RE.sub("?", query)
+    normalized = _RECORD_ID_RE.sub(r"\1:?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _LIST_RE.sub("[?]", normalized)
+    normalized = _ID_LIST_RE.sub(r"\1, ...", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip().rstrip(";").strip()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS_MS))
+
+    def add(self, duration_ms: float, rows: int, size: int, error: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.rows += rows
+        self.bytes += size
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += hits
+            if seen >= threshold:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            errors=self.errors,
+            total_ms=round(self.total_ms, 3),
+            mean_ms=round(self.total_ms / self.count, 3) if self.count else 0.0,
+            p50_ms=self.percentile(0.5),
+            p95_ms=self.percentile(0.95),
+            max_ms=round(self.max_ms, 3),
+            rows=self.rows,
+            bytes=self.bytes,
+            histogram={
+                ("inf" if bound == float("inf") else str(int(bound))): hits
+                for bound, hits in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+        )
+
+
+class QueryMetrics:
+    """Thread-safe per-fingerprint query statistics for the whole process."""
+
+    def __init__(self):
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, statement: str, duration_ms: float, rows: int, size: int, error: bool
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = QueryStats()
+            stats.add(duration_ms, rows, size, error)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics per fingerprint, most total time first."""
+        with self._lock:
+            items = [(statement, stats.as_dict()) for statement, stats in self._stats.items()]
+        return dict(sorted(items, key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+@dataclass
+class QueryCounter:
+    """Queries run inside a track_queries() block."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated(self, minimum: int = 2) -> Dict[str, int]:
+        """Fingerprints run at least minimum times, the usual sign of an N+1."""
+        return {
+            statement: hits
+            for statement, hits in self.statements.most_common()
+            if hits >= minimum
+        }
+
+
+_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar(
+    "query_counters", default=()
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryCounter]:
+    """
+    Count the queries run inside the block, including nested blocks, tasks
+    started from it and work handed to threads with asyncio.to_thread.
+    """
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+def _calling_method() -> str:
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_INTERNAL_MODULES):
+            location = f"{module}.{frame.f_code.co_qualname}:{frame.f_lineno}"
+            if module.startswith("open_notebook.domain."):
+                return location
+            fallback = fallback or location
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+def _payload_size(result: Any) -> int:
+    try:
+        return len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class QueryObservation:
+    query: str
+    result: Any = None
+
+
+@contextmanager
+def observe_query(query: str) -> Iterator[QueryObservation]:
+    """Time the statement run inside the block and record it on exit."""
+    observation = QueryObservation(query)
+    started = time.perf_counter()
+    error = False
+    try:
+        yield observation
+    except BaseException:
+        error = True
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        statement = fingerprint(query)
+        for counter in _counters.get():
+            counter.count += 1
+            counter.total_ms += duration_ms
+            counter.statements[statement] += 1
+
+        if METRICS_ENABLED:
+            result = observation.result
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            query_metrics.record(
+                statement, duration_ms, rows, _payload_size(result), error
+            )
+            if SLOW_QUERY_MS and duration_ms >= SLOW_QUERY_MS:
+                logger.warning(
+                    f"Slow query ({duration_ms:.0f} ms, {rows} rows) "
+                    f"from {_calling_method()}: {statement}"
+                )
@@ -0,0 +1,216 @@
+"""
+Cross-process cache invalidation through SurrealDB live queries.
+
+Each process that enables SURREAL_LIVE_INVALIDATION keeps one extra websocket
+open, runs LIVE SELECT id FROM <table> for every watched table and passes
+each notification to the subscribed callbacks. Only ids are selected, so an
+update to a large record does not ship the record itself.
+
+Notifications sent while the socket was down are lost, so every time the
+live queries are (re)established subscribers get a RESET change and should
+drop everything they cached.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+# The records behind the caches that must not go stale: settings singletons,
+# model definitions and the content that embeddings are built from
+DEFAULT_TABLES: Tuple[str, ...] = ("open_notebook", "model", "source", "note")
+
+
+class RecordChange(NamedTuple):
+    table: Optional[str]
+    id: Optional[str]
+    action: str  # CREATE, UPDATE, DELETE, or RESET when anything may have changed
+
+
+ChangeCallback = Callable[[RecordChange], None]
+
+RESET = RecordChange(None, None, "RESET")
+
+
+def _record_id(notification: Dict[str, Any]) -> Optional[str]:
+    # SurrealDB 2.x adds the record id; 1.x only sends the (projected) record
+    record = notification.get("record")
+    if record is None:
+        result = notification.get("result")
+        record = result.get("id") if isinstance(result, dict) else result
+    return str(record) if record is not None else None
+
+
+class InvalidationBus:
+    """Listens to live queries on a background thread and fans changes out."""
+
+    def __init__(
+        self,
+        url: str,
+        credentials: Dict[str, str],
+        namespace: str,
+        database: str,
+        tables: Tuple[str, ...] = DEFAULT_TABLES,
+        max_backoff: float = 30.0,
+    ):
+        self.url = url
+        self.tables = tables
+        self.max_backoff = max_backoff
+        self._credentials = credentials
+        self._namespace = namespace
+        self._database = database
+        self._subscribers: List[ChangeCallback] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._socket: Any = None
+        self._request_ids = itertools.count(1)
+
+    def subscribe(self, callback: ChangeCallback) -> None:
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="surreal-live-invalidation", daemon=True
+                )
+                self._thread.start()
+
+    def unsubscribe(self, callback: ChangeCallback) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, change: RecordChange) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Cache invalidation callback failed for {change}: {e}")
+
+    def close(self) -> None:
+        self._stopped.set()
+        socket = self._socket
+        if socket is not None:
+            try:
+                socket.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                if self._stopped.is_set():
+                    return
+                logger.warning(
+                    f"Live query connection lost, reconnecting in {backoff:.0f}s: {e}"
+                )
+            else:
+                backoff = 1.0
+            if self._stopped.wait(backoff):
+                return
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _call(self, method: str, params: List[Any]) -> str:
+        request_id = str(next(self._request_ids))
+        self._socket.send(json.dumps({"id": request_id, "method": method, "params": params}))
+        return request_id
+
+    def _listen(self) -> None:
+        from websockets.sync.client import connect
+
+        with connect(self.url, subprotocols=["json"]) as socket:
+            self._socket = socket
+            self._call("signin", [self._credentials])
+            self._call("use", [self._namespace, self._database])
+            pending = {
+                self._call("query", [f"LIVE SELECT id FROM {table};"]): table
+                for table in self.tables
+            }
+            live_tables: Dict[str, str] = {}
+            for raw in socket:
+                message = json.loads(raw)
+                if message.get("error"):
+                    raise ConnectionError(f"Live query setup failed: {message['error']}")
+                request_id = message.get("id")
+                if request_id in pending:
+                    table = pending.pop(request_id)
+                    statement = (message.get("result") or [{}])[0]
+                    live_tables[str(statement.get("result"))] = table
+                    logger.debug(f"Watching {table} for changes")
+                    if not pending:
+                        # Whatever changed before we were watching was missed
+                        self.publish(RESET)
+                    continue
+                notification = message.get("result")
+                if request_id is None and isinstance(notification, dict):
+                    table = live_tables.get(str(notification.get("id")))
+                    if table is not None:
+                        self.publish(
+                            RecordChange(
+                                table,
+                                _record_id(notification),
+                                str(notification.get("action", "UPDATE")).upper(),
+                            )
+                        )
+
+
+_bus: Optional[InvalidationBus] = None
+_bus_lock = threading.Lock()
+
+
+def live_invalidation_enabled() -> bool:
+    return os.environ.get("SURREAL_LIVE_INVALIDATION", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def get_invalidation_bus() -> Optional[InvalidationBus]:
+    """The process-wide bus, or None unless SURREAL_LIVE_INVALIDATION is enabled."""
+    global _bus
+    if not live_invalidation_enabled():
+        return None
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                tables = os.environ.get("SURREAL_LIVE_TABLES")
+                _bus = InvalidationBus(
+                    url=f"ws://{os.environ['SURREAL_ADDRESS']}:{os.environ['SURREAL_PORT']}/rpc",
+                    credentials={
+                        "user": os.environ["SURREAL_USER"],
+                        "pass": os.environ["SURREAL_PASS"],
+                    },
+                    namespace=os.environ["SURREAL_NAMESPACE"],
+                    database=os.environ["SURREAL_DATABASE"],
+                    tables=(
+                        tuple(t.strip() for t in tables.split(",") if t.strip())
+                        if tables
+                        else DEFAULT_TABLES
+                    ),
+                )
+                atexit.register(_bus.close)
+    return _bus
+
+
+def on_record_change(callback: ChangeCallback) -> None:
+    """
+    Call callback for every change to a watched record made by any process.
+
+    Subscribing the same callback again has no effect, so caches can call
+    this lazily on first use. Does nothing unless SURREAL_LIVE_INVALIDATION is
+    enabled; caches are then only as fresh as their own expiry makes them.
+    """
+    bus = get_invalidation_bus()
+    if bus is not None:
+        bus.subscribe(callback)
@@ -0,0 +1,1386 @@
+"""
+In-process storage backend, for benchmarks and tests without a SurrealDB server.
+
+MemoryBackend keeps every table in a dict and executes the subset of SurrealQL
+that the repository and the domain layer issue: CREATE, UPSERT, UPDATE
+(CONTENT, MERGE and SET, with WHERE), DELETE, INSERT, RELATE, SELECT with
+projections, OMIT, WHERE, GROUP BY, ORDER BY, LIMIT/START, FETCH, graph steps
+and subqueries, and BEGIN/COMMIT blocks. fn::text_search, fn::vector_search
+and fn::vector_candidates are built in with the result shape of the database
+functions in migrations/; the vector search uses numpy when it is installed.
+
+Tables defined SCHEMAFULL in migrations/ reject NULL field values, as
+SurrealDB does for their option<> fields: a field is cleared with NONE.
+
+Anything outside that subset raises DatabaseOperationError rather than
+returning wrong results.
+"""
+
+import math
+import re
+import secrets
+import string
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path as FilePath
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from open_notebook.database.backend import StorageBackend
+from open_notebook.exceptions import DatabaseOperationError
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up vector search
+    np = None  # type: ignore[assignment]
+
+
+class RecordId(str):
+    """A record id or record link, as opposed to a string that looks like one."""
+
+    @property
+    def table(self) -> str:
+        return self.split(":", 1)[0]
+
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<skip>\s+|--[^\n]*|//[^\n]*)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<number>\d+\.\d+(?:[eE]-?\d+)?|\d+)
+  | (?P<param>\$\w+)
+  | (?P<func>[A-Za-z_]\w*(?:::[A-Za-z_]\w*)+)
+  | (?P<thing>[A-Za-z_]\w*:(?:⟨[^⟩]*⟩|`[^`]*`|\w+))
+  | (?P<ident>[A-Za-z_]\w*|`[^`]*`)
+  | (?P<matches>@\d*@)
+  | (?P<op><-|->|<=|>=|!=|==|[-+*/=<>(),;.\[\]])
+    """,
+    re.VERBOSE,
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0"}
+
+# Keywords that end an expression in a SELECT
+_CLAUSES = {
+    "FROM", "WHERE", "GROUP", "ORDER", "LIMIT", "START", "FETCH", "OMIT",
+    "AS", "CONTENT", "MERGE", "SET", "RETURN", "ASC", "DESC", "SPLIT", "TIMEOUT",
+}
+_AGGREGATES = {"count", "math::max", "math::min", "math::sum", "math::mean"}
+_ID_ALPHABET = string.ascii_lowercase + string.digits
+
+_MIGRATIONS = FilePath(__file__).resolve().parents[2] / "migrations"
+_TABLE_DEFINITION_RE = re.compile(
+    r"DEFINE TABLE (?:IF NOT EXISTS |OVERWRITE )?(\w+)\s*(SCHEMAFULL|SCHEMALESS)?",
+    re.IGNORECASE,
+)
+
+
+def schemafull_tables(migrations: FilePath = _MIGRATIONS) -> List[str]:
+    """Tables that the up migrations leave SCHEMAFULL."""
+    files = sorted(
+        (path for path in migrations.glob("*.surrealql") if path.stem.isdigit()),
+        key=lambda path: int(path.stem),
+    )
+    modes: Dict[str, str] = {}
+    for path in files:
+        for table, mode in _TABLE_DEFINITION_RE.findall(path.read_text()):
+            modes[table] = (mode or "SCHEMALESS").upper()
+    return [table for table, mode in modes.items() if mode == "SCHEMAFULL"]
+
+
+class Token:
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind: str, value: Any):
+        self.kind = kind
+        self.value = value
+
+    def is_keyword(self, *words: str) -> bool:
+        return self.kind == "ident" and self.value.upper() in words
+
+    def is_op(self, *ops: str) -> bool:
+        return self.kind == "op" and self.value in ops
+
+
+def _unquote(text: str) -> str:
+    body = text[1:-1]
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _record_id(text: str) -> RecordId:
+    table, key = text.split(":", 1)
+    if key[:1] in ("⟨", "`"):
+        key = key[1:-1]
+    return RecordId(f"{table}:{key}")
+
+
+def tokenize(query: str) -> List[Token]:
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = _TOKEN_RE.match(query, position)
+        if match is None:
+            raise DatabaseOperationError(
+                f"Unsupported SurrealQL near: {query[position:position + 40]!r}"
+            )
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "skip":
+            continue
+        if kind == "string":
+            tokens.append(Token("literal", _unquote(text)))
+        elif kind == "number":
+            tokens.append(Token("literal", float(text) if "." in text else int(text)))
+        elif kind == "param":
+            tokens.append(Token("param", text[1:]))
+        elif kind == "thing":
+            tokens.append(Token("literal", _record_id(text)))
+        elif kind == "ident" and text.startswith("`"):
+            tokens.append(Token("ident", text[1:-1]))
+        else:
+            tokens.append(Token(kind, text))
+    tokens.append(Token("end", None))
+    return tokens
+
+
+# Expression nodes
+
+
+class Literal:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Param:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Path:
+    """A field path; steps are field names, "*", or ("<-" | "->", table)."""
+
+    __slots__ = ("steps",)
+
+    def __init__(self, steps: List[Any]):
+        self.steps = steps
+
+    @property
+    def names(self) -> List[str]:
+        return [s for s in self.steps if isinstance(s, str) and s != "*"]
+
+
+class Cast:
+    __slots__ = ("kind", "expr")
+
+    def __init__(self, kind: str, expr: Any):
+        self.kind = kind
+        self.expr = expr
+
+
+class Func:
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: str, args: List[Any]):
+        self.name = name
+        self.args = args
+
+
+class Binary:
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: Any, right: Any):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Unary:
+    __slots__ = ("op", "expr")
+
+    def __init__(self, op: str, expr: Any):
+        self.op = op
+        self.expr = expr
+
+
+class Array:
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+
+
+class Subquery:
+    __slots__ = ("statement",)
+
+    def __init__(self, statement: "Statement"):
+        self.statement = statement
+
+
+class Table:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Statement:
+    def __init__(self, kind: str, **parts: Any):
+        self.kind = kind
+        self.__dict__.update(parts)
+
+    def __getattr__(self, name: str) -> Any:
+        return None  # clauses that were not given
+
+
+class Parser:
+    def __init__(self, query: str):
+        self.tokens = tokenize(query)
+        self.position = 0
+
+    def peek(self, offset: int = 0) -> Token:
+        return self.tokens[min(self.position + offset, len(self.tokens) - 1)]
+
+    def next(self) -> Token:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def accept_keyword(self, *words: str) -> Optional[str]:
+        if self.peek().is_keyword(*words):
+            return self.next().value.upper()
+        return None
+
+    def accept_op(self, *ops: str) -> Optional[str]:
+        if self.peek().is_op(*ops):
+            return self.next().value
+        return None
+
+    def expect_keyword(self, word: str) -> None:
+        if not self.accept_keyword(word):
+            self.fail(f"expected {word}")
+
+    def expect_op(self, op: str) -> None:
+        if not self.accept_op(op):
+            self.fail(f"expected '{op}'")
+
+    def fail(self, message: str) -> None:
+        token = self.peek()
+        raise DatabaseOperationError(
+            f"Unsupported SurrealQL: {message}, got {token.value!r}"
+        )
+
+    def parse(self) -> List[Statement]:
+        statements = []
+        while self.peek().kind != "end":
+            if self.accept_op(";"):
+                continue
+            statements.append(self.statement())
+            if self.peek().kind != "end":
+                self.expect_op(";")
+        return statements
+
+    def statement(self) -> Statement:
+        token = self.peek()
+        if token.kind != "ident":
+            self.fail("expected a statement")
+        keyword = token.value.upper()
+        handler = getattr(self, f"_{keyword.lower()}", None)
+        if keyword not in _STATEMENTS or handler is None:
+            self.fail("unsupported statement")
+        self.next()
+        return handler()
+
+    def _begin(self) -> Statement:
+        self.accept_keyword("TRANSACTION")
+        return Statement("BEGIN")
+
+    def _commit(self) -> Statement:
+        self.accept_keyword("TRANSACTION")
+        return Statement("COMMIT")
+
+    def _cancel(self) -> Statement:
+        self.accept_keyword("TRANSACTION")
+        return Statement("CANCEL")
+
+    def _return(self) -> Statement:
+        return Statement("RETURN", value=self.expr())
+
+    def _target(self) -> Any:
+        token = self.peek()
+        if token.kind == "ident" and not self.peek(1).is_op("("):
+            self.next()
+            return Table(token.value)
+        return self.primary(postfix=False)
+
+    def _data(self) -> Tuple[Optional[str], Any]:
+        mode = self.accept_keyword("CONTENT", "MERGE", "SET")
+        if mode == "SET":
+            assignments = [self._assignment()]
+            while self.accept_op(","):
+                assignments.append(self._assignment())
+            return mode, assignments
+        return mode, self.expr() if mode else None
+
+    def _assignment(self) -> Tuple[str, Any]:
+        name = self.next().value
+        self.expect_op("=")
+        return name, self.expr()
+
+    def _returning(self) -> Any:
+        if not self.accept_keyword("RETURN"):
+            return "AFTER"
+        special = self.accept_keyword("NONE", "BEFORE", "AFTER", "DIFF")
+        if special:
+            return special
+        return self.fields()
+
+    def _create(self) -> Statement:
+        target = self._target()
+        _, data = self._data()
+        return Statement("CREATE", target=target, data=data, returning=self._returning())
+
+    def _upsert(self) -> Statement:
+        target = self._target()
+        mode, data = self._data()
+        return Statement(
+            "UPSERT", target=target, mode=mode, data=data, returning=self._returning()
+        )
+
+    def _update(self) -> Statement:
+        target = self._target()
+        mode, data = self._data()
+        where = self.expr() if self.accept_keyword("WHERE") else None
+        return Statement(
+            "UPDATE",
+            target=target,
+            mode=mode,
+            data=data,
+            where=where,
+            returning=self._returning(),
+        )
+
+    def _delete(self) -> Statement:
+        self.accept_keyword("FROM")
+        targets = [self._target()]
+        while self.accept_op(","):
+            targets.append(self._target())
+        return Statement("DELETE", targets=targets, returning=self._returning())
+
+    def _relate(self) -> Statement:
+        source = self.primary(postfix=False)
+        self.expect_op("->")
+        edge = self.next().value
+        self.expect_op("->")
+        target = self.primary(postfix=False)
+        _, data = self._data()
+        return Statement(
+            "RELATE",
+            source=source,
+            edge=edge,
+            target=target,
+            data=data,
+            returning=self._returning(),
+        )
+
+    def _insert(self) -> Statement:
+        self.expect_keyword("INTO")
+        table = self.next().value
+        values = self.primary(postfix=False)
+        return Statement("INSERT", table=table, values=values, returning=self._returning())
+
+    def fields(self) -> List[Tuple[Any, Optional[str]]]:
+        fields = []
+        while True:
+            if self.accept_op("*"):
+                fields.append(("*", None))
+            else:
+                expr = self.expr()
+                alias = None
+                if self.accept_keyword("AS"):
+                    alias = self.next().value
+                fields.append((expr, alias))
+            if not self.accept_op(","):
+                return fields
+
+    def _select(self) -> Statement:
+        select = Statement("SELECT")
+        if self.accept_keyword("VALUE"):
+            select.value = self.expr()
+        else:
+            select.fields = self.fields()
+            if self.accept_keyword("OMIT"):
+                select.omit = [self.path_names()]
+                while self.accept_op(","):
+                    select.omit.append(self.path_names())
+        self.expect_keyword("FROM")
+        self.accept_keyword("ONLY")
+        select.sources = [self._target()]
+        while self.accept_op(","):
+            select.sources.append(self._target())
+        while True:
+            if self.accept_keyword("WHERE"):
+                select.where = self.expr()
+            elif self.accept_keyword("GROUP"):
+                if self.accept_keyword("ALL"):
+                    select.group = []
+                else:
+                    self.accept_keyword("BY")
+                    select.group = [self.path_names()]
+                    while self.accept_op(","):
+                        select.group.append(self.path_names())
+            elif self.accept_keyword("ORDER"):
+                self.accept_keyword("BY")
+                select.order = []
+                while True:
+                    expr = self.expr()
+                    descending = self.accept_keyword("ASC", "DESC") == "DESC"
+                    select.order.append((expr, descending))
+                    if not self.accept_op(","):
+                        break
+            elif self.accept_keyword("LIMIT"):
+                self.accept_keyword("BY")
+                select.limit = self.expr()
+            elif self.accept_keyword("START"):
+                self.accept_keyword("AT")
+                select.start = self.expr()
+            elif self.accept_keyword("FETCH"):
+                select.fetch = [self.path_names()]
+                while self.accept_op(","):
+                    select.fetch.append(self.path_names())
+            else:
+                return select
+
+    def path_names(self) -> List[str]:
+        names = [self.next().value]
+        while self.accept_op("."):
+            names.append(self.next().value)
+        return names
+
+    # Expressions, loosest binding first
+
+    def expr(self) -> Any:
+        left = self.and_expr()
+        while self.accept_keyword("OR") or self.accept_op("||"):
+            left = Binary("OR", left, self.and_expr())
+        return left
+
+    def and_expr(self) -> Any:
+        left = self.comparison()
+        while self.accept_keyword("AND") or self.accept_op("&&"):
+            left = Binary("AND", left, self.comparison())
+        return left
+
+    def comparison(self) -> Any:
+        left = self.additive()
+        while True:
+            token = self.peek()
+            if token.is_op("=", "==", "!=", "<", ">", "<=", ">="):
+                op = self.next().value
+                left = Binary("=" if op == "==" else op, left, self.additive())
+            elif token.kind == "matches":
+                self.next()
+                left = Binary("@@", left, self.additive())
+            elif token.is_keyword("IN", "CONTAINS", "INSIDE"):
+                op = self.next().value.upper()
+                left = Binary("IN" if op == "INSIDE" else op, left, self.additive())
+            elif token.is_keyword("NOT") and self.peek(1).is_keyword("IN"):
+                self.next()
+                self.next()
+                left = Unary("NOT", Binary("IN", left, self.additive()))
+            elif token.is_keyword("IS"):
+                self.next()
+                op = "!=" if self.accept_keyword("NOT") else "="
+                left = Binary(op, left, self.additive())
+            else:
+                return left
+
+    def additive(self) -> Any:
+        left = self.multiplicative()
+        while True:
+            op = self.accept_op("+", "-")
+            if not op:
+                return left
+            left = Binary(op, left, self.multiplicative())
+
+    def multiplicative(self) -> Any:
+        left = self.unary()
+        while True:
+            op = self.accept_op("*", "/")
+            if not op:
+                return left
+            left = Binary(op, left, self.unary())
+
+    def unary(self) -> Any:
+        if self.accept_op("-"):
+            return Unary("-", self.unary())
+        if self.accept_keyword("NOT") or self.accept_op("!"):
+            return Unary("NOT", self.unary())
+        return self.primary()
+
+    def primary(self, postfix: bool = True) -> Any:
+        token = self.next()
+        if token.kind == "literal":
+            node: Any = Literal(token.value)
+        elif token.kind == "param":
+            node = Param(token.value)
+        elif token.is_op("("):
+            if self.peek().is_keyword(*_STATEMENTS):
+                node = Subquery(self.statement())
+            else:
+                node = self.expr()
+            self.expect_op(")")
+        elif token.is_op("["):
+            items = []
+            while not self.accept_op("]"):
+                items.append(self.expr())
+                self.accept_op(",")
+            node = Array(items)
+        elif token.is_op("<") and self.peek().kind == "ident" and self.peek(1).is_op(">"):
+            kind = self.next().value.lower()
+            self.next()
+            return Cast(kind, self.unary())
+        elif token.is_op("<-", "->"):
+            node = Path([(token.value, self.next().value)])
+        elif token.kind in ("func", "ident") and self.peek().is_op("("):
+            self.next()
+            args = []
+            while not self.accept_op(")"):
+                args.append(self.expr())
+                self.accept_op(",")
+            node = Func(token.value.lower(), args)
+        elif token.kind == "ident":
+            word = token.value.upper()
+            if word in ("TRUE", "FALSE"):
+                node = Literal(word == "TRUE")
+            elif word in ("NONE", "NULL"):
+                node = Literal(None)
+            else:
+                node = Path([token.value])
+        else:
+            self.position -= 1
+            self.fail("expected a value")
+        while postfix:
+            if self.accept_op("."):
+                step = "*" if self.accept_op("*") else self.next().value
+                node = self._extend(node, step)
+            elif self.peek().is_op("<-", "->") and self.peek(1).kind == "ident":
+                arrow = self.next().value
+                node = self._extend(node, (arrow, self.next().value))
+            else:
+                break
+        return node
+
+    def _extend(self, node: Any, step: Any) -> Path:
+        if isinstance(node, Path):
+            return Path(node.steps + [step])
+        # e.g. $param.field: keep the base as the first step
+        return Path([node, step])
+
+
+_STATEMENTS = {
+    "SELECT", "CREATE", "UPSERT", "UPDATE", "DELETE", "RELATE", "INSERT",
+    "BEGIN", "COMMIT", "CANCEL", "RETURN",
+}
+
+
+def _clone(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and not isinstance(value[0], (dict, list)):
+            return list(value)
+        return [_clone(item) for item in value]
+    return value
+
+
+def _deep_merge(target: Dict[str, Any], changes: Dict[str, Any]) -> None:
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merged = dict(target[key])
+            _deep_merge(merged, value)
+            target[key] = merged
+        else:
+            target[key] = _clone(value)
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
+
+
+def _sort_key(value: Any) -> Tuple:
+    if value is None:
+        return (0,)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.isoformat())
+    if isinstance(value, str):
+        return (3, value)
+    return (4, str(value))
+
+
+def _comparable(left: Any, right: Any) -> Tuple[Any, Any]:
+    # Datetimes may be stored as ISO strings, as SurrealDB serializes them
+    if isinstance(left, datetime) and isinstance(right, str):
+        return left.isoformat(), _as_iso(right)
+    if isinstance(right, datetime) and isinstance(left, str):
+        return _as_iso(left), right.isoformat()
+    return left, right
+
+
+def _as_iso(value: str) -> str:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).isoformat()
+    except ValueError:
+        return value
+
+
+def _terms(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def _cosine(left: List[float], right: List[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+class MemoryBackend(StorageBackend):
+    """Keeps all tables in process memory; nothing is persisted."""
+
+    def __init__(self, schemafull: Optional[Iterable[str]] = None) -> None:
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.schemafull = set(
+            schemafull_tables() if schemafull is None else schemafull
+        )
+        self._lock = threading.RLock()
+        self._snapshot: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+        self._parsed: Dict[str, List[Statement]] = {}
+        # table -> (table version the matrix was built from, rows, normalized matrix)
+        self._vectors: Dict[str, Tuple[int, List[Dict[str, Any]], Any]] = {}
+        # (table, field) -> (table version, term -> {record id: occurrences})
+        self._postings: Dict[Tuple[str, str], Tuple[int, Dict[str, Dict[str, int]]]] = {}
+        # Results of the subqueries of the running statement; a subquery does not
+        # see the outer row, so it only has to run once per statement
+        self._subqueries: Dict[int, Any] = {}
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._functions: Dict[str, Callable[..., Any]] = {
+            "fn::text_search": self._text_search,
+            "fn::vector_search": self._vector_search,
+            "fn::vector_candidates": self._vector_candidates,
+        }
+
+    def query(self, query_str: str, vars: Optional[Dict[str, Any]] = None) -> Any:
+        statements = self._parsed.get(query_str)
+        if statements is None:
+            statements = Parser(query_str).parse()
+            if len(self._parsed) < 4096:
+                self._parsed[query_str] = statements
+        params = dict(vars or {})
+        result: Any = []
+        with self._lock:
+            try:
+                for statement in statements:
+                    if statement.kind == "BEGIN":
+                        self._snapshot = {
+                            table: dict(rows) for table, rows in self.tables.items()
+                        }
+                    elif statement.kind == "COMMIT":
+                        self._snapshot = None
+                    elif statement.kind == "CANCEL":
+                        self._rollback()
+                    else:
+                        self._subqueries.clear()
+                        result = self.execute(statement, params, None)
+            except Exception:
+                if self._snapshot is not None:
+                    self._rollback()
+                raise
+            finally:
+                self._subqueries.clear()
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self.tables.clear()
+            self._vectors.clear()
+            self._postings.clear()
+            self._versions.clear()
+
+    def _rollback(self) -> None:
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            self.tables.clear()
+            self.tables.update(snapshot)
+            for table in list(self._versions):
+                self._versions[table] += 1
+
+    # Storage
+
+    def _new_id(self, table: str) -> RecordId:
+        key = secrets.choice(string.ascii_lowercase) + "".join(
+            secrets.choice(_ID_ALPHABET) for _ in range(19)
+        )
+        return RecordId(f"{table}:{key}")
+
+    def get_record(self, record_id: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(record_id, str) or ":" not in record_id:
+            return None
+        table = record_id.split(":", 1)[0]
+        return self.tables.get(table, {}).get(str(record_id))
+
+    def _store(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        table = row["id"].table
+        if table in self.schemafull:
+            for name, value in row.items():
+                if value is None:
+                    raise DatabaseOperationError(
+                        f"Found NULL for field `{name}`, with record `{row['id']}`, "
+                        "but expected a value or NONE"
+                    )
+        self.tables[table][str(row["id"])] = row
+        self._versions[table] += 1
+        return row
+
+    def _remove(self, record_id: str) -> None:
+        table = record_id.split(":", 1)[0]
+        if self.tables.get(table, {}).pop(record_id, None) is None:
+            return
+        self._versions[table] += 1
+        # Edges go with the records they connect, as in SurrealDB
+        for edge_table, rows in self.tables.items():
+            for edge_id, edge in list(rows.items()):
+                if "in" in edge and "out" in edge and record_id in (edge["in"], edge["out"]):
+                    del rows[edge_id]
+                    self._versions[edge_table] += 1
+
+    def _ids(self, target: Any, params: Dict[str, Any], doc: Any) -> List[RecordId]:
+        value = self.evaluate(target, params, doc)
+        values = value if isinstance(value, list) else [value]
+        return [RecordId(str(v)) for v in values if v]
+
+    def _returning(
+        self,
+        returning: Any,
+        after: List[Dict[str, Any]],
+        before: List[Optional[Dict[str, Any]]],
+        params: Dict[str, Any],
+    ) -> List[Any]:
+        if returning == "NONE":
+            return []
+        if returning == "BEFORE":
+            return [_clone(row) for row in before if row is not None]
+        if returning in ("AFTER", "DIFF"):
+            return [_clone(row) for row in after]
+        return [self._project(returning, row, params) for row in after]
+
+    # Statements
+
+    def execute(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        return getattr(self, f"_exec_{statement.kind.lower()}")(statement, params, doc)
+
+    def _exec_return(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        return self.evaluate(statement.value, params, doc)
+
+    def _content(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Dict[str, Any]:
+        if statement.mode == "SET":
+            return {}
+        data = self.evaluate(statement.data, params, doc) if statement.data else {}
+        if not isinstance(data, dict):
+            raise DatabaseOperationError(f"{statement.kind} data must be an object")
+        return data
+
+    def _exec_create(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        data = self._content(statement, params, doc)
+        if isinstance(statement.target, Table):
+            record_id = self._new_id(statement.target.name)
+        else:
+            record_id = self._ids(statement.target, params, doc)[0]
+        if self.get_record(record_id) is not None:
+            raise DatabaseOperationError(f"Database record `{record_id}` already exists")
+        row = self._store({**_clone(data), "id": record_id})
+        return self._returning(statement.returning, [row], [None], params)
+
+    def _exec_upsert(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        return self._write(statement, params, doc, create=True)
+
+    def _exec_update(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        return self._write(statement, params, doc, create=False)
+
+    def _write(
+        self, statement: Statement, params: Dict[str, Any], doc: Any, create: bool
+    ) -> Any:
+        data = self._content(statement, params, doc)
+        if isinstance(statement.target, Table):
+            targets = list(self.tables.get(statement.target.name, {}).keys())
+        else:
+            targets = self._ids(statement.target, params, doc)
+        after, before = [], []
+        for record_id in targets:
+            current = self.get_record(record_id)
+            if current is None and not create:
+                continue
+            if statement.where is not None and not self.evaluate(
+                statement.where, params, current or {}
+            ):
+                continue
+            if statement.mode == "SET":
+                row = dict(current or {})
+                for name, expr in statement.data:
+                    value = self.evaluate(expr, params, current or {})
+                    # Setting a field to NONE removes it
+                    if value is None:
+                        row.pop(name, None)
+                    else:
+                        row[name] = _clone(value)
+            elif statement.mode == "MERGE" and current is not None:
+                row = dict(current)
+                _deep_merge(row, data)
+            else:
+                row = _clone(data)
+            row["id"] = RecordId(record_id)
+            before.append(current)
+            after.append(self._store(row))
+        return self._returning(statement.returning, after, before, params)
+
+    def _exec_delete(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        before = []
+        for target in statement.targets:
+            if isinstance(target, Table):
+                record_ids = list(self.tables.get(target.name, {}).keys())
+            else:
+                record_ids = self._ids(target, params, doc)
+            for record_id in record_ids:
+                before.append(self.get_record(record_id))
+                self._remove(str(record_id))
+        returning = statement.returning if statement.returning != "AFTER" else "NONE"
+        return self._returning(returning, [], before, params)
+
+    def _exec_relate(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        data = self._content(statement, params, doc)
+        rows = []
+        for source in self._ids(statement.source, params, doc):
+            for target in self._ids(statement.target, params, doc):
+                row = {**_clone(data), "in": source, "out": target}
+                row["id"] = self._new_id(statement.edge)
+                rows.append(self._store(row))
+        return self._returning(statement.returning, rows, [None] * len(rows), params)
+
+    def _exec_insert(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        values = self.evaluate(statement.values, params, doc)
+        rows = []
+        for value in values if isinstance(values, list) else [values]:
+            row = _clone(value)
+            key = row.get("id")
+            if key is None:
+                row["id"] = self._new_id(statement.table)
+            elif ":" in str(key):
+                row["id"] = RecordId(str(key))
+            else:
+                row["id"] = RecordId(f"{statement.table}:{key}")
+            if self.get_record(row["id"]) is not None:
+                raise DatabaseOperationError(f"Database record `{row['id']}` already exists")
+            rows.append(row)
+        for row in rows:
+            self._store(row)
+        return self._returning(statement.returning, rows, [None] * len(rows), params)
+
+    def _exec_select(self, statement: Statement, params: Dict[str, Any], doc: Any) -> Any:
+        docs: List[Any] = []
+        for source in statement.sources:
+            docs.extend(self._source_rows(source, params, doc))
+        if statement.where is not None:
+            docs = [d for d in docs if self.evaluate(statement.where, params, d)]
+
+        if statement.value is not None:
+            pairs = [(d, self.evaluate(statement.value, params, d)) for d in docs]
+        elif statement.group is not None:
+            pairs = self._grouped(statement, docs, params)
+        else:
+            pairs = [(d, self._project(statement.fields, d, params)) for d in docs]
+            for names in statement.omit or []:
+                for _, row in pairs:
+                    self._omit(row, names)
+
+        for expr, descending in reversed(statement.order or []):
+            pairs.sort(
+                key=lambda pair: _sort_key(self._order_value(expr, pair, params)),
+                reverse=descending,
+            )
+        start = int(self.evaluate(statement.start, params, doc)) if statement.start else 0
+        rows = [row for _, row in pairs]
+        if statement.limit is not None:
+            rows = rows[start : start + int(self.evaluate(statement.limit, params, doc))]
+        elif start:
+            rows = rows[start:]
+        for names in statement.fetch or []:
+            for row in rows:
+                self._fetch(row, names)
+        return rows
+
+    def _source_rows(self, source: Any, params: Dict[str, Any], doc: Any) -> List[Any]:
+        if isinstance(source, Table):
+            return list(self.tables.get(source.name, {}).values())
+        value = self.evaluate(source, params, doc)
+        values = value if isinstance(value, list) else [value]
+        rows = []
+        for item in values:
+            if isinstance(item, str) and ":" in item:
+                record = self.get_record(item)
+                if record is not None:
+                    rows.append(record)
+            elif item is not None:
+                rows.append(item)
+        return rows
+
+    def _project(
+        self, fields: List[Tuple[Any, Optional[str]]], doc: Any, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        row: Dict[str, Any] = {}
+        for expr, alias in fields:
+            if expr == "*":
+                if isinstance(doc, dict):
+                    row.update(_clone(doc))
+                continue
+            self._set(row, self._alias(expr, alias), self.evaluate(expr, params, doc))
+        return row
+
+    def _alias(self, expr: Any, alias: Optional[str]) -> List[str]:
+        if alias:
+            return [alias]
+        if isinstance(expr, Path) and expr.names:
+            return expr.names
+        if isinstance(expr, Func):
+            return [expr.name]
+        raise DatabaseOperationError("Unsupported SurrealQL: computed field without AS")
+
+    def _set(self, row: Dict[str, Any], names: List[str], value: Any) -> None:
+        for name in names[:-1]:
+            nested = row.get(name)
+            row[name] = nested = dict(nested) if isinstance(nested, dict) else {}
+            row = nested
+        row[names[-1]] = _clone(value)
+
+    def _omit(self, row: Any, names: List[str]) -> None:
+        if not isinstance(row, dict):
+            return
+        if len(names) == 1:
+            row.pop(names[0], None)
+            return
+        nested = row.get(names[0])
+        if isinstance(nested, dict):
+            row[names[0]] = nested = dict(nested)
+            self._omit(nested, names[1:])
+        elif isinstance(nested, list):
+            row[names[0]] = nested = [dict(i) if isinstance(i, dict) else i for i in nested]
+            for item in nested:
+                self._omit(item, names[1:])
+
+    def _fetch(self, row: Any, names: List[str]) -> None:
+        if not isinstance(row, dict) or names[0] not in row:
+            return
+        value = row[names[0]]
+        if len(names) > 1:
+            for item in value if isinstance(value, list) else [value]:
+                self._fetch(item, names[1:])
+            return
+        if isinstance(value, list):
+            row[names[0]] = [self._fetched(item) for item in value]
+        else:
+            row[names[0]] = self._fetched(value)
+
+    def _fetched(self, value: Any) -> Any:
+        if isinstance(value, RecordId):
+            record = self.get_record(value)
+            return _clone(record) if record is not None else None
+        return value
+
+    def _order_value(self, expr: Any, pair: Tuple[Any, Any], params: Dict[str, Any]) -> Any:
+        source, row = pair
+        value = self.evaluate(expr, params, row)
+        if value is None and isinstance(expr, Path):
+            value = self.evaluate(expr, params, source)
+        return value
+
+    def _grouped(
+        self, statement: Statement, docs: List[Any], params: Dict[str, Any]
+    ) -> List[Tuple[Any, Dict[str, Any]]]:
+        plain = [(e, a) for e, a in statement.fields if not self._is_aggregate(e)]
+        aggregates = [(e, a) for e, a in statement.fields if self._is_aggregate(e)]
+        groups: Dict[Any, Tuple[Any, Dict[str, Any], List[Any]]] = {}
+        for doc in docs:
+            row = self._project(plain, doc, params)
+            key = tuple(_hashable(self._get(row, names)) for names in statement.group)
+            if key not in groups:
+                groups[key] = (doc, row, [])
+            groups[key][2].append(doc)
+        pairs = []
+        for doc, row, members in groups.values():
+            for expr, alias in aggregates:
+                self._set(row, self._alias(expr, alias), self._aggregate(expr, members, params))
+            pairs.append((doc, row))
+        return pairs
+
+    def _get(self, row: Dict[str, Any], names: List[str]) -> Any:
+        value: Any = row
+        for name in names:
+            value = value.get(name) if isinstance(value, dict) else None
+        return value
+
+    def _is_aggregate(self, expr: Any) -> bool:
+        return isinstance(expr, Func) and expr.name in _AGGREGATES
+
+    def _aggregate(self, func: Func, members: List[Any], params: Dict[str, Any]) -> Any:
+        if func.name == "count":
+            if not func.args:
+                return len(members)
+            return sum(1 for m in members if self.evaluate(func.args[0], params, m))
+        values = [self.evaluate(func.args[0], params, m) for m in members]
+        values = [v for v in values if v is not None]
+        if not values:
+            return None
+        if func.name == "math::max":
+            return max(values)
+        if func.name == "math::min":
+            return min(values)
+        if func.name == "math::sum":
+            return sum(values)
+        return sum(values) / len(values)
+
+    # Expressions
+
+    def evaluate(self, node: Any, params: Dict[str, Any], doc: Any) -> Any:
+        if isinstance(node, Literal):
+            return node.value
+        if isinstance(node, Path):
+            return self._path(node, params, doc)
+        if isinstance(node, Param):
+            if node.name not in params:
+                raise DatabaseOperationError(f"Unbound query variable ${node.name}")
+            return params[node.name]
+        if isinstance(node, Binary):
+            return self._binary(node, params, doc)
+        if isinstance(node, Func):
+            return self._call(node, params, doc)
+        if isinstance(node, Cast):
+            return self._cast(node.kind, self.evaluate(node.expr, params, doc))
+        if isinstance(node, Unary):
+            value = self.evaluate(node.expr, params, doc)
+            return -value if node.op == "-" else not value
+        if isinstance(node, Array):
+            return [self.evaluate(item, params, doc) for item in node.items]
+        if isinstance(node, Subquery):
+            if node.statement.kind != "SELECT":
+                return self.execute(node.statement, params, doc)
+            key = id(node)
+            if key not in self._subqueries:
+                self._subqueries[key] = self.execute(node.statement, params, doc)
+            return self._subqueries[key]
+        if isinstance(node, Table):
+            return list(self.tables.get(node.name, {}).values())
+        if node is None:
+            return None
+        raise DatabaseOperationError(f"Unsupported SurrealQL expression: {node!r}")
+
+    def _path(self, path: Path, params: Dict[str, Any], doc: Any) -> Any:
+        steps = path.steps
+        value = doc
+        if steps and not isinstance(steps[0], (str, tuple)):
+            value = self.evaluate(steps[0], params, doc)
+            steps = steps[1:]
+        for step in steps:
+            value = self._step(value, step)
+        return value
+
+    def _step(self, value: Any, step: Any) -> Any:
+        if isinstance(value, list):
+            return [self._step(item, step) for item in value]
+        if isinstance(value, RecordId):
+            value = self.get_record(value)
+        if value is None or step == "*":
+            return value
+        if isinstance(step, tuple):
+            return self._graph(value, *step)
+        if isinstance(value, dict):
+            return value.get(step)
+        return None
+
+    def _graph(self, record: Dict[str, Any], arrow: str, table: str) -> List[RecordId]:
+        if "in" in record and "out" in record:
+            # From an edge to the record at one of its ends
+            end = record["in"] if arrow == "<-" else record["out"]
+            return [end] if str(end).split(":", 1)[0] == table else []
+        # From a record to the edges of table that point at it
+        side = "out" if arrow == "<-" else "in"
+        return [
+            edge["id"]
+            for edge in self.tables.get(table, {}).values()
+            if edge.get(side) == record.get("id")
+        ]
+
+    def _binary(self, node: Binary, params: Dict[str, Any], doc: Any) -> Any:
+        op = node.op
+        left = self.evaluate(node.left, params, doc)
+        if op == "OR":
+            return left or self.evaluate(node.right, params, doc)
+        if op == "AND":
+            return left and self.evaluate(node.right, params, doc)
+        right = self.evaluate(node.right, params, doc)
+        if op == "=":
+            return left == right
+        if op == "!=":
+            return left != right
+        if op in ("<", ">", "<=", ">="):
+            if left is None or right is None:
+                return False
+            left, right = _comparable(left, right)
+            try:
+                if op == "<":
+                    return left < right
+                if op == ">":
+                    return left > right
+                if op == "<=":
+                    return left <= right
+                return left >= right
+            except TypeError:
+                return False
+        if op == "IN":
+            return right is not None and left in right
+        if op == "CONTAINS":
+            return left is not None and right in left
+        if op == "@@":
+            text = set(_terms(str(left or "")))
+            return bool(text) and all(term in text for term in _terms(str(right)))
+        if op == "+":
+            if isinstance(left, str) or isinstance(right, str):
+                return f"{left if left is not None else ''}{right if right is not None else ''}"
+            return (left or 0) + (right or 0)
+        if op == "-":
+            return (left or 0) - (right or 0)
+        if op == "*":
+            return (left or 0) * (right or 0)
+        if op == "/":
+            return (left or 0) / right if right else None
+        raise DatabaseOperationError(f"Unsupported SurrealQL operator {op}")
+
+    def _cast(self, kind: str, value: Any) -> Any:
+        if value is None:
+            return None
+        if kind == "record":
+            return RecordId(str(value))
+        if kind == "string":
+            return str(value)
+        if kind == "int":
+            return int(value)
+        if kind in ("float", "number", "decimal"):
+            return float(value)
+        if kind == "bool":
+            return bool(value)
+        return value  # datetime and anything else are compared as stored
+
+    def _call(self, func: Func, params: Dict[str, Any], doc: Any) -> Any:
+        args = [self.evaluate(arg, params, doc) for arg in func.args]
+        name = func.name
+        if name in self._functions:
+            return self._functions[name](*args)
+        if name == "count":
+            return len(args[0]) if args and isinstance(args[0], list) else 1
+        if name in ("math::max", "math::min", "math::sum", "math::mean"):
+            values = [v for v in (args[0] or []) if v is not None]
+            if not values:
+                return None
+            return self._aggregate(Func(name, [Path(["v"])]), [{"v": v} for v in values], params)
+        if name == "vector::similarity::cosine":
+            if not args[0] or not args[1]:
+                return None
+            return _cosine(args[0], args[1])
+        if name == "type::thing":
+            return RecordId(f"{args[0]}:{args[1]}")
+        if name == "string::lowercase":
+            return str(args[0]).lower()
+        if name == "array::len":
+            return len(args[0] or [])
+        if name == "array::union":
+            merged: List[Any] = []
+            for item in (args[0] or []) + (args[1] or []):
+                if item not in merged:
+                    merged.append(item)
+            return merged
+        if name == "time::now":
+            return datetime.utcnow().isoformat() + "Z"
+        raise DatabaseOperationError(f"Unsupported SurrealQL function {name}()")
+
+    # Search functions, mirroring migrations/4.surrealql, 7.surrealql and 8.surrealql
+
+    def _rows(self, table: str) -> Iterable[Dict[str, Any]]:
+        return self.tables.get(table, {}).values()
+
+    def _title(self, record_id: Any) -> Optional[str]:
+        record = self.get_record(record_id)
+        return record.get("title") if record else None
+
+    def _term_postings(self, table: str, field: str) -> Dict[str, Dict[str, int]]:
+        version = self._versions[table]
+        cached = self._postings.get((table, field))
+        if cached is None or cached[0] != version:
+            postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+            for record_id, row in self.tables.get(table, {}).items():
+                for term in _terms(str(row.get(field) or "")):
+                    counts = postings[term]
+                    counts[record_id] = counts.get(record_id, 0) + 1
+            cached = self._postings[(table, field)] = (version, postings)
+        return cached[1]
+
+    def _matches(
+        self, table: str, field: str, terms: List[str]
+    ) -> Iterable[Tuple[Dict[str, Any], float]]:
+        # Rows containing every term, scored by how often the terms occur
+        postings = self._term_postings(table, field)
+        candidates = [postings.get(term, {}) for term in terms]
+        rows = self.tables.get(table, {})
+        for record_id in min(candidates, key=len):
+            if all(record_id in counts for counts in candidates):
+                relevance = float(sum(counts[record_id] for counts in candidates))
+                yield rows[record_id], relevance
+
+    def _text_search(
+        self, query_text: str, match_count: int, sources: bool, show_notes: bool
+    ) -> List[Dict[str, Any]]:
+        terms = _terms(query_text)
+        if not terms:
+            return []
+
+        hits: List[Tuple[Any, Any, Optional[str], float]] = []
+        if sources:
+            for field in ("title", "full_text"):
+                for row, relevance in self._matches("source", field, terms):
+                    hits.append((row["id"], row["id"], row.get("title"), relevance))
+            for row, relevance in self._matches("source_embedding", "content", terms):
+                source = row.get("source")
+                hits.append((source, source, self._title(source), relevance))
+            for row, relevance in self._matches("source_insight", "content", terms):
+                title = f"{row.get('insight_type')} - {self._title(row.get('source')) or ''}"
+                hits.append((row["id"], row["id"], title, relevance))
+        if show_notes:
+            for field in ("title", "content"):
+                for row, relevance in self._matches("note", field, terms):
+                    hits.append((row["id"], row["id"], row.get("title"), relevance))
+
+        best: Dict[Tuple, Dict[str, Any]] = {}
+        for record_id, parent_id, title, relevance in hits:
+            if record_id is None:
+                continue
+            key = (record_id, parent_id, title)
+            if key not in best or best[key]["relevance"] < relevance:
+                best[key] = dict(id=record_id, parent_id=parent_id, title=title, relevance=relevance)
+        results = sorted(best.values(), key=lambda row: row["relevance"], reverse=True)
+        return results[:match_count]
+
+    def _similarities(
+        self, table: str, query: List[float]
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        rows = [row for row in self._rows(table) if row.get("embedding")]
+        if np is None:
+            return [(row, _cosine(row["embedding"], query)) for row in rows]
+        cached = self._vectors.get(table)
+        version = self._versions[table]
+        if cached is None or cached[0] != version:
+            matrix = np.array([row["embedding"] for row in rows], dtype=np.float32)
+            if len(rows):
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms == 0, 1, norms)
+            cached = self._vectors[table] = (version, rows, matrix)
+        _, rows, matrix = cached
+        if not rows:
+            return []
+        vector = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        scores = matrix @ (vector / norm if norm else vector)
+        return list(zip(rows, scores.tolist()))
+
+    def _vector_candidates(
+        self,
+        query: List[float],
+        match_count: int,
+        sources: bool,
+        show_notes: bool,
+        min_similarity: float,
+        model: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        def top(table: str) -> List[Tuple[Dict[str, Any], float]]:
+            matches = [
+                (row, similarity)
+                for row, similarity in self._similarities(table, query)
+                if similarity >= min_similarity
+                and (not model or row.get("embedding_model") == model)
+            ]
+            matches.sort(key=lambda match: match[1], reverse=True)
+            return matches[:match_count]
+
+        def candidate(row, record_id, parent_id, title, similarity) -> Dict[str, Any]:
+            return dict(
+                id=record_id,
+                title=title,
+                content=row.get("content"),
+                parent_id=parent_id,
+                embedding=_clone(row.get("embedding")),
+                embedding_packed=row.get("embedding_packed"),
+                kind=row["id"].split(":", 1)[0],
+                similarity=similarity,
+            )
+
+        candidates: List[Dict[str, Any]] = []
+        if sources:
+            for row, similarity in top("source_embedding"):
+                source = row.get("source")
+                candidates.append(candidate(row, source, source, self._title(source), similarity))
+            for row, similarity in top("source_insight"):
+                title = f"{row.get('insight_type')} - {self._title(row.get('source')) or ''}"
+                candidates.append(candidate(row, row["id"], row.get("source"), title, similarity))
+        if show_notes:
+            for row, similarity in top("note"):
+                candidates.append(candidate(row, row["id"], row["id"], row.get("title"), similarity))
+        return candidates
+
+    def _vector_search(
+        self,
+        query: List[float],
+        match_count: int,
+        sources: bool,
+        show_notes: bool,
+        min_similarity: float,
+        model: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        hits = self._vector_candidates(
+            query, match_count, sources, show_notes, min_similarity, model
+        )
+        grouped: Dict[Tuple, Dict[str, Any]] = {}
+        for hit in hits:
+            if hit["id"] is None:
+                continue
+            key = (hit["id"], hit["parent_id"], hit["title"])
+            result = grouped.setdefault(
+                key,
+                dict(
+                    id=hit["id"],
+                    parent_id=hit["parent_id"],
+                    title=hit["title"],
+                    similarity=hit["similarity"],
+                    matches=[],
+                ),
+            )
+            result["similarity"] = max(result["similarity"], hit["similarity"])
+            result["matches"].append(hit["content"])
+        results = sorted(grouped.values(), key=lambda row: row["similarity"], reverse=True)
+        return results[:match_count]
@@ -24,6 +24,9 @@ class MigrationManager:
             Migration.from_file("migrations/3.surrealql"),
             Migration.from_file("migrations/4.surrealql"),
             Migration.from_file("migrations/5.surrealql"),
+            Migration.from_file("migrations/6.surrealql"),
+            Migration.from_file("migrations/7.surrealql"),
+            Migration.from_file("migrations/8.surrealql"),
         ]
         self.down_migrations = [
             Migration.from_file(
@@ -33,6 +36,9 @@ class MigrationManager:
             Migration.from_file("migrations/3_down.surrealql"),
             Migration.from_file("migrations/4_down.surrealql"),
             Migration.from_file("migrations/5_down.surrealql"),
+            Migration.from_file("migrations/6_down.surrealql"),
+            Migration.from_file("migrations/7_down.surrealql"),
+            Migration.from_file("migrations/8_down.surrealql"),
         ]
         self.runner = MigrationRunner(
             up_migrations=self.up_migrations,
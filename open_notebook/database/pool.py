@@ -0,0 +1,327 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterator,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from loguru import logger
+from sblpy.async_connection import AsyncSurrealConnection
+from sblpy.connection import SurrealSyncConnection
+
+from open_notebook.exceptions import DatabaseOperationError
+
+try:
+    from websockets.exceptions import ConnectionClosed
+except ImportError:  # websockets is pulled in by sblpy, but don't hard-fail without it
+    ConnectionClosed = ConnectionError  # type: ignore[misc, assignment]
+
+# Errors that mean the socket itself is unusable, as opposed to a query error
+CONNECTION_ERRORS: Tuple[Type[BaseException], ...] = (
+    ConnectionError,
+    ConnectionClosed,
+    OSError,
+    TimeoutError,
+)
+
+
+@dataclass
+class PooledConnection:
+    connection: Any
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+
+
+def close_connection(connection: SurrealSyncConnection) -> None:
+    if connection and hasattr(connection, "socket") and connection.socket:
+        try:
+            connection.socket.close()
+        except Exception as close_exc:
+            logger.error(f"Error closing socket: {close_exc}")
+
+
+async def aclose_connection(connection: AsyncSurrealConnection) -> None:
+    if connection and hasattr(connection, "socket") and connection.socket:
+        try:
+            await connection.socket.close()
+        except Exception as close_exc:
+            logger.error(f"Error closing socket: {close_exc}")
+
+
+class SurrealConnectionPool:
+    """
+    Thread-safe pool of SurrealSyncConnection objects.
+
+    Connections are opened lazily up to max_size, handed out LIFO so the
+    warmest socket is reused first, pinged before reuse once they have been
+    idle for longer than health_check_interval and closed once they have been
+    idle for longer than max_idle_time.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], SurrealSyncConnection],
+        max_size: int = 8,
+        max_idle_time: float = 300.0,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 30.0,
+    ):
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._condition = threading.Condition()
+        self._idle: Deque[PooledConnection] = deque()
+        self._size = 0
+        self._pid = os.getpid()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle and checked out."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _reset_after_fork(self) -> None:
+        # Sockets inherited from the parent process must not be shared
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._size = 0
+            self._pid = os.getpid()
+
+    def _evict_idle(self, now: float) -> None:
+        # Oldest idle connections sit at the left of the deque
+        while self._idle and now - self._idle[0].last_used > self.max_idle_time:
+            pooled = self._idle.popleft()
+            self._size -= 1
+            logger.debug("Closing idle SurrealDB connection")
+            close_connection(pooled.connection)
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        try:
+            pooled.connection.query("RETURN true;")
+            pooled.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy SurrealDB connection: {e}")
+            return False
+
+    def acquire(self) -> PooledConnection:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            pooled: Optional[PooledConnection] = None
+            with self._condition:
+                if self._closed:
+                    raise DatabaseOperationError("Connection pool is closed")
+                self._reset_after_fork()
+                self._evict_idle(time.monotonic())
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DatabaseOperationError(
+                            f"Timed out waiting for a database connection "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if pooled is None:
+                try:
+                    return PooledConnection(connection=self.factory())
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+
+            now = time.monotonic()
+            if (
+                now - pooled.last_checked < self.health_check_interval
+                or self._is_healthy(pooled)
+            ):
+                return pooled
+            self.discard(pooled)
+
+    def release(self, pooled: PooledConnection) -> None:
+        pooled.last_used = time.monotonic()
+        with self._condition:
+            if self._closed or self._pid != os.getpid():
+                close_connection(pooled.connection)
+                return
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def discard(self, pooled: PooledConnection) -> None:
+        close_connection(pooled.connection)
+        with self._condition:
+            if self._pid == os.getpid():
+                self._size -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[SurrealSyncConnection]:
+        pooled = self.acquire()
+        try:
+            yield pooled.connection
+        except CONNECTION_ERRORS:
+            self.discard(pooled)
+            raise
+        except Exception:
+            # Query errors leave the socket usable, but make sure before reuse
+            pooled.last_checked = 0.0
+            self.release(pooled)
+            raise
+        except BaseException:
+            # Interrupted mid-query (KeyboardInterrupt, GeneratorExit): the reply
+            # may still arrive on the socket and be read by the next query
+            self.discard(pooled)
+            raise
+        else:
+            pooled.last_checked = time.monotonic()
+            self.release(pooled)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                pooled = self._idle.pop()
+                self._size -= 1
+                close_connection(pooled.connection)
+            self._condition.notify_all()
+
+
+class AsyncSurrealConnectionPool:
+    """
+    asyncio counterpart of SurrealConnectionPool.
+
+    Must only be used from the event loop it was first used on; the
+    repository keeps one instance per running loop.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[AsyncSurrealConnection]],
+        max_size: int = 8,
+        max_idle_time: float = 300.0,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 30.0,
+    ):
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        # Bounds the number of checked-out connections; idle ones are reused
+        # before new ones are opened, so the total never exceeds max_size.
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._idle: Deque[PooledConnection] = deque()
+        self._closed = False
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def _evict_idle(self, now: float) -> None:
+        while self._idle and now - self._idle[0].last_used > self.max_idle_time:
+            pooled = self._idle.popleft()
+            logger.debug("Closing idle SurrealDB connection")
+            await aclose_connection(pooled.connection)
+
+    async def _is_healthy(self, pooled: PooledConnection) -> bool:
+        try:
+            await pooled.connection.query("RETURN true;")
+            pooled.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy SurrealDB connection: {e}")
+            return False
+
+    async def acquire(self) -> PooledConnection:
+        if self._closed:
+            raise DatabaseOperationError("Connection pool is closed")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise DatabaseOperationError(
+                f"Timed out waiting for a database connection "
+                f"(pool size {self.max_size})"
+            )
+        try:
+            await self._evict_idle(time.monotonic())
+            while self._idle:
+                pooled = self._idle.pop()
+                if time.monotonic() - pooled.last_checked < (
+                    self.health_check_interval
+                ) or await self._is_healthy(pooled):
+                    return pooled
+                await aclose_connection(pooled.connection)
+            return PooledConnection(connection=await self.factory())
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, pooled: PooledConnection) -> None:
+        pooled.last_used = time.monotonic()
+        if self._closed:
+            await aclose_connection(pooled.connection)
+        else:
+            self._idle.append(pooled)
+        self._semaphore.release()
+
+    async def discard(self, pooled: PooledConnection) -> None:
+        try:
+            await aclose_connection(pooled.connection)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncSurrealConnection]:
+        pooled = await self.acquire()
+        try:
+            yield pooled.connection
+        except CONNECTION_ERRORS:
+            await self.discard(pooled)
+            raise
+        except Exception:
+            pooled.last_checked = 0.0
+            await self.release(pooled)
+            raise
+        except BaseException:
+            # Cancelled mid-query: the reply may still arrive on the socket
+            await self.discard(pooled)
+            raise
+        else:
+            pooled.last_checked = time.monotonic()
+            await self.release(pooled)
+
+    async def close(self) -> None:
+        self._closed = True
+        while self._idle:
+            pooled = self._idle.pop()
+            await aclose_connection(pooled.connection)
@@ -1,16 +1,62 @@
+import asyncio
+import atexit
 import os
-from contextlib import contextmanager
-from typing import Any, Dict, Optional
+import secrets
+import string
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from loguru import logger
+from sblpy.async_connection import AsyncSurrealConnection
 from sblpy.connection import SurrealSyncConnection
 
+from open_notebook.database.backend import StorageBackend
+from open_notebook.database.instrumentation import observe_query
+from open_notebook.database.pool import (
+    CONNECTION_ERRORS,
+    AsyncSurrealConnectionPool,
+    SurrealConnectionPool,
+)
+from open_notebook.database.routing import (
+    Endpoint,
+    ReadRouter,
+    is_idempotent_query,
+    is_read_query,
+    read_router_from_env,
+)
+from open_notebook.database.write_queue import WriteBehindQueue
 
-@contextmanager
-def db_connection():
-    connection = SurrealSyncConnection(
-        host=os.environ["SURREAL_ADDRESS"],
-        port=int(os.environ["SURREAL_PORT"]),
+# One pool per endpoint: the primary and each read replica
+_pools: Dict[Endpoint, SurrealConnectionPool] = {}
+_pool_lock = threading.Lock()
+# One set of async pools per event loop, since asyncio sockets are bound to their loop
+_async_pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_write_queue: Optional[WriteBehindQueue] = None
+_backend: Optional[StorageBackend] = None
+_read_router: Optional[ReadRouter] = None
+# Told about records the repo_* helpers write, e.g. to drop them from caches
+_write_listeners: List[Callable[..., None]] = []
+
+
+def primary_endpoint() -> Endpoint:
+    return Endpoint(os.environ["SURREAL_ADDRESS"], int(os.environ["SURREAL_PORT"]))
+
+
+def get_read_router() -> ReadRouter:
+    global _read_router
+    if _read_router is None:
+        with _pool_lock:
+            if _read_router is None:
+                _read_router = read_router_from_env()
+    return _read_router
+
+
+def _connection_kwargs(endpoint: Endpoint) -> Dict[str, Any]:
+    return dict(
+        host=endpoint.host,
+        port=endpoint.port,
         user=os.environ["SURREAL_USER"],
         password=os.environ["SURREAL_PASS"],
         namespace=os.environ["SURREAL_NAMESPACE"],
@@ -18,24 +64,248 @@ def db_connection():
         max_size=2.2**20,
         encrypted=False,  # Set to True if using SSL
     )
+
+
+def _pool_settings() -> Dict[str, Any]:
+    return dict(
+        max_size=int(os.environ.get("SURREAL_POOL_SIZE", 8)),
+        max_idle_time=float(os.environ.get("SURREAL_POOL_MAX_IDLE", 300)),
+        health_check_interval=float(
+            os.environ.get("SURREAL_POOL_HEALTH_CHECK_INTERVAL", 30)
+        ),
+        acquire_timeout=float(os.environ.get("SURREAL_POOL_TIMEOUT", 30)),
+    )
+
+
+def _new_connection(endpoint: Endpoint) -> SurrealSyncConnection:
+    return SurrealSyncConnection(**_connection_kwargs(endpoint))
+
+
+async def _anew_connection(endpoint: Endpoint) -> AsyncSurrealConnection:
+    connection = AsyncSurrealConnection(**_connection_kwargs(endpoint))
+    await connection.connect()
+    return connection
+
+
+def get_pool(endpoint: Optional[Endpoint] = None) -> SurrealConnectionPool:
+    endpoint = endpoint or primary_endpoint()
+    pool = _pools.get(endpoint)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(endpoint)
+            if pool is None:
+                pool = _pools[endpoint] = SurrealConnectionPool(
+                    factory=lambda: _new_connection(endpoint), **_pool_settings()
+                )
+                atexit.register(pool.close)
+    return pool
+
+
+def get_async_pool(endpoint: Optional[Endpoint] = None) -> AsyncSurrealConnectionPool:
+    endpoint = endpoint or primary_endpoint()
+    pools = _async_pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get(endpoint)
+    if pool is None:
+        pool = pools[endpoint] = AsyncSurrealConnectionPool(
+            factory=lambda: _anew_connection(endpoint), **_pool_settings()
+        )
+    return pool
+
+
+def close_pool() -> None:
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+async def aclose_pool() -> None:
+    pools = _async_pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.close()
+
+
+def _endpoints(query_str: str, read_only: Optional[bool]) -> List[Endpoint]:
+    """
+    Endpoints to try for a query, in order.
+
+    Reads try the available replicas first, unless this process wrote
+    recently; everything ends with the primary twice, so a connection the
+    server dropped is retried once on a fresh one (see _can_retry).
+    """
+    primary = primary_endpoint()
+    reads = is_read_query(query_str)
+    if not reads:
+        # Whatever this process reads next must see the write
+        get_read_router().wrote()
+    if not (reads if read_only is None else read_only):
+        return [primary, primary]
+    return [*get_read_router().candidates(), primary, primary]
+
+
+def _can_retry(query_str: str, sent: bool) -> bool:
+    # A query lost with its connection may have run anyway; only one that
+    # never left, or that can run twice, is sent again
+    return not sent or is_idempotent_query(query_str)
+
+
+def _connection_lost(endpoint: Endpoint, error: BaseException) -> None:
+    if endpoint == primary_endpoint():
+        logger.warning(f"Database connection lost, reconnecting: {error}")
+    else:
+        get_read_router().mark_down(endpoint, error)
+
+
+def set_backend(backend: Optional[StorageBackend]) -> Optional[StorageBackend]:
+    """
+    Run every repo_* query against backend instead of the SurrealDB server.
+
+    Pass None to go back to the server. Returns the backend that was installed
+    before, so callers can restore it.
+    """
+    global _backend
+    with _pool_lock:
+        previous, _backend = _backend, backend
+    return previous
+
+
+def get_backend() -> Optional[StorageBackend]:
+    """
+    The installed backend, or None when queries go to the SurrealDB server.
+
+    SURREAL_BACKEND=memory installs an empty MemoryBackend on first use.
+    """
+    global _backend
+    if _backend is None and os.environ.get("SURREAL_BACKEND", "server") == "memory":
+        from open_notebook.database.memory import MemoryBackend
+
+        with _pool_lock:
+            if _backend is None:
+                _backend = MemoryBackend()
+    return _backend
+
+
+def on_records_written(callback: Callable[..., None]) -> None:
+    """
+    Call callback(*record_ids) after the repo_* helpers write to those
+    records, and callback() with no ids after writes whose records are not
+    known, such as records_written() from a table-wide UPDATE.
+    """
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+
+def records_written(*record_ids: Any) -> None:
+    """Tell the listeners which records were written; none means any may be."""
+    for callback in _write_listeners:
+        callback(*[str(record_id) for record_id in record_ids])
+
+
+def _write_behind_settings() -> Dict[str, Any]:
+    return dict(
+        interval=float(os.environ.get("SURREAL_WRITE_BEHIND_INTERVAL_MS", 50)) / 1000,
+        max_items=int(os.environ.get("SURREAL_WRITE_BEHIND_MAX_ITEMS", 100)),
+    )
+
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """The write-behind queue, or None unless SURREAL_WRITE_BEHIND is enabled."""
+    global _write_queue
+    if os.environ.get("SURREAL_WRITE_BEHIND", "false").lower() not in ("1", "true", "yes"):
+        return None
+    if _write_queue is None:
+        with _pool_lock:
+            if _write_queue is None:
+                _write_queue = WriteBehindQueue(
+                    execute=_write_batch, **_write_behind_settings()
+                )
+                atexit.register(close_write_queue)
+    return _write_queue
+
+
+def close_write_queue() -> None:
+    global _write_queue
+    with _pool_lock:
+        queue, _write_queue = _write_queue, None
+    if queue is not None:
+        queue.close()
+
+
+def flush_writes() -> None:
+    """
+    Wait until every write queued by this process is committed.
+
+    Raises WriteBehindError for queued writes that could not be committed,
+    including ones a background flush gave up on since the last call.
+    """
+    queue = _write_queue
+    if queue is not None and queue.busy():
+        queue.flush()
+
+
+def _write_batch(query_str: str, vars: Dict[str, Any]):
+    with observe_query(query_str) as observation:
+        observation.result = _run_query(query_str, vars, read_only=False)
+    return observation.result
+
+
+@contextmanager
+def db_connection(endpoint: Optional[Endpoint] = None):
     try:
-        yield connection
+        with get_pool(endpoint).connection() as connection:
+            yield connection
     except Exception as e:
         logger.error(f"Error during database operation: {e}")
         raise
-    finally:
-        if connection and hasattr(connection, 'socket') and connection.socket:
-            try:
-                connection.socket.close()
-            except Exception as close_exc:
-                logger.error(f"Error closing socket: {close_exc}")
 
 
-def repo_query(query_str: str, vars: Optional[Dict[str, Any]] = None):
-    with db_connection() as connection:
+def repo_query(
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    read_only: Optional[bool] = None,
+):
+    """
+    Run query_str and return its result.
+
+    Reads may be served by a read replica. Pass read_only=False to force the
+    primary (e.g. to read back a write at once), or read_only=True for a read
+    the statement type alone does not reveal. By default the statements
+    decide.
+    """
+    # Queued writes go first, so the process always reads its own writes
+    flush_writes()
+    with observe_query(query_str) as observation:
+        observation.result = _run_query(query_str, vars, read_only)
+    return observation.result
+
+
+def _run_query(
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    read_only: Optional[bool] = None,
+):
+    backend = get_backend()
+    if backend is not None:
+        return backend.query(query_str, vars)
+    # A pooled socket can be dropped by the server between health checks, or
+    # a replica can go away; move on to the next endpoint before giving up.
+    endpoints = _endpoints(query_str, read_only)
+    for attempt, endpoint in enumerate(endpoints):
+        sent = False
         try:
-            result = connection.query(query_str, vars)
+            with db_connection(endpoint) as connection:
+                sent = True
+                result = connection.query(query_str, vars)
+            get_read_router().mark_up(endpoint)
             return result
+        except CONNECTION_ERRORS as e:
+            if attempt < len(endpoints) - 1 and _can_retry(query_str, sent):
+                _connection_lost(endpoint, e)
+                continue
+            logger.critical(f"Query: {query_str}")
+            logger.exception(e)
+            raise
         except Exception as e:
             logger.critical(f"Query: {query_str}")
             logger.exception(e)
@@ -48,23 +318,381 @@ def repo_create(table: str, data: Dict[str, Any]):
 
 
 def repo_upsert(table: str, data: Dict[str, Any]):
-    query = f"UPSERT {table} CONTENT {data};"
-    return repo_query(query)
+    query = f"UPSERT {table} CONTENT $data;"
+    try:
+        return repo_query(query, {"data": data})
+    finally:
+        if ":" in table:
+            records_written(table)
 
 
 def repo_update(id: str, data: Dict[str, Any]):
     query = "UPDATE $id CONTENT $data;"
     vars = {"id": id, "data": data}
-    return repo_query(query, vars)
+    try:
+        return repo_query(query, vars)
+    finally:
+        records_written(id)
+
+
+def _merge_clause(data: Dict[str, Any], var: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    The MERGE of data into a record, and the value to bind to var.
+
+    A field set to None is removed with NONE: bound as a variable it would be
+    stored as NULL, which the option<> fields of SCHEMAFULL tables reject.
+    """
+    cleared = [name for name, value in data.items() if value is None]
+    if not cleared:
+        return f"MERGE ${var}", data
+    values = {name: value for name, value in data.items() if value is not None}
+    assignments = [f"{name} = ${var}.{name}" for name in values]
+    assignments.extend(f"{name} = NONE" for name in cleared)
+    return f"SET {', '.join(assignments)}", values
+
+
+def _merge_query(data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    clause, values = _merge_clause(data, "data")
+    # Only the merged fields come back, not the whole record
+    return f"UPDATE $id {clause} RETURN {', '.join(['id', *data])};", values
+
+
+def repo_merge(id: str, data: Dict[str, Any]):
+    """
+    Update only the given fields of a record, leaving the others as stored.
+    Fields set to None are removed from the record.
+    """
+    query, values = _merge_query(data)
+    try:
+        return repo_query(query, {"id": id, "data": values})
+    finally:
+        records_written(id)
+
+
+def new_record_id(table: str) -> str:
+    """A random id in the form SurrealDB generates, for records created client-side."""
+    alphabet = string.ascii_lowercase + string.digits
+    key = secrets.choice(string.ascii_lowercase) + "".join(
+        secrets.choice(alphabet) for _ in range(19)
+    )
+    return f"{table}:{key}"
+
+
+def repo_enqueue(query_str: str, vars: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Queue a write that nobody waits on, or run it now without write-behind.
+
+    The statement's result is not available; reads issued from this process
+    afterwards still see the write.
+    """
+    queue = get_write_queue()
+    if queue is None:
+        repo_query(query_str, vars)
+    else:
+        queue.enqueue(query_str, vars)
 
 
 def repo_delete(id: str):
     query = "DELETE $id;"
     vars = {"id": id}
-    return repo_query(query, vars)
+    try:
+        return repo_query(query, vars)
+    finally:
+        records_written(id)
 
 
 def repo_relate(source: str, relationship: str, target: str, data: Optional[Dict] = {}):
     query = f"RELATE {source}->{relationship}->{target} CONTENT $content;"
     result = repo_query(query, {"content": data})
     return result
+
+
+def encode_vector(vector: Optional[Sequence[float]]) -> Optional[List[float]]:
+    """
+    Prepare an embedding for use as a bound query variable.
+
+    Embedding providers produce float32 values, but a Python float is written
+    to JSON with up to 17 significant digits. With the default "float32"
+    SURREAL_VECTOR_ENCODING, each value is trimmed to the 9 significant digits
+    that identify a float32 exactly, which cuts the request size by about a
+    third without changing any similarity score. Set it to "float64" to send
+    values untouched.
+    """
+    if vector is None:
+        return None
+    if os.environ.get("SURREAL_VECTOR_ENCODING", "float32") == "float64":
+        return list(vector)
+    return [float(f"{value:.9g}") for value in vector]
+
+
+def _insert_batch_size() -> int:
+    return int(os.environ.get("SURREAL_INSERT_BATCH_SIZE", 100))
+
+
+def _insert_query(table: str, record_fields: Optional[List[str]]) -> str:
+    values = "$rows"
+    if record_fields:
+        casts = ", ".join(f"<record> {field} AS {field}" for field in record_fields)
+        values = f"(SELECT *, {casts} FROM $rows)"
+    return f"INSERT INTO {table} {values} RETURN id;"
+
+
+def repo_insert_many(
+    table: str,
+    rows: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    record_fields: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Insert rows into table with one INSERT statement per batch.
+
+    Each batch is a single statement, so SurrealDB applies it atomically, but
+    the batches are not one transaction: rows from earlier batches are visible
+    to other readers as soon as their batch is in. If a later batch fails,
+    those rows are deleted again on a best-effort basis before the original
+    error is raised; rows the cleanup could not delete are logged.
+
+    Fields listed in record_fields hold record ids as strings (e.g.
+    "source:abc") and are cast to record links on the server.
+
+    Returns the ids of the inserted rows, in input order.
+    """
+    if not rows:
+        return []
+    batch_size = batch_size or _insert_batch_size()
+    query = _insert_query(table, record_fields)
+
+    inserted: List[str] = []
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            result = repo_query(query, {"rows": batch})
+            inserted.extend(row["id"] for row in result or [])
+    except Exception:
+        if inserted:
+            logger.warning(
+                f"Bulk insert into {table} failed, removing {len(inserted)} rows"
+            )
+            for start in range(0, len(inserted), batch_size):
+                batch = inserted[start : start + batch_size]
+                try:
+                    repo_query(f"DELETE {', '.join(batch)};")
+                except Exception as e:
+                    _cleanup_failed(table, batch, e)
+                finally:
+                    records_written(*batch)
+        raise
+    return inserted
+
+
+def _cleanup_failed(table: str, ids: List[str], error: Exception) -> None:
+    # The insert's own error is the one raised; this one is only logged
+    logger.error(
+        f"Could not remove {len(ids)} rows of a failed bulk insert into {table}, "
+        f"they stay stored: {', '.join(ids)}: {error}"
+    )
+
+
+def _merge_many_query(
+    updates: List[Tuple[str, Dict[str, Any]]],
+) -> Tuple[str, Dict[str, Any]]:
+    statements = []
+    vars: Dict[str, Any] = {}
+    for i, (id, data) in enumerate(updates):
+        clause, values = _merge_clause(data, f"data{i}")
+        statements.append(f"UPDATE $id{i} {clause} RETURN NONE;")
+        vars[f"id{i}"] = id
+        vars[f"data{i}"] = values
+    return "\n".join(statements), vars
+
+
+def repo_merge_many(
+    updates: Dict[str, Dict[str, Any]], batch_size: Optional[int] = None
+) -> None:
+    """Merge fields into many records, sending one query per batch of records."""
+    items = list(updates.items())
+    batch_size = batch_size or _insert_batch_size()
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        try:
+            repo_query(*_merge_many_query(batch))
+        finally:
+            records_written(*[id for id, _ in batch])
+
+
+def repo_delete_many(ids: List[str], batch_size: Optional[int] = None) -> None:
+    batch_size = batch_size or _insert_batch_size()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        try:
+            repo_query(f"DELETE {', '.join(batch)};")
+        finally:
+            records_written(*batch)
+
+
+def repo_relate_many(
+    sources: List[str], relationship: str, target: str, data: Optional[Dict] = {}
+):
+    if not sources:
+        return []
+    query = f"RELATE [{', '.join(sources)}]->{relationship}->{target} CONTENT $content;"
+    return repo_query(query, {"content": data})
+
+
+# Async counterparts, for callers running on an event loop (the FastAPI server)
+
+
+@asynccontextmanager
+async def adb_connection(endpoint: Optional[Endpoint] = None):
+    try:
+        async with get_async_pool(endpoint).connection() as connection:
+            yield connection
+    except Exception as e:
+        logger.error(f"Error during database operation: {e}")
+        raise
+
+
+async def arepo_query(
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    read_only: Optional[bool] = None,
+):
+    if _write_queue is not None and _write_queue.busy():
+        await asyncio.to_thread(flush_writes)
+    with observe_query(query_str) as observation:
+        observation.result = await _arun_query(query_str, vars, read_only)
+    return observation.result
+
+
+async def _arun_query(
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    read_only: Optional[bool] = None,
+):
+    backend = get_backend()
+    if backend is not None:
+        return await backend.aquery(query_str, vars)
+    endpoints = _endpoints(query_str, read_only)
+    for attempt, endpoint in enumerate(endpoints):
+        sent = False
+        try:
+            async with adb_connection(endpoint) as connection:
+                sent = True
+                result = await connection.query(query_str, vars)
+            get_read_router().mark_up(endpoint)
+            return result
+        except CONNECTION_ERRORS as e:
+            if attempt < len(endpoints) - 1 and _can_retry(query_str, sent):
+                _connection_lost(endpoint, e)
+                continue
+            logger.critical(f"Query: {query_str}")
+            logger.exception(e)
+            raise
+        except Exception as e:
+            logger.critical(f"Query: {query_str}")
+            logger.exception(e)
+            raise
+
+
+async def arepo_create(table: str, data: Dict[str, Any]):
+    query = f"CREATE {table} CONTENT $data;"
+    return await arepo_query(query, {"data": data})
+
+
+async def arepo_upsert(table: str, data: Dict[str, Any]):
+    query = f"UPSERT {table} CONTENT $data;"
+    try:
+        return await arepo_query(query, {"data": data})
+    finally:
+        if ":" in table:
+            records_written(table)
+
+
+async def arepo_update(id: str, data: Dict[str, Any]):
+    query = "UPDATE $id CONTENT $data;"
+    vars = {"id": id, "data": data}
+    try:
+        return await arepo_query(query, vars)
+    finally:
+        records_written(id)
+
+
+async def arepo_merge(id: str, data: Dict[str, Any]):
+    query, values = _merge_query(data)
+    try:
+        return await arepo_query(query, {"id": id, "data": values})
+    finally:
+        records_written(id)
+
+
+async def arepo_delete(id: str):
+    query = "DELETE $id;"
+    vars = {"id": id}
+    try:
+        return await arepo_query(query, vars)
+    finally:
+        records_written(id)
+
+
+async def arepo_relate(
+    source: str, relationship: str, target: str, data: Optional[Dict] = {}
+):
+    query = f"RELATE {source}->{relationship}->{target} CONTENT $content;"
+    return await arepo_query(query, {"content": data})
+
+
+async def arepo_insert_many(
+    table: str,
+    rows: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    record_fields: Optional[List[str]] = None,
+) -> List[str]:
+    if not rows:
+        return []
+    batch_size = batch_size or _insert_batch_size()
+    query = _insert_query(table, record_fields)
+
+    inserted: List[str] = []
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            result = await arepo_query(query, {"rows": batch})
+            inserted.extend(row["id"] for row in result or [])
+    except Exception:
+        if inserted:
+            logger.warning(
+                f"Bulk insert into {table} failed, removing {len(inserted)} rows"
+            )
+            for start in range(0, len(inserted), batch_size):
+                batch = inserted[start : start + batch_size]
+                try:
+                    await arepo_query(f"DELETE {', '.join(batch)};")
+                except Exception as e:
+                    _cleanup_failed(table, batch, e)
+                finally:
+                    records_written(*batch)
+        raise
+    return inserted
+
+
+async def arepo_merge_many(
+    updates: Dict[str, Dict[str, Any]], batch_size: Optional[int] = None
+) -> None:
+    items = list(updates.items())
+    batch_size = batch_size or _insert_batch_size()
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        try:
+            await arepo_query(*_merge_many_query(batch))
+        finally:
+            records_written(*[id for id, _ in batch])
+
+
+async def arepo_delete_many(ids: List[str], batch_size: Optional[int] = None) -> None:
+    batch_size = batch_size or _insert_batch_size()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        try:
+            await arepo_query(f"DELETE {', '.join(batch)};")
+        finally:
+            records_written(*batch)
@@ -0,0 +1,145 @@
+"""
+Read/write routing for deployments with SurrealDB read replicas.
+
+Writes, transactions and anything that is not plainly a read always go to
+the primary at SURREAL_ADDRESS. Read-only queries (SELECT, RETURN and INFO
+statements without a write anywhere in them) are spread round-robin over the
+endpoints listed in SURREAL_READ_ADDRESSES. A replica that drops its
+connection is skipped for SURREAL_REPLICA_RETRY_INTERVAL seconds and the read
+fails over to the next replica, and finally to the primary.
+
+Replicas may lag behind the primary, so for SURREAL_READ_AFTER_WRITE_MS after
+this process wrote anything its reads go to the primary as well, and see the
+write.
+"""
+
+import itertools
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_COMMENT_RE = re.compile(r"(?:--|//)[^\n]*")
+_READ_STATEMENTS = {"SELECT", "RETURN", "INFO"}
+_WRITE_KEYWORDS_RE = re.compile(
+    r"\b(?:CREATE|UPDATE|UPSERT|DELETE|RELATE|INSERT|DEFINE|REMOVE|LIVE|KILL|"
+    r"BEGIN|COMMIT|CANCEL|LET)\b",
+    re.IGNORECASE,
+)
+
+
+class Endpoint(NamedTuple):
+    host: str
+    port: int
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def parse_endpoints(addresses: str, default_port: int) -> List[Endpoint]:
+    """Parse a comma separated list of host[:port] entries."""
+    endpoints = []
+    for address in addresses.split(","):
+        address = address.strip()
+        if not address:
+            continue
+        host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+        endpoints.append(Endpoint(host, int(port) if port else default_port))
+    return endpoints
+
+
+@lru_cache(maxsize=2048)
+def is_read_query(query: str) -> bool:
+    """True if every statement in query only reads, so a replica can run it."""
+    stripped = _COMMENT_RE.sub(" ", _STRING_RE.sub("''", query))
+    if _WRITE_KEYWORDS_RE.search(stripped):
+        return False
+    statements = [s.split(None, 1) for s in stripped.split(";") if s.strip()]
+    return bool(statements) and all(s[0].upper() in _READ_STATEMENTS for s in statements)
+
+
+_IDEMPOTENT_STATEMENTS = _READ_STATEMENTS | {"UPSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT"}
+# Statements that make new records, or change the schema, each time they run
+_NOT_IDEMPOTENT_RE = re.compile(
+    r"\b(?:CREATE|INSERT|RELATE|DEFINE|REMOVE)\b|[+-]=", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=2048)
+def is_idempotent_query(query: str) -> bool:
+    """
+    True if running query twice leaves the database as running it once, so it
+    can be sent again when the connection dropped before the reply: reads, and
+    UPSERT, UPDATE and DELETE statements that do not add to a value.
+    """
+    stripped = _COMMENT_RE.sub(" ", _STRING_RE.sub("''", query))
+    if _NOT_IDEMPOTENT_RE.search(stripped):
+        return False
+    statements = [s.split(None, 1) for s in stripped.split(";") if s.strip()]
+    return bool(statements) and all(
+        s[0].upper() in _IDEMPOTENT_STATEMENTS for s in statements
+    )
+
+
+class ReadRouter:
+    """Picks the replicas a read should try, skipping ones that recently failed."""
+
+    def __init__(
+        self,
+        replicas: List[Endpoint],
+        retry_interval: float = 30.0,
+        read_after_write: float = 1.0,
+    ):
+        self.replicas = replicas
+        self.retry_interval = retry_interval
+        self.read_after_write = read_after_write
+        self._down_until: Dict[Endpoint, float] = {}
+        self._primary_until = 0.0
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[Endpoint]:
+        """Available replicas, starting with the next one in round-robin order."""
+        if not self.replicas or time.monotonic() < self._primary_until:
+            return []
+        start = next(self._next) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        if not self._down_until:
+            return ordered
+        now = time.monotonic()
+        return [e for e in ordered if self._down_until.get(e, 0.0) <= now]
+
+    def wrote(self) -> None:
+        """Send reads to the primary until the replicas have caught up with a write."""
+        self._primary_until = time.monotonic() + self.read_after_write
+
+    def mark_down(self, endpoint: Endpoint, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._down_until[endpoint] = time.monotonic() + self.retry_interval
+        logger.warning(
+            f"Read replica {endpoint} unavailable for {self.retry_interval:.0f}s, "
+            f"failing over: {error}"
+        )
+
+    def mark_up(self, endpoint: Endpoint) -> None:
+        if endpoint in self._down_until:
+            with self._lock:
+                if self._down_until.pop(endpoint, None) is not None:
+                    logger.info(f"Read replica {endpoint} is back")
+
+
+def read_router_from_env() -> ReadRouter:
+    return ReadRouter(
+        parse_endpoints(
+            os.environ.get("SURREAL_READ_ADDRESSES", ""),
+            int(os.environ["SURREAL_PORT"]),
+        ),
+        retry_interval=float(os.environ.get("SURREAL_REPLICA_RETRY_INTERVAL", 30)),
+        read_after_write=float(os.environ.get("SURREAL_READ_AFTER_WRITE_MS", 1000))
+        / 1000,
+    )
@@ -0,0 +1,124 @@
+"""
+Compact storage of embeddings.
+
+With SURREAL_VECTOR_STORAGE=float (the default) an embedding is stored as an
+array of floats, which SurrealDB keeps as 64-bit numbers. With int8, it is
+stored as int8 codes: each value divided by a per-vector scale (the largest
+magnitude / 127) and rounded. Cosine similarity does not depend on that
+scale, so fn::vector_search scores the full-precision query against the codes
+as they are, scanning small integers instead of floats.
+
+Next to the codes, embedding_packed keeps a float16 copy of the vector,
+base64 encoded. It is only read for the best candidates of a search, which
+are re-ranked against it so quantization error does not change the order of
+the results. Rows stored as floats are re-ranked against those floats, so
+both formats can be mixed in one table.
+"""
+
+import base64
+import math
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from open_notebook.database.repository import encode_vector
+
+STORAGE_FORMATS = ("float", "int8")
+
+
+def vector_storage() -> str:
+    storage = os.environ.get("SURREAL_VECTOR_STORAGE", "float").lower()
+    return storage if storage in STORAGE_FORMATS else "float"
+
+
+def rerank_factor() -> int:
+    """Candidates fetched per result when re-ranking quantized vectors."""
+    return max(int(os.environ.get("SURREAL_VECTOR_RERANK_FACTOR", 4)), 1)
+
+
+def quantize(vector: Sequence[float]) -> Tuple[List[int], float]:
+    """Symmetric int8 codes of vector and the scale that maps them back."""
+    scale = max((abs(value) for value in vector), default=0.0) / 127
+    if not scale:
+        return [0] * len(vector), 0.0
+    return [round(value / scale) for value in vector], scale
+
+
+def pack_float16(vector: Sequence[float]) -> str:
+    return base64.b64encode(struct.pack(f"<{len(vector)}e", *vector)).decode("ascii")
+
+
+def unpack_float16(data: str) -> List[float]:
+    raw = base64.b64decode(data)
+    return list(struct.unpack(f"<{len(raw) // 2}e", raw))
+
+
+def vector_fields(
+    vector: Optional[Sequence[float]], field: str = "embedding", merge: bool = False
+) -> Dict[str, Any]:
+    """
+    The record fields that store vector in field, in the configured format.
+
+    Vectors stored as floats have no packed copy. For a merge into an existing
+    record (merge=True), the packed field is then set to None, which repo_merge
+    removes with NONE, so a stale copy made with int8 storage does not stay.
+    """
+    if vector is None or not len(vector) or vector_storage() == "float":
+        fields = {field: encode_vector(vector)}
+        if merge:
+            fields[f"{field}_packed"] = None
+        return fields
+    codes, _ = quantize(vector)
+    return {field: codes, f"{field}_packed": pack_float16(vector)}
+
+
+def cosine(left: Sequence[float], right: Sequence[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+def rerank(
+    candidates: List[Dict[str, Any]],
+    query: Sequence[float],
+    match_count: int,
+    min_similarity: float,
+) -> List[Dict[str, Any]]:
+    """
+    Scores fn::vector_candidates rows against their full-precision vectors and
+    groups them like fn::vector_search: the best match_count rows of each
+    table, then one result per id with the best similarity and the content
+    of every matching row.
+    """
+    by_kind: Dict[Any, List[Tuple[float, Dict[str, Any]]]] = {}
+    for row in candidates:
+        if row.get("id") is None:
+            continue
+        packed = row.get("embedding_packed")
+        full = unpack_float16(packed) if packed else row.get("embedding") or []
+        similarity = cosine(full, query)
+        if similarity >= min_similarity:
+            by_kind.setdefault(row.get("kind"), []).append((similarity, row))
+
+    scored: List[Tuple[float, Dict[str, Any]]] = []
+    for rows in by_kind.values():
+        rows.sort(key=lambda scored_row: scored_row[0], reverse=True)
+        scored.extend(rows[:match_count])
+
+    grouped: Dict[Tuple, Dict[str, Any]] = {}
+    for similarity, row in scored:
+        key = (row["id"], row.get("parent_id"), row.get("title"))
+        result = grouped.setdefault(
+            key,
+            dict(
+                id=row["id"],
+                parent_id=row.get("parent_id"),
+                title=row.get("title"),
+                similarity=similarity,
+                matches=[],
+            ),
+        )
+        result["similarity"] = max(result["similarity"], similarity)
+        result["matches"].append(row.get("content"))
+    results = sorted(grouped.values(), key=lambda row: row["similarity"], reverse=True)
+    return results[:match_count]
@@ -0,0 +1,148 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from open_notebook.exceptions import DatabaseOperationError, WriteBehindError
+
+Statement = Tuple[str, Dict[str, Any]]
+
+
+class WriteBehindQueue:
+    """
+    Coalesces small writes into batched transactions.
+
+    Statements are queued and written by a background thread every interval
+    seconds, or as soon as max_items are waiting, as one BEGIN/COMMIT block per
+    batch. Each statement keeps its own bound variables; they are renamed so
+    statements in the same batch cannot clash.
+
+    flush() writes everything queued so far and returns once it is committed,
+    including a batch another thread already had in flight. close() stops the
+    worker and flushes what is left.
+
+    When a batch fails, its statements are written again one at a time, so one
+    bad statement does not take the others of its batch down. Statements that
+    fail on their own as well are kept, and the next flush() raises a
+    WriteBehindError listing them.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, Dict[str, Any]], Any],
+        interval: float = 0.05,
+        max_items: int = 100,
+    ):
+        self.interval = interval
+        self.max_items = max(max_items, 1)
+        self._execute = execute
+        self._pending: List[Statement] = []
+        self._failed: List[Tuple[str, Dict[str, Any], Exception]] = []
+        self._lock = threading.Lock()
+        # Held for the whole of a flush, so flush() also waits for one in flight
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def busy(self) -> bool:
+        """Whether a flush() would have anything to wait for or report."""
+        return bool(self._pending or self._failed or self._flush_lock.locked())
+
+    def enqueue(self, statement: str, vars: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if self._closed:
+                raise DatabaseOperationError("Write queue is closed")
+            self._pending.append((statement, vars or {}))
+            full = len(self._pending) >= self.max_items
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="surreal-write-behind", daemon=True
+                )
+                self._worker.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._pending:
+                try:
+                    self._drain()
+                except Exception as e:
+                    logger.error(f"Write-behind flush failed: {e}")
+
+    def flush(self) -> None:
+        """
+        Write everything queued and wait for it. Raises WriteBehindError if
+        any statement queued since the last flush() could not be written.
+        """
+        self._drain()
+        with self._lock:
+            failed, self._failed = self._failed, []
+        if failed:
+            raise WriteBehindError(
+                f"{len(failed)} queued writes could not be committed: "
+                + "; ".join(str(error) for _, _, error in failed[:3]),
+                failed,
+            )
+
+    def _drain(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            for start in range(0, len(batch), self.max_items):
+                self._write(batch[start : start + self.max_items])
+
+    def _write(self, batch: List[Statement]) -> None:
+        statements = []
+        vars: Dict[str, Any] = {}
+        for index, (statement, statement_vars) in enumerate(batch):
+            for name, value in statement_vars.items():
+                renamed = f"w{index}_{name}"
+                statement = re.sub(rf"\${re.escape(name)}\b", f"${renamed}", statement)
+                vars[renamed] = value
+            statements.append(statement.strip().rstrip(";"))
+        query = (
+            "BEGIN TRANSACTION;\n"
+            + ";\n".join(statements)
+            + ";\nCOMMIT TRANSACTION;"
+        )
+        try:
+            self._execute(query, vars)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(*batch[0], e)
+                return
+            logger.warning(
+                f"Write-behind batch of {len(batch)} statements failed, "
+                f"writing them one at a time: {e}"
+            )
+        # The transaction was rolled back as a whole
+        for statement, statement_vars in batch:
+            try:
+                self._execute(statement, statement_vars)
+            except Exception as e:
+                self._fail(statement, statement_vars, e)
+
+    def _fail(self, statement: str, vars: Dict[str, Any], error: Exception) -> None:
+        logger.error(f"Write-behind statement failed: {statement.strip()}: {error}")
+        with self._lock:
+            self._failed.append((statement, vars, error))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        self._wakeup.set()
+        if worker is not None:
+            worker.join()
+        self.flush()
@@ -1,31 +1,65 @@
+import asyncio
+import copy
+import os
 from datetime import datetime, timezone
 from typing import (
     Any,
+    AsyncIterator,
     ClassVar,
+    Collection,
     Dict,
+    Iterator,
     List,
+    NamedTuple,
     Optional,
+    Sequence,
+    Tuple,
     Type,
     TypeVar,
     cast,
+    get_args,
 )
 
 from loguru import logger
 from pydantic import (
     BaseModel,
+    PrivateAttr,
+    TypeAdapter,
     ValidationError,
     field_validator,
     model_validator,
 )
 
+from open_notebook.database.live import RecordChange, on_record_change
 from open_notebook.database.repository import (
+    arepo_create,
+    arepo_delete,
+    arepo_merge,
+    arepo_query,
+    arepo_relate,
+    arepo_update,
+    get_write_queue,
+    new_record_id,
     repo_create,
     repo_delete,
+    repo_enqueue,
+    repo_insert_many,
+    repo_merge,
     repo_query,
     repo_relate,
     repo_update,
     repo_upsert,
 )
+from open_notebook.database.vectors import vector_fields
+from open_notebook.domain.cache import get_record_cache, invalidate_records
+from open_notebook.domain.pagination import (
+    Page,
+    cursor_offset,
+    decode_cursor,
+    encode_cursor,
+    keyset_order,
+    order_columns,
+)
 from open_notebook.exceptions import (
     DatabaseOperationError,
     InvalidInputError,
@@ -34,92 +68,699 @@ from open_notebook.exceptions import (
 
 T = TypeVar("T", bound="ObjectModel")
 
+# Rows read from SurrealDB were validated when they were written, so models that
+# set trusted_hydration are built from them without running validation again.
+# OBJECT_TRUSTED_HYDRATION=false turns this off everywhere.
+TRUSTED_HYDRATION = os.environ.get("OBJECT_TRUSTED_HYDRATION", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+_datetime_adapter = TypeAdapter(datetime)
+
+
+def _coerce_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                return _datetime_adapter.validate_python(value)
+            except ValidationError:
+                return value
+    return value
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _snapshot_value(value: Any) -> Any:
+    # Copy containers so changes made to them in place still show up as changes
+    if isinstance(value, (type(None), bool, int, float, str, datetime)):
+        return value
+    if isinstance(value, list):
+        return list(value)
+    return copy.deepcopy(value)
+
+
+def _annotation_types(annotation: Any) -> Iterator[Any]:
+    yield annotation
+    for arg in get_args(annotation):
+        yield from _annotation_types(arg)
+
+
+class _HydrationPlan(NamedTuple):
+    fields: frozenset
+    # Immutable defaults can be shared; the others are built per instance
+    defaults: Dict[str, Any]
+    default_factories: Dict[str, Any]
+    datetime_fields: Tuple[str, ...]
+    # Fields holding nested models still need validating to turn dicts into models
+    adapters: Dict[str, TypeAdapter]
+    has_private: bool
+
+
+_hydration_plans: Dict[type, _HydrationPlan] = {}
+
+
+def _hydration_plan(model_class: Type[BaseModel]) -> _HydrationPlan:
+    plan = _hydration_plans.get(model_class)
+    if plan is None:
+        defaults = {}
+        default_factories = {}
+        datetime_fields = []
+        adapters = {}
+        for name, info in model_class.model_fields.items():
+            if info.default_factory is not None:
+                default_factories[name] = info.get_default
+            elif not info.is_required():
+                if isinstance(info.default, (type(None), bool, int, float, str)):
+                    defaults[name] = info.default
+                else:
+                    default_factories[name] = info.get_default
+            types = [t for t in _annotation_types(info.annotation) if isinstance(t, type)]
+            if any(issubclass(t, BaseModel) for t in types):
+                adapters[name] = TypeAdapter(info.annotation)
+            elif datetime in types:
+                datetime_fields.append(name)
+        plan = _hydration_plans[model_class] = _HydrationPlan(
+            frozenset(model_class.model_fields),
+            defaults,
+            default_factories,
+            tuple(datetime_fields),
+            adapters,
+            bool(model_class.__private_attributes__),
+        )
+    return plan
+
+
+# table name -> ObjectModel subclass, filled in as subclasses are defined
+_model_registry: Dict[str, Type["ObjectModel"]] = {}
+
 
 class ObjectModel(BaseModel):
     id: Optional[str] = None
     table_name: ClassVar[str] = ""
+    # Heavy fields left out of get_all() unless asked for; loaded on first access
+    deferred_fields: ClassVar[Tuple[str, ...]] = ()
+    # Skip validation for rows read from the database. Pays off for models with
+    # large list fields such as embeddings; small rows validate just as fast.
+    trusted_hydration: ClassVar[bool] = False
+    # Fields get_embedding_content() reads; the embedding is only recomputed on
+    # save when one of them changed. Empty means always recompute.
+    embedding_source_fields: ClassVar[Tuple[str, ...]] = ()
+    # Create new records through the write-behind queue when it is enabled
+    write_behind: ClassVar[bool] = False
     created: Optional[datetime] = None
     updated: Optional[datetime] = None
+    # Field values as last read from or written to the database; None until then
+    _saved_state: Optional[Dict[str, Any]] = PrivateAttr(default=None)
 
     class Config:
         validate_assignment = True
         arbitrary_types_allowed = True
 
     @classmethod
-    def get_all(cls: Type[T], order_by=None) -> List[T]:
+    def _projection(
+        cls,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Build the SELECT projection and the model fields it leaves out.
+
+        fields selects only the given fields (plus id); omit selects everything
+        except the given ones. Model fields left out are loaded lazily.
+        """
+        if fields:
+            selected = ["id", *[f for f in fields if f != "id"]]
+            omitted = tuple(
+                name for name in cls.model_fields if name not in selected
+            )
+            return ", ".join(selected), omitted
+        if omit:
+            omitted = tuple(name for name in omit if name in cls.model_fields)
+            return f"* OMIT {', '.join(omit)}", omitted
+        return "*", ()
+
+    @classmethod
+    def _get_all_query(
+        cls,
+        order_by=None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Tuple[str, Tuple[str, ...]]:
+        # If called from a specific subclass, use its table_name
+        if not cls.table_name:
+            # This path is taken if called directly from ObjectModel
+            raise InvalidInputError(
+                "get_all() must be called from a specific model class"
+            )
+
+        if order_by:
+            order = f" ORDER BY {order_by}"
+        else:
+            order = ""
+
+        if omit is None:
+            omit = cls.deferred_fields
+        projection, omitted = cls._projection(fields, omit)
+        return f"SELECT {projection} FROM {cls.table_name} {order}", omitted
+
+    @classmethod
+    def _hydrate(cls: Type[T], row: Dict[str, Any]) -> T:
+        """
+        Build a model from a database row without validating it again.
+
+        Only datetimes and nested models are converted; everything else is
+        taken as stored.
+        """
+        plan = _hydration_plan(cls)
+        fields = plan.fields
+        values = plan.defaults.copy()
+        fields_set = set()
+        for key, value in row.items():
+            if key in fields:
+                values[key] = value
+                fields_set.add(key)
+        for name, get_default in plan.default_factories.items():
+            if name not in fields_set:
+                values[name] = get_default(call_default_factory=True)
+        for name in plan.datetime_fields:
+            if name in fields_set:
+                values[name] = _coerce_datetime(values[name])
+        for name, adapter in plan.adapters.items():
+            if values.get(name) is not None:
+                values[name] = adapter.validate_python(values[name])
+
+        # Same result as model_construct(), without its per-call overhead
+        obj = cls.__new__(cls)
+        object.__setattr__(obj, "__dict__", values)
+        object.__setattr__(obj, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(obj, "__pydantic_extra__", None)
+        object.__setattr__(obj, "__pydantic_private__", None)
+        if plan.has_private:
+            obj.model_post_init(None)
+        return obj
+
+    @classmethod
+    def _from_row(cls: Type[T], row: Dict[str, Any], omitted: Collection[str] = ()) -> T:
+        """Build a model from a row that was selected without the omitted fields."""
+        if TRUSTED_HYDRATION and cls.trusted_hydration:
+            obj = cls._hydrate(row)
+        elif not omitted:
+            obj = cls(**row)
+        elif any(cls.model_fields[name].is_required() for name in omitted):
+            # Validate field by field, since required fields are missing
+            obj = cls.model_construct()
+            for key, value in row.items():
+                if key in cls.model_fields:
+                    setattr(obj, key, value)
+        else:
+            obj = cls(**row)
+        for name in omitted:
+            obj.__dict__.pop(name, None)
+        obj._mark_saved()
+        return obj
+
+    @classmethod
+    def _from_rows(
+        cls: Type[T], result: List[Dict[str, Any]], omitted: Collection[str] = ()
+    ) -> List[T]:
+        objects = []
+        for obj in result:
+            try:
+                objects.append(cls._from_row(obj, omitted))
+            except Exception as e:
+                logger.critical(f"Error creating object: {str(e)}")
+        return objects
+
+    @classmethod
+    def get_all(
+        cls: Type[T],
+        order_by=None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> List[T]:
         try:
-            # If called from a specific subclass, use its table_name
-            if cls.table_name:
-                target_class = cls
-                table_name = cls.table_name
-            else:
-                # This path is taken if called directly from ObjectModel
-                raise InvalidInputError(
-                    "get_all() must be called from a specific model class"
-                )
+            query, omitted = cls._get_all_query(order_by, fields, omit)
+            result = repo_query(query)
+            return cls._from_rows(result, omitted)
+        except Exception as e:
+            logger.error(f"Error fetching all {cls.table_name}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    @classmethod
+    async def aget_all(
+        cls: Type[T],
+        order_by=None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> List[T]:
+        try:
+            query, omitted = cls._get_all_query(order_by, fields, omit)
+            result = await arepo_query(query)
+            return cls._from_rows(result, omitted)
+        except Exception as e:
+            logger.error(f"Error fetching all {cls.table_name}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    @classmethod
+    def _page_query(
+        cls,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        where: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Tuple[str, Dict[str, Any], Tuple[str, ...]]:
+        if not cls.table_name:
+            raise InvalidInputError(
+                "get_page() must be called from a specific model class"
+            )
+        if limit < 1:
+            raise InvalidInputError("Page limit must be at least 1")
+        # Columns are written into the query text, so only model fields pass
+        columns = [*(fields or ()), *(omit or ())]
+        if order_by:
+            columns += order_columns(order_by)
+        unknown = [
+            name for name in columns if name != "id" and name not in cls.model_fields
+        ]
+        if unknown:
+            raise InvalidInputError(
+                f"Unknown {cls.table_name} fields: {', '.join(unknown)}"
+            )
+
+        keyset = keyset_order(order_by)
+        if fields and keyset:
+            fields = [*fields, keyset[0]]
+        if omit is None:
+            omit = cls.deferred_fields
+        projection, omitted = cls._projection(fields, omit)
+
+        position = decode_cursor(cursor)
+        conditions = [where] if where else []
+        vars: Dict[str, Any] = {}
+        start = ""
+        if keyset:
+            column, direction = keyset
+            op = "<" if direction == "DESC" else ">"
+            if position.get("id"):
+                vars["after_id"] = position["id"]
+                if column == "id":
+                    conditions.append(f"id {op} <record> $after_id")
+                elif position.get("k") is None:
+                    # Rows without the column sort first; among them only the
+                    # id orders, and ascending pages go on to the rows with one
+                    condition = f"({column} IS NONE AND id {op} <record> $after_id)"
+                    if direction == "ASC":
+                        condition = f"({condition} OR {column} IS NOT NONE)"
+                    conditions.append(condition)
+                else:
+                    vars["after"] = position["k"]
+                    condition = (
+                        f"{column} {op} <datetime> $after OR "
+                        f"({column} = <datetime> $after AND id {op} <record> $after_id)"
+                    )
+                    if direction == "DESC":
+                        condition += f" OR {column} IS NONE"
+                    conditions.append(f"({condition})")
+            order = f"{column} {direction}"
+            if column != "id":
+                order += f", id {direction}"
+        else:
+            order = order_by
+            start = f" START {cursor_offset(position)}"
 
-            if order_by:
-                order = f" ORDER BY {order_by}"
+        where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row tells whether there is a next page
+        query = (
+            f"SELECT {projection} FROM {cls.table_name}{where_clause} "
+            f"ORDER BY {order} LIMIT {limit + 1}{start}"
+        )
+        return query, vars, omitted
+
+    @classmethod
+    def _build_page(
+        cls: Type[T],
+        rows: List[Dict[str, Any]],
+        limit: int,
+        cursor: Optional[str],
+        order_by: Optional[str],
+        omitted: Collection[str],
+    ) -> Page[T]:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            keyset = keyset_order(order_by)
+            if keyset:
+                last = rows[-1]
+                next_cursor = encode_cursor({"k": last.get(keyset[0]), "id": last["id"]})
             else:
-                order = ""
+                offset = cursor_offset(decode_cursor(cursor))
+                next_cursor = encode_cursor({"o": offset + limit})
+        return Page(items=cls._from_rows(rows, omitted), next_cursor=next_cursor)
 
-            result = repo_query(f"SELECT * FROM {table_name} {order}")
-            objects = []
-            for obj in result:
-                try:
-                    objects.append(target_class(**obj))
-                except Exception as e:
-                    logger.critical(f"Error creating object: {str(e)}")
+    @classmethod
+    def get_page(
+        cls: Type[T],
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        where: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Page[T]:
+        """
+        Fetch one page of the table.
 
-            return objects
+        Orderings on id, created or updated (ties broken on id) are paged by
+        keyset, anything else by offset. Pass the returned next_cursor back
+        in to get the following page; it is None on the last one. order_by,
+        fields and omit may only name the model's fields.
+        """
+        query, vars, omitted = cls._page_query(limit, cursor, order_by, where, fields, omit)
+        try:
+            result = repo_query(query, vars)
         except Exception as e:
-            logger.error(f"Error fetching all {cls.table_name}: {str(e)}")
+            logger.error(f"Error fetching page of {cls.table_name}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+        return cls._build_page(result, limit, cursor, order_by, omitted)
+
+    @classmethod
+    async def aget_page(
+        cls: Type[T],
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        where: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Page[T]:
+        query, vars, omitted = cls._page_query(limit, cursor, order_by, where, fields, omit)
+        try:
+            result = await arepo_query(query, vars)
+        except Exception as e:
+            logger.error(f"Error fetching page of {cls.table_name}: {str(e)}")
             logger.exception(e)
             raise DatabaseOperationError(e)
+        return cls._build_page(result, limit, cursor, order_by, omitted)
 
     @classmethod
-    def get(cls: Type[T], id: str) -> T:
+    def iter_all(
+        cls: Type[T],
+        batch_size: int = 100,
+        order_by: Optional[str] = None,
+        where: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> Iterator[T]:
+        """
+        Iterate over the whole table, batch_size rows per query.
+
+        Unlike get_all() only one batch is held in memory at a time, and no
+        single response has to fit in a websocket message.
+        """
+        cursor = None
+        while True:
+            page = cls.get_page(batch_size, cursor, order_by, where, fields, omit)
+            yield from page.items
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    @classmethod
+    async def aiter_all(
+        cls: Type[T],
+        batch_size: int = 100,
+        order_by: Optional[str] = None,
+        where: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+        omit: Optional[Collection[str]] = None,
+    ) -> AsyncIterator[T]:
+        cursor = None
+        while True:
+            page = await cls.aget_page(batch_size, cursor, order_by, where, fields, omit)
+            for item in page.items:
+                yield item
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    @classmethod
+    def _resolve_class(cls: Type[T], id: str) -> Type[T]:
+        # Get the table name from the ID (everything before the first colon)
+        table_name = id.split(":")[0] if ":" in id else id
+
+        # If we're calling from a specific subclass and IDs match, use that class
+        if cls.table_name and cls.table_name == table_name:
+            return cls
+        # Otherwise, find the appropriate subclass based on table_name
+        found_class = cls._get_class_by_table_name(table_name)
+        if not found_class:
+            raise InvalidInputError(f"No class found for table {table_name}")
+        return cast(Type[T], found_class)
+
+    @classmethod
+    def get(
+        cls: Type[T], id: str, omit: Optional[Collection[str]] = None
+    ) -> T:
         if not id:
             raise InvalidInputError("ID cannot be empty")
         try:
-            # Get the table name from the ID (everything before the first colon)
-            table_name = id.split(":")[0] if ":" in id else id
+            target_class = cls._resolve_class(id)
+            cache = get_record_cache()
+            row = cache.get(id)
+            if row is not None:
+                return target_class._from_row(row)
+            projection, omitted = target_class._projection(omit=omit)
+            result = repo_query(f"SELECT {projection} FROM {id}")
+            if not result:
+                raise NotFoundError(f"{target_class.table_name} with id {id} not found")
+            # Only complete rows are cached
+            if not omit:
+                cache.put(id, result[0])
+            return target_class._from_row(result[0], omitted)
+        except Exception as e:
+            logger.error(f"Error fetching object with id {id}: {str(e)}")
+            logger.exception(e)
+            raise NotFoundError(f"Object with id {id} not found - {str(e)}")
 
-            # If we're calling from a specific subclass and IDs match, use that class
-            if cls.table_name and cls.table_name == table_name:
-                target_class: Type[T] = cls
-            else:
-                # Otherwise, find the appropriate subclass based on table_name
-                found_class = cls._get_class_by_table_name(table_name)
-                if not found_class:
-                    raise InvalidInputError(f"No class found for table {table_name}")
-                target_class = cast(Type[T], found_class)
-
-            result = repo_query(f"SELECT * FROM {id}")
-            if result:
-                return target_class(**result[0])
-            else:
-                raise NotFoundError(f"{table_name} with id {id} not found")
+    @classmethod
+    async def aget(
+        cls: Type[T], id: str, omit: Optional[Collection[str]] = None
+    ) -> T:
+        if not id:
+            raise InvalidInputError("ID cannot be empty")
+        try:
+            target_class = cls._resolve_class(id)
+            cache = get_record_cache()
+            row = cache.get(id)
+            if row is not None:
+                return target_class._from_row(row)
+            projection, omitted = target_class._projection(omit=omit)
+            result = await arepo_query(f"SELECT {projection} FROM {id}")
+            if not result:
+                raise NotFoundError(f"{target_class.table_name} with id {id} not found")
+            # Only complete rows are cached
+            if not omit:
+                cache.put(id, result[0])
+            return target_class._from_row(result[0], omitted)
         except Exception as e:
             logger.error(f"Error fetching object with id {id}: {str(e)}")
             logger.exception(e)
             raise NotFoundError(f"Object with id {id} not found - {str(e)}")
 
+    @classmethod
+    def _cached_rows(
+        cls, ids: Sequence[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Rows of ids found in the read cache, and the ids still to be fetched."""
+        cache = get_record_cache()
+        rows: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for id in dict.fromkeys(ids):
+            row = cache.get(id)
+            if row is None:
+                missing.append(id)
+            else:
+                rows[id] = row
+        return rows, missing
+
+    @classmethod
+    def _group_by_table(cls, ids: Sequence[str]) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for id in ids:
+            groups.setdefault(cls._resolve_class(id).table_name, []).append(id)
+        return groups
+
+    @classmethod
+    def _many_from_rows(
+        cls: Type[T],
+        ids: Sequence[str],
+        rows: Dict[str, Dict[str, Any]],
+        result: List[Dict[str, Any]],
+    ) -> List[T]:
+        cache = get_record_cache()
+        for row in result:
+            rows[str(row["id"])] = row
+            cache.put(str(row["id"]), row)
+        objects = []
+        for id in ids:
+            if id not in rows:
+                continue
+            try:
+                objects.append(cls._resolve_class(id)._from_row(rows[id]))
+            except Exception as e:
+                logger.critical(f"Error creating object: {str(e)}")
+        return objects
+
+    @classmethod
+    def get_many(cls: Type[T], ids: Sequence[str]) -> List[T]:
+        """
+        Load several records, in the order of ids, with one query per table.
+
+        ids may point at different tables when called on ObjectModel; each
+        record comes back as the model registered for its table. Records
+        already in the read cache are not fetched again; ids that do not
+        exist are skipped rather than raising NotFoundError.
+        """
+        ids = [str(id) for id in ids if id]
+        rows, missing = cls._cached_rows(ids)
+        groups = cls._group_by_table(missing)
+        try:
+            result: List[Dict[str, Any]] = []
+            for table_ids in groups.values():
+                result += repo_query(f"SELECT * FROM {', '.join(table_ids)}")
+            return cls._many_from_rows(ids, rows, result)
+        except Exception as e:
+            logger.error(f"Error fetching objects {missing}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    @classmethod
+    async def aget_many(cls: Type[T], ids: Sequence[str]) -> List[T]:
+        ids = [str(id) for id in ids if id]
+        rows, missing = cls._cached_rows(ids)
+        groups = cls._group_by_table(missing)
+        try:
+            results = await asyncio.gather(
+                *(
+                    arepo_query(f"SELECT * FROM {', '.join(table_ids)}")
+                    for table_ids in groups.values()
+                )
+            )
+            result = [row for rows_of_table in results for row in rows_of_table]
+            return cls._many_from_rows(ids, rows, result)
+        except Exception as e:
+            logger.error(f"Error fetching objects {missing}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # Register classes that declare their own table; subclasses that only
+        # inherit one keep resolving to the class that declared it
+        table_name = cls.__dict__.get("table_name")
+        if not table_name:
+            return
+        registered = _model_registry.get(table_name)
+        if registered is not None and registered.__qualname__ != cls.__qualname__:
+            logger.warning(
+                f"Table {table_name} is declared by both {registered.__name__} "
+                f"and {cls.__name__}; keeping {registered.__name__}"
+            )
+            return
+        # A module imported again (e.g. a Streamlit rerun) replaces its classes
+        _model_registry[table_name] = cls
+
     @classmethod
     def _get_class_by_table_name(cls, table_name: str) -> Optional[Type["ObjectModel"]]:
-        """Find the appropriate subclass based on table_name."""
-
-        def get_all_subclasses(c: Type["ObjectModel"]) -> List[Type["ObjectModel"]]:
-            all_subclasses: List[Type["ObjectModel"]] = []
-            for subclass in c.__subclasses__():
-                all_subclasses.append(subclass)
-                all_subclasses.extend(get_all_subclasses(subclass))
-            return all_subclasses
-
-        for subclass in get_all_subclasses(ObjectModel):
-            if hasattr(subclass, "table_name") and subclass.table_name == table_name:
-                return subclass
-        return None
+        """Find the subclass registered for table_name."""
+        return _model_registry.get(table_name)
+
+    def __getattr__(self, name: str) -> Any:
+        # Fields left out of the SELECT are missing from __dict__; load on first access
+        if name in type(self).model_fields and name not in self.__dict__:
+            return self._load_field(name)
+        return super().__getattr__(name)
+
+    def _load_field(self, name: str) -> Any:
+        record_id = self.__dict__.get("id")
+        if not record_id:
+            raise AttributeError(
+                f"{type(self).__name__} has no loaded value for {name}"
+            )
+        if _on_event_loop():
+            logger.warning(
+                f"Deferred field {name} of {record_id} loaded with a blocking query "
+                "on the event loop; await aload_fields() before using it"
+            )
+        logger.debug(f"Loading deferred field {name} of {record_id}")
+        result = repo_query(f"SELECT {name} FROM {record_id}")
+        self._set_loaded(name, result[0].get(name) if result else None)
+        return self.__dict__[name]
+
+    async def aload_fields(self, *names: str) -> None:
+        """
+        Load the given deferred fields, or all that are not loaded yet, with
+        one query. Async code calls this before using them: attribute access
+        would load each one with a blocking query.
+        """
+        record_id = self.__dict__.get("id")
+        missing = [
+            name for name in names or self._unloaded_fields() if name not in self.__dict__
+        ]
+        if not record_id or not missing:
+            return
+        result = await arepo_query(f"SELECT {', '.join(missing)} FROM {record_id}")
+        row = result[0] if result else {}
+        for name in missing:
+            self._set_loaded(name, row.get(name))
+
+    def _set_loaded(self, name: str, value: Any) -> None:
+        try:
+            self.__pydantic_validator__.validate_assignment(self, name, value)
+        except ValidationError:
+            self.__dict__[name] = value
+        if self._saved_state is not None:
+            self._saved_state[name] = _snapshot_value(self.__dict__[name])
+
+    def _mark_saved(self) -> None:
+        self._saved_state = {
+            name: _snapshot_value(value) for name, value in self.__dict__.items()
+        }
+
+    def _changed_fields(self) -> Optional[List[str]]:
+        """
+        Loaded fields that differ from the database, or None if unknown.
+
+        Models that were never read from or written to the database (e.g.
+        built from a request body) have no known state, and are saved whole.
+        """
+        saved = self._saved_state
+        if saved is None:
+            return None
+        return [
+            name
+            for name, value in self.__dict__.items()
+            if name not in ("id", "created", "updated")
+            and (name not in saved or saved[name] != value)
+        ]
+
+    def _unloaded_fields(self) -> List[str]:
+        return [name for name in type(self).model_fields if name not in self.__dict__]
 
     def needs_embedding(self) -> bool:
         return False
@@ -127,61 +768,183 @@ class ObjectModel(BaseModel):
     def get_embedding_content(self) -> Optional[str]:
         return None
 
-    def save(self) -> None:
+    def _compute_embedding(
+        self, changed: Optional[Collection[str]] = None
+    ) -> Optional[List[float]]:
         from open_notebook.domain.models import model_manager
 
-        try:
-            # self.model_validate(self.model_dump(), strict=True) # Validation on assignment should cover this
-
-            data_for_db = self.model_dump(exclude_none=True)
-
-            # Embedding logic
-            if self.needs_embedding():
-                embedding_content = self.get_embedding_content()
-                if embedding_content:
-                    EMBEDDING_MODEL = model_manager.embedding_model
-                    if not EMBEDDING_MODEL:
-                        logger.warning(
-                            "No embedding model found. Content will not be searchable."
-                        )
-                    data_for_db["embedding"] = (
-                        EMBEDDING_MODEL.embed(embedding_content)
-                        if EMBEDDING_MODEL
-                        else []
-                    )
-            
-            # Standardize created/updated to ISO Z format for DB
-            current_time_iso_z = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-            data_for_db["updated"] = current_time_iso_z
+        if not self.needs_embedding():
+            return None
+        sources = type(self).embedding_source_fields
+        if changed is not None and sources and not set(sources) & set(changed):
+            return None
+        embedding_content = self.get_embedding_content()
+        if not embedding_content:
+            return None
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
+        if not EMBEDDING_MODEL:
+            logger.warning(
+                "No embedding model found. Content will not be searchable."
+            )
+        return EMBEDDING_MODEL.embed(embedding_content) if EMBEDDING_MODEL else []
+
+    @staticmethod
+    def _embedding_fields(
+        embedding: List[float], merge: bool = False
+    ) -> Dict[str, Any]:
+        from open_notebook.domain.models import model_manager
+
+        fields = vector_fields(embedding, merge=merge)
+        model_id = model_manager.serving_embedding_model_id
+        if model_id:
+            fields["embedding_model"] = model_id
+        if merge:
+            # A vector re-embedded for a pending model change no longer matches
+            # the content: repo_merge removes it with NONE, so the re-embedding
+            # job picks the record up again. CONTENT leaves it out already.
+            fields.update(
+                next_embedding=None, next_embedding_packed=None, next_embedding_model=None
+            )
+        return fields
+
+    def _build_save_data(self, embedding: Optional[List[float]]) -> Dict[str, Any]:
+        # self.model_validate(self.model_dump(), strict=True) # Validation on assignment should cover this
+
+        # CONTENT replaces the whole record, so deferred fields must be loaded first
+        for name in self._unloaded_fields():
+            if not type(self).model_fields[name].exclude:
+                getattr(self, name)
+
+        data_for_db = self.model_dump(exclude_none=True)
 
-            # Remove id from data_for_db as it's handled by repo_create/repo_update argument
-            # or is None for create.
-            id_to_save = data_for_db.pop("id", None) # Use self.id for updates, id is None for creates
+        if embedding is not None:
+            data_for_db.update(self._embedding_fields(embedding))
+
+        # Standardize created/updated to ISO Z format for DB
+        current_time_iso_z = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        data_for_db["updated"] = current_time_iso_z
+
+        # Remove id from data_for_db as it's handled by repo_create/repo_update argument
+        # or is None for create.
+        data_for_db.pop("id", None)
+
+        if self.id is None: # Creating new
+            data_for_db["created"] = current_time_iso_z
+        elif self.created: # self.created should be a datetime object
+            data_for_db["created"] = self.created.isoformat().replace("+00:00", "Z")
+        # If self.created was None, model_dump(exclude_none=True) would have removed 'created' key.
+        # If 'created' is missing and it's an update, it remains as is in the DB.
+        return data_for_db
+
+    def _build_merge_data(
+        self, changed: Collection[str], embedding: Optional[List[float]]
+    ) -> Dict[str, Any]:
+        # None is kept: repo_merge removes those fields, so a field that was
+        # cleared is cleared in the DB
+        data_for_db = self.model_dump(include=set(changed))
+        if embedding is not None:
+            data_for_db.update(self._embedding_fields(embedding, merge=True))
+        data_for_db["updated"] = (
+            datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        )
+        return data_for_db
+
+    def _apply_save_result(self, repo_result: Any) -> None:
+        # Update the current instance with the result
+        if repo_result and repo_result[0]: # Check if repo_result is not empty
+            for key, value in repo_result[0].items():
+                if key in type(self).model_fields:
+                    # With validate_assignment=True, setattr should trigger validators
+                    if isinstance(getattr(self, key), BaseModel) and isinstance(value, dict):
+                        setattr(self, key, type(getattr(self, key))(**value))
+                    else:
+                        setattr(self, key, value)
+        else:
+            logger.warning(f"Save operation for {self.__class__.table_name} (id: {self.id}) did not return expected result.")
 
+    def _create_later(self, embedding: Optional[List[float]]) -> bool:
+        """Queue the CREATE of a new write_behind record; False if not applicable."""
+        if self.id is not None or not type(self).write_behind:
+            return False
+        if get_write_queue() is None:
+            return False
+        data_for_db = self._build_save_data(embedding)
+        record_id = new_record_id(self.__class__.table_name)
+        repo_enqueue(f"CREATE {record_id} CONTENT $data;", {"data": data_for_db})
+        self._apply_save_result(
+            [dict(id=record_id, created=data_for_db["created"], updated=data_for_db["updated"])]
+        )
+        self._mark_saved()
+        return True
+
+    def save(self) -> None:
+        """
+        Create the record, or write the changes made since it was loaded.
+
+        Records read from the database are updated with a MERGE of just the
+        fields that changed, and the embedding is only recomputed when one of
+        the embedding_source_fields did.
+        """
+        try:
+            changed = self._changed_fields() if self.id else None
+            embedding = self._compute_embedding(changed)
+
+            if self._create_later(embedding):
+                return
             if self.id is None: # Creating new
-                data_for_db["created"] = current_time_iso_z
+                data_for_db = self._build_save_data(embedding)
                 repo_result = repo_create(self.__class__.table_name, data_for_db)
-            else: # Updating existing
-                if self.created: # self.created should be a datetime object
-                    data_for_db["created"] = self.created.isoformat().replace("+00:00", "Z")
-                # If self.created was None, model_dump(exclude_none=True) would have removed 'created' key.
-                # If 'created' is missing and it's an update, it remains as is in the DB.
-                
+            elif changed is None: # Updating a record of unknown state
                 logger.debug(f"Updating record with id {self.id}")
+                data_for_db = self._build_save_data(embedding)
                 repo_result = repo_update(self.id, data_for_db)
+            else:
+                logger.debug(f"Updating fields {changed} of record {self.id}")
+                data_for_db = self._build_merge_data(changed, embedding)
+                repo_result = repo_merge(self.id, data_for_db)
+
+            self._apply_save_result(repo_result)
+            self._mark_saved()
+            invalidate_records(self.id)
+
+        except ValidationError as e:
+            logger.error(f"Validation failed: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error saving record: {e}")
+            raise
+
+    async def asave(self) -> None:
+        try:
+            changed = self._changed_fields() if self.id else None
+            # Embedding providers are synchronous; keep them off the event loop
+            embedding = await asyncio.to_thread(self._compute_embedding, changed)
 
-            # Update the current instance with the result
-            if repo_result and repo_result[0]: # Check if repo_result is not empty
-                for key, value in repo_result[0].items():
-                    if hasattr(self, key):
-                        # With validate_assignment=True, setattr should trigger validators
-                        if isinstance(getattr(self, key), BaseModel) and isinstance(value, dict):
-                            setattr(self, key, type(getattr(self, key))(**value))
-                        else:
-                            setattr(self, key, value)
+            if self._create_later(embedding):
+                return
+            if self.id is None:
+                data_for_db = self._build_save_data(embedding)
+                repo_result = await arepo_create(self.__class__.table_name, data_for_db)
+            elif changed is None:
+                logger.debug(f"Updating record with id {self.id}")
+                # _build_save_data needs every stored field
+                stored = [
+                    name
+                    for name in self._unloaded_fields()
+                    if not type(self).model_fields[name].exclude
+                ]
+                if stored:
+                    await self.aload_fields(*stored)
+                data_for_db = self._build_save_data(embedding)
+                repo_result = await arepo_update(self.id, data_for_db)
             else:
-                logger.warning(f"Save operation for {self.__class__.table_name} (id: {self.id}) did not return expected result.")
+                logger.debug(f"Updating fields {changed} of record {self.id}")
+                data_for_db = self._build_merge_data(changed, embedding)
+                repo_result = await arepo_merge(self.id, data_for_db)
 
+            self._apply_save_result(repo_result)
+            self._mark_saved()
+            invalidate_records(self.id)
 
         except ValidationError as e:
             logger.error(f"Validation failed: {e}")
@@ -190,8 +953,27 @@ class ObjectModel(BaseModel):
             logger.error(f"Error saving record: {e}")
             raise
 
+    @classmethod
+    def save_many(cls: Type[T], objects: List[T]) -> None:
+        """Create new records for all objects with a bulk insert."""
+        if not objects:
+            return
+        if not cls.table_name:
+            raise InvalidInputError(
+                "save_many() must be called from a specific model class"
+            )
+        if any(obj.id for obj in objects):
+            raise InvalidInputError("save_many() can only create new records")
+        try:
+            rows = [obj._build_save_data(obj._compute_embedding()) for obj in objects]
+            ids = repo_insert_many(cls.table_name, rows)
+            for obj, row, record_id in zip(objects, rows, ids):
+                obj._apply_save_result(
+                    [dict(id=record_id, created=row["created"], updated=row["updated"])]
+                )
+                obj._mark_saved()
         except Exception as e:
-            logger.error(f"Error saving {self.__class__.table_name}: {str(e)}")
+            logger.error(f"Error saving {cls.table_name} records: {str(e)}")
             logger.exception(e)
             raise DatabaseOperationError(e)
 
@@ -204,7 +986,9 @@ class ObjectModel(BaseModel):
             raise InvalidInputError("Cannot delete object without an ID")
         try:
             logger.debug(f"Deleting record with id {self.id}")
-            return repo_delete(self.id)
+            result = repo_delete(self.id)
+            invalidate_records(self.id)
+            return result
         except Exception as e:
             logger.error(
                 f"Error deleting {self.__class__.table_name} with id {self.id}: {str(e)}"
@@ -219,9 +1003,43 @@ class ObjectModel(BaseModel):
         if not relationship or not target_id or not self.id:
             raise InvalidInputError("Relationship and target ID must be provided")
         try:
-            return repo_relate(
+            result = repo_relate(
+                source=self.id, relationship=relationship, target=target_id, data=data
+            )
+            invalidate_records(self.id, target_id)
+            return result
+        except Exception as e:
+            logger.error(f"Error creating relationship: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def adelete(self) -> bool:
+        if self.id is None:
+            raise InvalidInputError("Cannot delete object without an ID")
+        try:
+            logger.debug(f"Deleting record with id {self.id}")
+            result = await arepo_delete(self.id)
+            invalidate_records(self.id)
+            return result
+        except Exception as e:
+            logger.error(
+                f"Error deleting {self.__class__.table_name} with id {self.id}: {str(e)}"
+            )
+            raise DatabaseOperationError(
+                f"Failed to delete {self.__class__.table_name}"
+            )
+
+    async def arelate(
+        self, relationship: str, target_id: str, data: Optional[Dict] = {}
+    ) -> Any:
+        if not relationship or not target_id or not self.id:
+            raise InvalidInputError("Relationship and target ID must be provided")
+        try:
+            result = await arepo_relate(
                 source=self.id, relationship=relationship, target=target_id, data=data
             )
+            invalidate_records(self.id, target_id)
+            return result
         except Exception as e:
             logger.error(f"Error creating relationship: {str(e)}")
             logger.exception(e)
@@ -276,9 +1094,11 @@ class RecordModel(BaseModel):
     def __init__(self, **kwargs):
         # Only initialize if this is a new instance
         if not hasattr(self, "_initialized"):
+            on_record_change(RecordModel._on_record_change)
             object.__setattr__(self, "__dict__", {})
-            # Load data from DB first
-            result = repo_query(f"SELECT * FROM {self.record_id};")
+            # Load data from DB first, from the primary: a settings record read
+            # again after a change must not come from a lagging replica
+            result = repo_query(f"SELECT * FROM {self.record_id};", read_only=False)
 
             # Initialize with DB data and any overrides
             init_data = {}
@@ -326,10 +1146,20 @@ class RecordModel(BaseModel):
         if "id" in data_to_upsert:
             del data_to_upsert["id"]
 
+        if get_write_queue() is not None:
+            # Nothing changes on the server, so there is no need to read it back
+            repo_enqueue(
+                f"UPSERT {self.record_id} CONTENT $data;", {"data": data_to_upsert}
+            )
+            if hasattr(self, "updated"):
+                object.__setattr__(
+                    self, "updated", ObjectModel.parse_datetime(data_to_upsert["updated"])
+                )
+            return self
 
         repo_upsert(self.record_id, data_to_upsert)
 
-        result = repo_query(f"SELECT * FROM {self.record_id};")
+        result = repo_query(f"SELECT * FROM {self.record_id};", read_only=False)
         if result and result[0]:
             for key, value in result[0].items():
                 if hasattr(self, key):
@@ -341,6 +1171,14 @@ class RecordModel(BaseModel):
                         object.__setattr__(self, key, value)
         return self
 
+    @staticmethod
+    def _on_record_change(change: RecordChange) -> None:
+        # Changed elsewhere: the next access loads the record again
+        if change.id is None:
+            RecordModel._instances.clear()
+        elif change.table == "open_notebook":
+            RecordModel._instances.pop(change.id, None)
+
     @classmethod
     def clear_instance(cls):
         """Clear the singleton instance (useful for testing)"""
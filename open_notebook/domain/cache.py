@@ -0,0 +1,158 @@
+"""
+Read cache for ObjectModel.get, keyed by record id.
+
+Rows are cached as returned by the database and a new model instance is built
+for every hit, so callers can mutate what they get without affecting others.
+Rows written through the repo_* helpers are dropped as they are written, and
+with SURREAL_LIVE_INVALIDATION, rows changed by other processes are dropped
+from the process cache as well.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from open_notebook.database.live import RecordChange, on_record_change
+from open_notebook.database.repository import on_records_written
+
+
+class RecordCache:
+    """Thread-safe LRU cache of database rows with an optional TTL."""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 10.0):
+        self.max_size = max_size
+        self.ttl = ttl  # seconds, 0 disables expiry
+        self.hits = 0
+        self.misses = 0
+        self._rows: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._rows.get(record_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, row = entry
+            if self.ttl and expires_at < time.monotonic():
+                del self._rows[record_id]
+                self.misses += 1
+                return None
+            self._rows.move_to_end(record_id)
+            self.hits += 1
+        return copy.deepcopy(row)
+
+    def put(self, record_id: str, row: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        row = copy.deepcopy(row)
+        with self._lock:
+            self._rows[record_id] = (time.monotonic() + self.ttl, row)
+            self._rows.move_to_end(record_id)
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, *record_ids: Optional[str]) -> None:
+        with self._lock:
+            for record_id in record_ids:
+                if record_id:
+                    self._rows.pop(str(record_id), None)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self._rows),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+        )
+
+
+# Shared by every thread of the process. OBJECT_CACHE_SIZE=0 disables it.
+process_cache = RecordCache(
+    max_size=int(os.environ.get("OBJECT_CACHE_SIZE", 1000)),
+    ttl=float(os.environ.get("OBJECT_CACHE_TTL", 10)),
+)
+
+_request_cache: ContextVar[Optional[RecordCache]] = ContextVar(
+    "request_record_cache", default=None
+)
+
+
+_watching_changes = False
+
+
+def _on_record_change(change: RecordChange) -> None:
+    if change.id is None:
+        process_cache.invalidate_all()
+    else:
+        process_cache.invalidate(change.id)
+
+
+def get_record_cache() -> RecordCache:
+    """The cache for the current request scope, or the process cache."""
+    global _watching_changes
+    if not _watching_changes:
+        on_record_change(_on_record_change)
+        _watching_changes = True
+    scoped = _request_cache.get()
+    return scoped if scoped is not None else process_cache
+
+
+@contextmanager
+def request_cache_scope(max_size: Optional[int] = None) -> Iterator[RecordCache]:
+    """
+    Use a private cache for the duration of the block.
+
+    Rows read inside the scope are only shared within it, so a request never
+    sees rows cached by another one, and nothing outlives the request.
+    """
+    cache = RecordCache(
+        max_size=max_size if max_size is not None else max(process_cache.max_size, 1),
+        ttl=0,
+    )
+    token = _request_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _request_cache.reset(token)
+
+
+def invalidate_records(*record_ids: Optional[str]) -> None:
+    """Drop records from the active request scope and the process cache."""
+    scoped = _request_cache.get()
+    if scoped is not None:
+        scoped.invalidate(*record_ids)
+    process_cache.invalidate(*record_ids)
+
+
+def _on_records_written(*record_ids: str) -> None:
+    if record_ids:
+        invalidate_records(*record_ids)
+        return
+    scoped = _request_cache.get()
+    if scoped is not None:
+        scoped.invalidate_all()
+    process_cache.invalidate_all()
+
+
+on_records_written(_on_records_written)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 import datetime
-from typing import TYPE_CHECKING, List, Literal, Optional
+from typing import TYPE_CHECKING, ClassVar, List, Literal, Optional
 from pydantic import Field
 from open_notebook.domain.base import ObjectModel
 from open_notebook.database.repository import repo_query # For fetching messages
@@ -13,7 +13,9 @@ if TYPE_CHECKING:
 
 class ChatMessage(ObjectModel):
     table_name: ClassVar[str] = "chat_message"
-    
+    # A chat turn writes two messages; don't make the reply wait for the commits
+    write_behind: ClassVar[bool] = True
+
     chat_session_id: str # Stores the full ID of the ChatSession (e.g., "chat_session:xyz123")
     sender: Literal["user", "ai"]
     content: str
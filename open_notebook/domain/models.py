@@ -1,5 +1,8 @@
+import os
+import time
 from typing import ClassVar, Dict, Optional
 
+from open_notebook.database.live import RecordChange, on_record_change
 from open_notebook.database.repository import repo_query
 from open_notebook.domain.base import ObjectModel, RecordModel
 from open_notebook.models import (
@@ -24,7 +27,7 @@ class Model(ObjectModel):
         models = repo_query(
             "SELECT * FROM model WHERE type=$model_type;", {"model_type": model_type}
         )
-        return [Model(**model) for model in models]
+        return [Model._from_row(model) for model in models]
 
 
 class DefaultModels(RecordModel):
@@ -43,6 +46,32 @@ class DefaultModels(RecordModel):
     default_crawl_4_ai_filter_model: Optional[str] = None
 
 
+class EmbeddingState(RecordModel):
+    """
+    Which embedding model the stored vectors belong to, and the progress of
+    re-embedding them when the default embedding model changes.
+
+    Vectors are written and searched with serving_model. A change of
+    default_embedding_model leaves it in place until the re-embedding job
+    (open_notebook.services.embedding_migration) has filled next_embedding
+    for every row with target_model and switched both over together.
+    """
+
+    record_id: ClassVar[str] = "open_notebook:embedding_state"
+    serving_model: Optional[str] = None
+    target_model: Optional[str] = None
+    # idle, running, failed or complete
+    status: str = "idle"
+    done: Dict[str, int] = {}
+    total: Dict[str, int] = {}
+    error: Optional[str] = None
+
+
+def embedding_state_ttl() -> float:
+    """Seconds a process keeps using the EmbeddingState it read."""
+    return float(os.environ.get("EMBEDDING_STATE_TTL", 5))
+
+
 class ModelManager:
     _instance = None
 
@@ -56,7 +85,21 @@ class ModelManager:
             self._initialized = True
             self._model_cache: Dict[str, ModelType] = {}
             self._default_models = None
+            self._embedding_state_read = 0.0
             self.refresh_defaults()
+            on_record_change(self._on_record_change)
+
+    def _on_record_change(self, change: RecordChange) -> None:
+        """Drop what another process changed; it is loaded again on next use."""
+        if change.id is None:
+            self._default_models = None
+            self.clear_cache()
+        elif change.id == DefaultModels.record_id:
+            self._default_models = None
+        elif change.table == Model.table_name:
+            prefix = f"{change.id}:"
+            for cache_key in [k for k in self._model_cache if k.startswith(prefix)]:
+                self._model_cache.pop(cache_key, None)
 
     def get_model(self, model_id: str, **kwargs) -> Optional[ModelType]:
         if not model_id:
@@ -160,6 +203,39 @@ class ModelManager:
         ), f"Expected EmbeddingModel but got {type(model)}"
         return model
 
+    @property
+    def embedding_state(self) -> EmbeddingState:
+        """
+        The re-embedding state, read again once it is embedding_state_ttl()
+        seconds old: the job may switch models at any moment, possibly in
+        another process.
+        """
+        now = time.monotonic()
+        if now - self._embedding_state_read >= embedding_state_ttl():
+            EmbeddingState.clear_instance()
+            self._embedding_state_read = now
+        return EmbeddingState()
+
+    @property
+    def serving_embedding_model_id(self) -> Optional[str]:
+        """
+        The model the stored vectors were made with. Everything that writes or
+        searches vectors uses it, so they stay in one space while the default
+        embedding model is being changed. Until the re-embedding job pins one,
+        it is the default embedding model.
+        """
+        return (
+            self.embedding_state.serving_model or self.defaults.default_embedding_model
+        )
+
+    @property
+    def serving_embedding_model(self) -> Optional[EmbeddingModel]:
+        model = self.get_model(self.serving_embedding_model_id)
+        assert model is None or isinstance(
+            model, EmbeddingModel
+        ), f"Expected EmbeddingModel but got {type(model)}"
+        return model
+
     @property
     def crawl_4_ai_filter_model(self, **kwargs) -> Optional[LanguageModel]:
         """Get the default Crawl4AI content filtering LLM"""
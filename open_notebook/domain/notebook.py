@@ -4,27 +4,43 @@ import datetime
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, List, Optional
 
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, ClassVar, Dict, Literal, Tuple
+from typing import Any, ClassVar, Dict, Literal, Sequence, Tuple
 
 from loguru import logger
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 from open_notebook.database.repository import (
+    arepo_delete_many,
+    arepo_insert_many,
+    arepo_merge_many,
+    arepo_query,
+    encode_vector,
     repo_create,
     repo_delete,
+    repo_delete_many,
+    repo_insert_many,
+    repo_merge_many,
     repo_query,
     repo_relate,
+    repo_relate_many,
     repo_update,
     repo_upsert,
 )
+from open_notebook.database.vectors import (
+    rerank,
+    rerank_factor,
+    vector_fields,
+    vector_storage,
+)
 from open_notebook.domain.base import ObjectModel
 from open_notebook.domain.models import model_manager
+from open_notebook.domain.pagination import Page, offset_clause, offset_page
 from open_notebook.exceptions import (
     DatabaseOperationError,
     InvalidInputError,
 )
-from open_notebook.utils import split_text, surreal_clean, generate_id
+from open_notebook.models.embedding_cache import text_hash
+from open_notebook.utils import chunker_id, split_text, surreal_clean, generate_id
 
 if TYPE_CHECKING:
     from open_notebook.domain.prompt import Prompt
@@ -44,16 +60,83 @@ class Notebook(ObjectModel):
             raise InvalidInputError("Notebook name cannot be empty")
         return v
 
-    @property
-    def sources(self) -> List["Source"]:
-        try:
-            srcs = repo_query(f"""
+    # page is an optional LIMIT/START clause from offset_clause()
+    def _sources_query(self, page: str = "") -> str:
+        return f"""
                 select * omit source.full_text from (
                 select in as source from reference where out={self.id}
                 fetch source
-            ) order by source.updated desc
-            """)
-            return [Source(**src["source"]) for src in srcs] if srcs else []
+            ) order by source.updated desc{page}
+            """
+
+    def _notes_query(self, page: str = "", content: bool = False) -> str:
+        omit = "note.embedding, note.embedding_packed"
+        if not content:
+            omit = f"note.content, {omit}"
+        return f"""
+            select * omit {omit} from (
+                select in as note from artifact where out={self.id}
+                fetch note
+            ) order by note.updated desc{page}
+            """
+
+    def _source_insights_query(self) -> str:
+        return f"""
+            SELECT * OMIT embedding, embedding_packed FROM source_insight
+            WHERE source IN (SELECT VALUE in FROM reference WHERE out = {self.id})
+            """
+
+    def _source_chunk_counts_query(self) -> str:
+        return f"""
+            SELECT source, count() AS chunks FROM source_embedding
+            WHERE source IN (SELECT VALUE in FROM reference WHERE out = {self.id})
+            GROUP BY source
+            """
+
+    def _chat_sessions_query(self, page: str = "") -> str:
+        return f"""
+                select * from (
+                    select
+                    <- chat_session as chat_session
+                    from refers_to
+                    where out={self.id}
+                    fetch chat_session
+                )
+                order by chat_session.updated desc{page}
+            """
+
+    def _tasks_query(self, page: str = "") -> str:
+        # Assuming a 'task_for' edge from task to notebook
+        # and tasks are stored in a 'task' table
+        return f"""
+            SELECT * FROM task WHERE notebook = {self.id} ORDER BY created DESC{page};
+            """
+
+    @property
+    def sources(self) -> List["Source"]:
+        try:
+            srcs = repo_query(self._sources_query())
+            return [Source._from_row(src["source"], ("full_text",)) for src in srcs] if srcs else []
+        except Exception as e:
+            logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_sources(self) -> List["Source"]:
+        try:
+            srcs = await arepo_query(self._sources_query())
+            return [Source._from_row(src["source"], ("full_text",)) for src in srcs] if srcs else []
+        except Exception as e:
+            logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_sources_page(self, limit: int, cursor: Optional[str] = None) -> Page["Source"]:
+        page = offset_clause(limit, cursor)
+        try:
+            srcs = await arepo_query(self._sources_query(page))
+            sources = [Source._from_row(src["source"], ("full_text",)) for src in srcs or []]
+            return offset_page(sources, limit, cursor)
         except Exception as e:
             logger.error(f"Error fetching sources for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -62,13 +145,28 @@ class Notebook(ObjectModel):
     @property
     def notes(self) -> List["Note"]:
         try:
-            srcs = repo_query(f"""
-            select * omit note.content, note.embedding from (
-                select in as note from artifact where out={self.id}
-                fetch note
-            ) order by note.updated desc
-            """)
-            return [Note(**src["note"]) for src in srcs] if srcs else []
+            srcs = repo_query(self._notes_query())
+            return [Note._from_row(src["note"], ("content", "embedding")) for src in srcs] if srcs else []
+        except Exception as e:
+            logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_notes(self) -> List["Note"]:
+        try:
+            srcs = await arepo_query(self._notes_query())
+            return [Note._from_row(src["note"], ("content", "embedding")) for src in srcs] if srcs else []
+        except Exception as e:
+            logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_notes_page(self, limit: int, cursor: Optional[str] = None) -> Page["Note"]:
+        page = offset_clause(limit, cursor)
+        try:
+            srcs = await arepo_query(self._notes_query(page))
+            notes = [Note._from_row(src["note"], ("content", "embedding")) for src in srcs or []]
+            return offset_page(notes, limit, cursor)
         except Exception as e:
             logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
             logger.exception(e)
@@ -77,39 +175,127 @@ class Notebook(ObjectModel):
     @property
     def chat_sessions(self) -> List["ChatSession"]:
         try:
-            srcs = repo_query(f"""
-                select * from (
-                    select
-                    <- chat_session as chat_session
-                    from refers_to
-                    where out={self.id}
-                    fetch chat_session
-                )
-                order by chat_session.updated desc
-            """)
+            srcs = repo_query(self._chat_sessions_query())
             return (
-                [ChatSession(**src["chat_session"][0]) for src in srcs] if srcs else []
+                [ChatSession._from_row(src["chat_session"][0]) for src in srcs] if srcs else []
             )
         except Exception as e:
             logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
             logger.exception(e)
             raise DatabaseOperationError(e)
 
+    async def aget_chat_sessions(self) -> List["ChatSession"]:
+        try:
+            srcs = await arepo_query(self._chat_sessions_query())
+            return (
+                [ChatSession._from_row(src["chat_session"][0]) for src in srcs] if srcs else []
+            )
+        except Exception as e:
+            logger.error(f"Error fetching chat sessions for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_chat_sessions_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Page["ChatSession"]:
+        page = offset_clause(limit, cursor)
+        try:
+            srcs = await arepo_query(self._chat_sessions_query(page))
+            sessions = [ChatSession._from_row(src["chat_session"][0]) for src in srcs or []]
+            return offset_page(sessions, limit, cursor)
+        except Exception as e:
+            logger.error(f"Error fetching chat sessions for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
     @property
     def tasks(self) -> List["Task"]:
         try:
-            # Assuming a 'task_for' edge from task to notebook
-            # and tasks are stored in a 'task' table
-            query_string = f"""
-            SELECT * FROM task WHERE notebook = {self.id} ORDER BY created DESC;
-            """
-            task_records = repo_query(query_string)
-            return [Task(**task_record) for task_record in task_records] if task_records else []
+            task_records = repo_query(self._tasks_query())
+            return [Task._from_row(task_record) for task_record in task_records] if task_records else []
+        except Exception as e:
+            logger.error(f"Error fetching tasks for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_tasks(self) -> List["Task"]:
+        try:
+            task_records = await arepo_query(self._tasks_query())
+            return [Task._from_row(task_record) for task_record in task_records] if task_records else []
         except Exception as e:
             logger.error(f"Error fetching tasks for notebook {self.id}: {str(e)}")
             logger.exception(e)
             raise DatabaseOperationError(e)
 
+    async def aget_tasks_page(self, limit: int, cursor: Optional[str] = None) -> Page["Task"]:
+        page = offset_clause(limit, cursor)
+        try:
+            task_records = await arepo_query(self._tasks_query(page))
+            tasks = [Task._from_row(task_record) for task_record in task_records or []]
+            return offset_page(tasks, limit, cursor)
+        except Exception as e:
+            logger.error(f"Error fetching tasks for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+
+    def load_graph(
+        self, include: Sequence[str] = ("sources.insights", "notes")
+    ) -> "NotebookGraph":
+        """
+        Load the notebook's related records in a fixed number of queries.
+
+        include takes any of "sources", "sources.insights", "chunk_counts",
+        "notes" and "notes.content" (notes with their content). Sources come
+        back with their insights and chunk counts already set, so reading
+        source.insights or source.embedded_chunks doesn't query again.
+        """
+        unknown = set(include) - set(GRAPH_INCLUDES)
+        if unknown:
+            raise InvalidInputError(f"Unknown graph includes: {', '.join(sorted(unknown))}")
+
+        graph = NotebookGraph(notebook=self)
+        try:
+            if {"sources", "sources.insights", "chunk_counts"} & set(include):
+                graph.sources = self.sources
+            if "sources.insights" in include:
+                insights: Dict[str, List[SourceInsight]] = {
+                    source.id: [] for source in graph.sources
+                }
+                for row in repo_query(self._source_insights_query()):
+                    insights.setdefault(str(row["source"]), []).append(SourceInsight._from_row(row))
+                for source in graph.sources:
+                    source._insights = insights[source.id]
+            if "chunk_counts" in include:
+                graph.chunk_counts = {source.id: 0 for source in graph.sources}
+                for row in repo_query(self._source_chunk_counts_query()):
+                    graph.chunk_counts[str(row["source"])] = row["chunks"]
+                for source in graph.sources:
+                    source._embedded_chunks = graph.chunk_counts[source.id]
+            if "notes.content" in include:
+                graph.notes = [
+                    Note._from_row(src["note"], ("embedding",))
+                    for src in repo_query(self._notes_query(content=True)) or []
+                ]
+            elif "notes" in include:
+                graph.notes = self.notes
+        except Exception as e:
+            logger.error(f"Error loading graph for notebook {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+        return graph
+
+
+GRAPH_INCLUDES = ("sources", "sources.insights", "chunk_counts", "notes", "notes.content")
+
+
+@dataclass
+class NotebookGraph:
+    notebook: Notebook
+    sources: List["Source"] = field(default_factory=list)
+    notes: List["Note"] = field(default_factory=list)
+    chunk_counts: Dict[str, int] = field(default_factory=dict)
+
 
 class Asset(BaseModel):
     file_path: Optional[str] = None
@@ -128,7 +314,7 @@ class SourceEmbedding(ObjectModel):
             select source.* from {self.id}                    fetch source
 
             """)
-            return Source(**src[0]["source"])
+            return Source._from_row(src[0]["source"])
         except Exception as e:
             logger.error(f"Error fetching source for embedding {self.id}: {str(e)}")
             logger.exception(e)
@@ -147,7 +333,7 @@ class SourceInsight(ObjectModel):
             select source.* from {self.id}                    fetch source
 
             """)
-            return Source(**src[0]["source"])
+            return Source._from_row(src[0]["source"])
         except Exception as e:
             logger.error(f"Error fetching source for insight {self.id}: {str(e)}")
             logger.exception(e)
@@ -166,11 +352,15 @@ class SourceInsight(ObjectModel):
 
 class Source(ObjectModel):
     table_name: ClassVar[str] = "source"
+    deferred_fields: ClassVar[Tuple[str, ...]] = ("full_text",)
     asset: Optional[Asset] = None
     title: Optional[str] = None
     topics: Optional[List[str]] = Field(default_factory=list)
     full_text: Optional[str] = None
     bypass_llm_filter: Optional[bool] = False
+    # Set by Notebook.load_graph() so the properties below don't query again
+    _insights: Optional[List[SourceInsight]] = PrivateAttr(default=None)
+    _embedded_chunks: Optional[int] = PrivateAttr(default=None)
 
     def get_context(
         self, context_size: Literal["short", "long"] = "short"
@@ -188,6 +378,8 @@ class Source(ObjectModel):
 
     @property
     def embedded_chunks(self) -> int:
+        if self._embedded_chunks is not None:
+            return self._embedded_chunks
         try:
             result = repo_query(
                 f"""
@@ -204,13 +396,15 @@ class Source(ObjectModel):
 
     @property
     def insights(self) -> List[SourceInsight]:
+        if self._insights is not None:
+            return self._insights
         try:
             result = repo_query(
                 f"""
-                SELECT * FROM source_insight WHERE source={self.id}
+                SELECT * OMIT embedding, embedding_packed FROM source_insight WHERE source={self.id}
                 """
             )
-            return [SourceInsight(**insight) for insight in result]
+            return [SourceInsight._from_row(insight) for insight in result]
         except Exception as e:
             logger.error(f"Error fetching insights for source {self.id}: {str(e)}")
             logger.exception(e)
@@ -221,60 +415,163 @@ class Source(ObjectModel):
             raise InvalidInputError("Notebook ID must be provided")
         return self.relate("reference", notebook_id)
 
-    def vectorize(self) -> None:
+    async def aadd_to_notebook(self, notebook_id: str) -> Any:
+        if not notebook_id:
+            raise InvalidInputError("Notebook ID must be provided")
+        return await self.arelate("reference", notebook_id)
+
+    @classmethod
+    def add_many_to_notebook(cls, sources: List["Source"], notebook_id: str) -> Any:
+        if not notebook_id:
+            raise InvalidInputError("Notebook ID must be provided")
+        source_ids = [source.id for source in sources if source.id]
+        try:
+            return repo_relate_many(source_ids, "reference", notebook_id)
+        except Exception as e:
+            logger.error(f"Error adding sources to notebook {notebook_id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    def _chunks(self) -> List[str]:
         logger.info(f"Starting vectorization for source {self.id}")
-        EMBEDDING_MODEL = model_manager.embedding_model
+        self._embedded_chunks = None
+        if not self.full_text:
+            logger.warning(f"No text to vectorize for source {self.id}")
+            return []
+
+        chunks = split_text(
+            self.full_text,
+        )
+        logger.info(f"Split into {len(chunks)} chunks for source {self.id}")
+        if not chunks:
+            logger.warning("No chunks created after splitting")
+        return chunks
+
+    def _embedding_rows(
+        self, chunks: Dict[int, str], embeddings: List[List[float]]
+    ) -> List[Dict[str, Any]]:
+        logger.info(f"Embedding complete. Got {len(embeddings)} embeddings")
+        chunker = chunker_id()
+        model_id = model_manager.serving_embedding_model_id
+        rows = [
+            {
+                "source": self.id,
+                "order": idx,
+                "content": surreal_clean(chunk),
+                "content_hash": text_hash(chunk),
+                "chunker": chunker,
+                **vector_fields(embedding),
+            }
+            for (idx, chunk), embedding in zip(chunks.items(), embeddings)
+        ]
+        if model_id:
+            for row in rows:
+                row["embedding_model"] = model_id
+        return rows
+
+    def _stored_chunks_query(self) -> str:
+        return f"""
+            SELECT id, order, content_hash, chunker, embedding_model
+            FROM source_embedding
+            WHERE source = {self.id}
+        """
+
+    def _diff_chunks(
+        self, chunks: List[str], stored: List[Dict[str, Any]]
+    ) -> Tuple[Dict[int, str], Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Matches freshly split chunks against the stored rows by content hash.
+
+        Returns the chunks that have to be embedded (by position), the new
+        order of stored rows whose position changed, and the ids of stored
+        rows whose chunk is gone. Rows chunked with other parameters, embedded
+        by another model, or stored before hashes were kept, never match.
+        """
+        chunker = chunker_id()
+        model_id = model_manager.serving_embedding_model_id
+        reusable: Dict[str, List[Dict[str, Any]]] = {}
+        for row in sorted(stored, key=lambda row: row.get("order") or 0):
+            if (
+                row.get("chunker") == chunker
+                and row.get("content_hash")
+                and row.get("embedding_model") == model_id
+            ):
+                reusable.setdefault(row["content_hash"], []).append(row)
+
+        new: Dict[int, str] = {}
+        moved: Dict[str, Dict[str, Any]] = {}
+        kept = set()
+        for idx, chunk in enumerate(chunks):
+            rows = reusable.get(text_hash(chunk))
+            if not rows:
+                new[idx] = chunk
+                continue
+            row = rows.pop(0)
+            kept.add(row["id"])
+            if row.get("order") != idx:
+                moved[row["id"]] = {"order": idx}
+        gone = [row["id"] for row in stored if row["id"] not in kept]
+        logger.info(
+            f"Source {self.id}: {len(new)} new chunks, {len(moved)} moved, "
+            f"{len(gone)} removed, {len(kept) - len(moved)} unchanged"
+        )
+        return new, moved, gone
 
+    def vectorize(self) -> None:
+        """
+        Embeds the source's chunks. Already vectorized sources are updated
+        incrementally, see revectorize.
+        """
+        self.revectorize()
+
+    async def avectorize(self) -> None:
+        await self.arevectorize()
+
+    def revectorize(self) -> None:
+        """
+        Brings the stored chunks in line with the current text: only chunks
+        that are not stored yet are embedded and inserted, rows whose chunk
+        disappeared are deleted and the rest are re-ordered.
+        """
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
         try:
-            if not self.full_text:
-                logger.warning(f"No text to vectorize for source {self.id}")
-                return
+            chunks = self._chunks()
+            stored = repo_query(self._stored_chunks_query()) or []
+            new, moved, gone = self._diff_chunks(chunks, stored)
+
+            # New rows go in before stale ones are removed, so a failed
+            # embedding leaves the source as it was
+            if new:
+                # The provider batches the chunks, in as few requests as it allows
+                embeddings = EMBEDDING_MODEL.embed_many(list(new.values()))
+                rows = self._embedding_rows(new, embeddings)
+                repo_insert_many("source_embedding", rows, record_fields=["source"])
+            repo_merge_many(moved)
+            repo_delete_many(gone)
 
-            chunks = split_text(
-                self.full_text,
-            )
-            chunk_count = len(chunks)
-            logger.info(f"Split into {chunk_count} chunks for source {self.id}")
-
-            if chunk_count == 0:
-                logger.warning("No chunks created after splitting")
-                return
-
-            def process_chunk(args: Tuple[int, str]) -> Tuple[int, List[float], str]:
-                idx, chunk = args
-                logger.debug(f"Processing chunk {idx}/{chunk_count}")
-                try:
-                    embedding = EMBEDDING_MODEL.embed(chunk)
-                    cleaned_content = surreal_clean(chunk)
-                    logger.debug(f"Successfully processed chunk {idx}")
-                    return (idx, embedding, cleaned_content)
-                except Exception as e:
-                    logger.error(f"Error processing chunk {idx}: {str(e)}")
-                    raise
-
-            # Process chunks in parallel while preserving order
-            logger.info("Starting parallel processing of chunks")
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                # Create list of (index, chunk) tuples
-                chunk_tasks = list(enumerate(chunks))
-                # Process all chunks in parallel and get results
-                results = list(executor.map(process_chunk, chunk_tasks))
-
-            logger.info(f"Parallel processing complete. Got {len(results)} results")
-
-            # Insert results in order (they're already ordered by index)
-            for idx, embedding, content in results:
-                logger.debug(f"Inserting chunk {idx} into database")
-                repo_query(
-                    f"""
-                    CREATE source_embedding CONTENT {{
-                            "source": {self.id},
-                            "order": {idx},
-                            "content": $content,
-                            "embedding": {embedding},
-                    }};""",
-                    {"content": content},
+            logger.info(f"Vectorization complete for source {self.id}")
+
+        except Exception as e:
+            logger.error(f"Error vectorizing source {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def arevectorize(self) -> None:
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
+        try:
+            chunks = self._chunks()
+            stored = await arepo_query(self._stored_chunks_query()) or []
+            new, moved, gone = self._diff_chunks(chunks, stored)
+
+            if new:
+                # Batches go out concurrently, up to the provider's concurrency limit
+                embeddings = await EMBEDDING_MODEL.aembed_many(list(new.values()))
+                rows = self._embedding_rows(new, embeddings)
+                await arepo_insert_many(
+                    "source_embedding", rows, record_fields=["source"]
                 )
+            await arepo_merge_many(moved)
+            await arepo_delete_many(gone)
 
             logger.info(f"Vectorization complete for source {self.id}")
 
@@ -283,35 +580,68 @@ class Source(ObjectModel):
             logger.exception(e)
             raise DatabaseOperationError(e)
 
-    def add_insight(self, insight_type: str, content: str) -> Any:
-        EMBEDDING_MODEL = model_manager.embedding_model
+    def _insight_rows(
+        self, insight_type: str, content: str, embedding: List[float]
+    ) -> List[Dict[str, Any]]:
+        row = {
+            "source": self.id,
+            "insight_type": insight_type,
+            "content": surreal_clean(content),
+            **vector_fields(embedding),
+        }
+        # source_insight is SCHEMAFULL: without a model the field is left out
+        model_id = model_manager.serving_embedding_model_id
+        if model_id:
+            row["embedding_model"] = model_id
+        return [row]
+
+    def _insight_model(self, insight_type: str, content: str):
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
         if not EMBEDDING_MODEL:
             logger.warning("No embedding model found. Insight will not be searchable.")
 
         if not insight_type or not content:
             raise InvalidInputError("Insight type and content must be provided")
+        self._insights = None
+        return EMBEDDING_MODEL
+
+    def add_insight(self, insight_type: str, content: str) -> Any:
+        EMBEDDING_MODEL = self._insight_model(insight_type, content)
         try:
-            embedding = EMBEDDING_MODEL.embed(content) if EMBEDDING_MODEL else []
-            return repo_query(
-                f"""
-                CREATE source_insight CONTENT {{
-                        "source": {self.id},
-                        "insight_type": '{insight_type}',
-                        "content": $content,
-                        "embedding": {embedding},
-                }};""",
-                {"content": surreal_clean(content)},
+            embedding = EMBEDDING_MODEL.embed_many([content])[0] if EMBEDDING_MODEL else []
+            return repo_insert_many(
+                "source_insight",
+                self._insight_rows(insight_type, content, embedding),
+                record_fields=["source"],
             )
         except Exception as e:
             logger.error(f"Error adding insight to source {self.id}: {str(e)}")
             raise  # DatabaseOperationError(e)
 
+    async def aadd_insight(self, insight_type: str, content: str) -> Any:
+        EMBEDDING_MODEL = self._insight_model(insight_type, content)
+        try:
+            embedding = await EMBEDDING_MODEL.aembed(content) if EMBEDDING_MODEL else []
+            return await arepo_insert_many(
+                "source_insight",
+                self._insight_rows(insight_type, content, embedding),
+                record_fields=["source"],
+            )
+        except Exception as e:
+            logger.error(f"Error adding insight to source {self.id}: {str(e)}")
+            raise
+
 
 class Note(ObjectModel):
     table_name: ClassVar[str] = "note"
+    deferred_fields: ClassVar[Tuple[str, ...]] = ("embedding",)
+    trusted_hydration: ClassVar[bool] = True
+    embedding_source_fields: ClassVar[Tuple[str, ...]] = ("content",)
     title: Optional[str] = None
     note_type: Optional[Literal["human", "ai"]] = None
     content: Optional[str] = None
+    # Recomputed from content when it changes, so never written back as-is
+    embedding: Optional[List[float]] = Field(default=None, exclude=True)
 
     @field_validator("content")
     @classmethod
@@ -325,6 +655,11 @@ class Note(ObjectModel):
             raise InvalidInputError("Notebook ID must be provided")
         return self.relate("artifact", notebook_id)
 
+    async def aadd_to_notebook(self, notebook_id: str) -> Any:
+        if not notebook_id:
+            raise InvalidInputError("Notebook ID must be provided")
+        return await self.arelate("artifact", notebook_id)
+
     def get_context(
         self, context_size: Literal["short", "long"] = "short"
     ) -> Dict[str, Any]:
@@ -356,6 +691,14 @@ class ChatSession(ObjectModel):
         # Assuming 'refers_to' edge direction is FROM ChatSession TO Notebook
         return self.relate("refers_to", notebook_id)
 
+    async def arelate_to_notebook(self, notebook_id: str) -> Any:
+        if not notebook_id:
+            raise InvalidInputError("Notebook ID must be provided")
+        return await self.arelate("refers_to", notebook_id)
+
+    def _messages_query(self, page: str = "") -> str:
+        return f"SELECT * FROM chat_message WHERE chat_session_id = \'{self.id}\' ORDER BY timestamp ASC, order ASC{page};"
+
     @property
     def messages(self) -> List["ChatMessage"]:
         """Fetches all messages for this chat session, ordered by timestamp or explicit order."""
@@ -367,9 +710,7 @@ class ChatSession(ObjectModel):
             # This is a common way to model one-to-many if not using graph edges for messages.
             # If using edges, the query would be different (e.g., `select <-contains as message from {self.id}`).
             # For now, assuming chat_session_id field on ChatMessage.
-            raw_messages = repo_query(
-                f"SELECT * FROM chat_message WHERE chat_session_id = \'{self.id}\' ORDER BY timestamp ASC, order ASC;"
-            )
+            raw_messages = repo_query(self._messages_query())
             
             # Alternative if order is the primary sort key and timestamp secondary:
             # raw_messages = repo_query(
@@ -379,7 +720,7 @@ class ChatSession(ObjectModel):
             # If ChatMessage.save() automatically sets an id like "chat_message:xyz",
             # and self.id is also like "chat_session:abc", the query should work directly.
 
-            message_objects = [ChatMessage(**msg) for msg in raw_messages] if raw_messages else []
+            message_objects = [ChatMessage._from_row(msg) for msg in raw_messages] if raw_messages else []
             # The __lt__ method in ChatMessage will handle sorting if done in Python,
             # but SurrealDB's ORDER BY is more efficient.
             # If sorting in Python: message_objects.sort()
@@ -389,6 +730,32 @@ class ChatSession(ObjectModel):
             logger.exception(e)
             raise DatabaseOperationError(e)
 
+    async def aget_messages(self) -> List["ChatMessage"]:
+        try:
+            from open_notebook.domain.chat import ChatMessage
+
+            raw_messages = await arepo_query(self._messages_query())
+            return [ChatMessage._from_row(msg) for msg in raw_messages] if raw_messages else []
+        except Exception as e:
+            logger.error(f"Error fetching messages for chat session {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
+    async def aget_messages_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Page["ChatMessage"]:
+        page = offset_clause(limit, cursor)
+        try:
+            from open_notebook.domain.chat import ChatMessage
+
+            raw_messages = await arepo_query(self._messages_query(page))
+            messages = [ChatMessage._from_row(msg) for msg in raw_messages or []]
+            return offset_page(messages, limit, cursor)
+        except Exception as e:
+            logger.error(f"Error fetching messages for chat session {self.id}: {str(e)}")
+            logger.exception(e)
+            raise DatabaseOperationError(e)
+
 
 def text_search(keyword: str, results: int, source: bool = True, note: bool = True):
     if not keyword:
@@ -408,6 +775,53 @@ def text_search(keyword: str, results: int, source: bool = True, note: bool = Tr
         raise DatabaseOperationError(e)
 
 
+_VECTOR_SEARCH_QUERY = """
+            SELECT * FROM fn::vector_search(
+                $embed, $results, $source, $note, $minimum_score, $model
+            );
+            """
+
+_VECTOR_CANDIDATES_QUERY = """
+            SELECT * FROM fn::vector_candidates(
+                $embed, $results, $source, $note, $minimum_score, $model
+            );
+            """
+
+# Candidates just below minimum_score may still pass it once re-ranked
+_CANDIDATE_MARGIN = 0.02
+
+
+def _vector_search_query(
+    embed: List[float], results: int, source: bool, note: bool, minimum_score: float
+) -> Tuple[str, Dict[str, Any]]:
+    vars = {
+        "embed": encode_vector(embed),
+        "results": results,
+        "source": source,
+        "note": note,
+        "minimum_score": minimum_score,
+        "model": model_manager.serving_embedding_model_id,
+    }
+    if vector_storage() == "float":
+        return _VECTOR_SEARCH_QUERY, vars
+    # The scan scores quantized vectors, so it gathers more candidates than
+    # needed and the final order comes from their full-precision copies
+    vars["results"] = results * rerank_factor()
+    vars["minimum_score"] = minimum_score - _CANDIDATE_MARGIN
+    return _VECTOR_CANDIDATES_QUERY, vars
+
+
+def _vector_search_results(
+    rows: List[Dict[str, Any]],
+    embed: List[float],
+    results: int,
+    minimum_score: float,
+) -> List[Dict[str, Any]]:
+    if vector_storage() == "float":
+        return rows
+    return rerank(rows or [], embed, results, minimum_score)
+
+
 def vector_search(
     keyword: str,
     results: int,
@@ -418,21 +832,36 @@ def vector_search(
     if not keyword:
         raise InvalidInputError("Search keyword cannot be empty")
     try:
-        EMBEDDING_MODEL = model_manager.embedding_model
-        embed = EMBEDDING_MODEL.embed(keyword)
-        results = repo_query(
-            """
-            SELECT * FROM fn::vector_search($embed, $results, $source, $note, $minimum_score);
-            """,
-            {
-                "embed": embed,
-                "results": results,
-                "source": source,
-                "note": note,
-                "minimum_score": minimum_score,
-            },
+        # Until a re-embedding job switches models, search stays on the vectors
+        # already stored and the model that made them
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
+        embed = EMBEDDING_MODEL.embed_many([keyword])[0]
+        rows = repo_query(
+            *_vector_search_query(embed, results, source, note, minimum_score)
         )
-        return results
+        return _vector_search_results(rows, embed, results, minimum_score)
+    except Exception as e:
+        logger.error(f"Error performing vector search: {str(e)}")
+        logger.exception(e)
+        raise DatabaseOperationError(e)
+
+
+async def avector_search(
+    keyword: str,
+    results: int,
+    source: bool = True,
+    note: bool = True,
+    minimum_score=0.2,
+):
+    if not keyword:
+        raise InvalidInputError("Search keyword cannot be empty")
+    try:
+        EMBEDDING_MODEL = model_manager.serving_embedding_model
+        embed = await EMBEDDING_MODEL.aembed(keyword)
+        rows = await arepo_query(
+            *_vector_search_query(embed, results, source, note, minimum_score)
+        )
+        return _vector_search_results(rows, embed, results, minimum_score)
     except Exception as e:
         logger.error(f"Error performing vector search: {str(e)}")
         logger.exception(e)
@@ -0,0 +1,98 @@
+"""
+Cursor pagination helpers for ObjectModel listings.
+
+Cursors are opaque to callers: a url-safe base64 JSON object holding either
+the keyset position of the last row returned ({"k": value, "id": id}) or,
+for orderings keyset paging can't follow, a plain offset ({"o": offset}).
+"""
+
+import base64
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from open_notebook.exceptions import InvalidInputError
+
+T = TypeVar("T")
+
+# Columns that can be paged by keyset; ties are broken on id
+KEYSET_COLUMNS = ("id", "created", "updated")
+
+_ORDER_RE = re.compile(r"^\s*(\w+)(?:\s+(asc|desc))?\s*$", re.IGNORECASE)
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidInputError("Invalid pagination cursor")
+    if not isinstance(position, dict):
+        raise InvalidInputError("Invalid pagination cursor")
+    return position
+
+
+def cursor_offset(position: Dict[str, Any]) -> int:
+    try:
+        offset = int(position.get("o", 0))
+    except (ValueError, TypeError):
+        raise InvalidInputError("Invalid pagination cursor")
+    if offset < 0:
+        raise InvalidInputError("Invalid pagination cursor")
+    return offset
+
+
+def order_columns(order_by: str) -> List[str]:
+    """The columns of an ORDER BY clause; anything but plain columns is rejected."""
+    columns = []
+    for term in order_by.split(","):
+        match = _ORDER_RE.match(term)
+        if not match:
+            raise InvalidInputError(f"Invalid ordering: {order_by}")
+        columns.append(match.group(1))
+    return columns
+
+
+def keyset_order(order_by: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    The (column, direction) to keyset-page on for an ORDER BY clause, or
+    None when the ordering needs offset paging.
+    """
+    if not order_by:
+        return "id", "ASC"
+    match = _ORDER_RE.match(order_by)
+    if not match or match.group(1).lower() not in KEYSET_COLUMNS:
+        return None
+    return match.group(1).lower(), (match.group(2) or "ASC").upper()
+
+
+def offset_clause(limit: Optional[int], cursor: Optional[str] = None) -> str:
+    """LIMIT/START clause for an offset page, with one extra row to detect the next."""
+    if limit is None:
+        return ""
+    if limit < 1:
+        raise InvalidInputError("Page limit must be at least 1")
+    offset = cursor_offset(decode_cursor(cursor))
+    return f" LIMIT {limit + 1} START {offset}"
+
+
+def offset_page(items: List[T], limit: int, cursor: Optional[str] = None) -> Page[T]:
+    """Page built from the items of a query using offset_clause(limit, cursor)."""
+    if len(items) <= limit:
+        return Page(items=items)
+    offset = cursor_offset(decode_cursor(cursor))
+    return Page(items=items[:limit], next_cursor=encode_cursor({"o": offset + limit}))
@@ -10,6 +10,15 @@ class DatabaseOperationError(OpenNotebookError):
     pass
 
 
+class WriteBehindError(DatabaseOperationError):
+    """Raised when writes queued for write-behind could not be committed."""
+
+    def __init__(self, message: str, failed: list):
+        super().__init__(message)
+        # (statement, vars, error) of every write that was lost
+        self.failed = failed
+
+
 class UnsupportedTypeException(OpenNotebookError):
     """Raised when an unsupported type is provided."""
 
@@ -11,7 +11,7 @@ from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 from loguru import logger
 
-from open_notebook.domain.notebook import vector_search
+from open_notebook.domain.notebook import avector_search
 from open_notebook.graphs.utils import provision_langchain_model
 from open_notebook.prompter import Prompter
 
@@ -95,7 +95,7 @@ async def provide_answer(state: SubGraphState, config: RunnableConfig) -> dict:
     # if state["type"] == "text":
     #     results = text_search(state["term"], 10, True, True)
     # else:
-    results = vector_search(state["term"], 10, True, True)
+    results = await avector_search(state["term"], 10, True, True)
     if len(results) == 0:
         return {"answers": []}
     payload["results"] = results
@@ -111,6 +111,22 @@ def route_save_item_conditional_router(state: SourceState) -> str:
     return decision
 
 
+def build_source(content_state: ContentState) -> Source:
+    """Builds an unsaved Source from a processed content item."""
+    source_title = content_state.get("title") or "Untitled Source"
+
+    return Source(
+        asset=Asset(
+            url=content_state.get("url"),
+            file_path=content_state.get("file_path"),
+            source_type=content_state.get("identified_type"),
+        ),
+        full_text=surreal_clean(content_state["content"] or ""), # Use the cleaned content
+        title=surreal_clean(source_title), # Use the cleaned title
+        bypass_llm_filter=content_state.get("bypass_llm_filter", False), # Set the bypass flag on the Source object
+    )
+
+
 def save_source(state: SourceState) -> dict:
     payload = state.get("item_payload_for_saving")
     if not payload or not payload.get("content_state"):
@@ -133,29 +149,12 @@ def save_source(state: SourceState) -> dict:
         logger.warning(f"save_source: item has no content and no processing error. Skipping.")
         return {"source": [], "item_payload_for_saving": None}
 
-    source_title = current_item_content_state.get("title") or "Untitled Source"
-    source_asset_type = current_item_content_state.get("identified_type")
-
-    source_url = current_item_content_state.get("url")
-    source_file_path = current_item_content_state.get("file_path")
-
-    cleaned_content_for_db = surreal_clean(current_item_content_state["content"] or "")
-    cleaned_title_for_db = surreal_clean(source_title)
+    source_obj = build_source(current_item_content_state) # Renamed to source_obj to avoid conflict with state key
 
     # --- BEGIN DEBUG LOG ---
-    logger.info(f"SAVE_SOURCE_NODE: Content AFTER surreal_clean, before Source object save:\n{cleaned_content_for_db}")
+    logger.info(f"SAVE_SOURCE_NODE: Content AFTER surreal_clean, before Source object save:\n{source_obj.full_text}")
     # --- END DEBUG LOG ---
 
-    source_obj = Source( # Renamed to source_obj to avoid conflict with state key
-        asset=Asset(
-            url=source_url,
-            file_path=source_file_path,
-            source_type=source_asset_type
-        ),
-        full_text=cleaned_content_for_db, # Use the cleaned content
-        title=cleaned_title_for_db, # Use the cleaned title
-        bypass_llm_filter=bypass_filter_flag  # Set the bypass flag on the Source object
-    )
     source_obj.save()
     logger.info(f"Successfully SAVED source: {source_obj.id} - {source_obj.title}, Bypass Filter: {bypass_filter_flag}")
 
@@ -175,6 +174,46 @@ def save_source(state: SourceState) -> dict:
     }
 
 
+def save_scraped_sources(state: SourceState) -> dict:
+    """
+    Saves all pages of a scraped website in bulk: one insert for the sources,
+    one RELATE for the notebook edges, and bulk chunk inserts per source.
+    """
+    staged_items = state.get("content_state_for_saving", [])
+    notebook_id = state.get("notebook_id")
+    embed_flag = state.get("embed")
+
+    sources = []
+    for item in staged_items:
+        if not item:
+            continue
+        if item.get("error"):
+            logger.warning(f"Skipping scraped page due to processing error: {item.get('error')}")
+            continue
+        if not item.get("content"):
+            logger.warning(f"Skipping scraped page without content: {item.get('url')}")
+            continue
+        sources.append(build_source(item))
+
+    if not sources:
+        logger.warning("save_scraped_sources: no scraped pages to save.")
+        return {"source": []}
+
+    Source.save_many(sources)
+    logger.info(f"Successfully SAVED {len(sources)} scraped sources")
+
+    if notebook_id:
+        logger.debug(f"Adding {len(sources)} sources to notebook {notebook_id}")
+        Source.add_many_to_notebook(sources, notebook_id)
+
+    if embed_flag:
+        for source_obj in sources:
+            logger.debug(f"Embedding content for source {source_obj.id} for vector search")
+            source_obj.vectorize()
+
+    return {"source": sources}
+
+
 def increment_index_and_loop_func(state: SourceState) -> dict:
     """Increments the save index and prepares to loop back to the router."""
     current_index = state.get("processed_content_save_index", 0)
@@ -223,7 +262,7 @@ async def transform_content(state: TransformationState) -> Optional[dict]:
     result = await transform_graph.ainvoke(
         dict(input_text=content, transformation=transformation_obj)
     )
-    source_obj.add_insight(transformation_obj.title, surreal_clean(result["output"]))
+    await source_obj.aadd_insight(transformation_obj.title, surreal_clean(result["output"]))
     return { # Must return a dict to update state (even if empty for this node)
     }
 
@@ -316,6 +355,7 @@ workflow.add_node("prepare_single_content_for_saving", prepare_single_content_fo
 workflow.add_node("initiate_scrape_processing", initiate_scrape_processing)
 workflow.add_node("fan_out_scraped_documents", fan_out_scraped_documents)
 workflow.add_node("process_scraped_document_item", process_scraped_document_item)
+workflow.add_node("save_scraped_sources", save_scraped_sources)
 workflow.add_node("initiate_sequential_save", initiate_sequential_save_func)
 workflow.add_node("route_save_or_transform_decision", route_save_item_or_trigger_transformations_node_action)
 workflow.add_node("save_source", save_source)
@@ -348,8 +388,10 @@ workflow.add_conditional_edges(
         END: END # If fan_out returns empty list
     }
 )
-# After all process_scraped_document_item branches complete and content_state_for_saving is aggregated
-workflow.add_edge("process_scraped_document_item", "initiate_sequential_save")
+# After all process_scraped_document_item branches complete and content_state_for_saving is aggregated,
+# save every page in one bulk pass instead of the per-item sequential loop
+workflow.add_edge("process_scraped_document_item", "save_scraped_sources")
+workflow.add_edge("save_scraped_sources", "trigger_transformations_router_entry")
 
 
 # Sequential saving loop
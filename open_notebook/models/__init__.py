@@ -5,6 +5,7 @@ from open_notebook.models.embedding_models import (
     GeminiEmbeddingModel,
     HFInferenceEmbeddingModel,
     LMStudioEmbeddingModel,
+    LocalEmbeddingModel,
     OllamaEmbeddingModel,
     OpenAIEmbeddingModel,
     VertexEmbeddingModel,
@@ -69,6 +70,7 @@ MODEL_CLASS_MAP: Dict[str, ProviderMap] = {
         "ollama": OllamaEmbeddingModel,
         "lmstudio": LMStudioEmbeddingModel,
         "huggingface": HFInferenceEmbeddingModel,
+        "local": LocalEmbeddingModel,
     },
     "speech_to_text": {
         "openai": OpenAISpeechToTextModel,
@@ -0,0 +1,126 @@
+"""
+Long-lived HTTP and SDK clients shared by the model providers.
+
+Building a client per call means a new connection pool, and so a new TCP and
+TLS handshake, for every request. Clients here are created once per provider
+and credentials and then reused, keeping their keep-alive connections open;
+httpx clients speak HTTP/2 when the h2 package is installed. Credentials are
+only part of the registry key as a hash.
+
+Async clients are bound to the event loop they were made on, so each running
+loop gets its own.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_TIMEOUT = httpx.Timeout(
+    float(os.environ.get("MODEL_HTTP_TIMEOUT", 600)), connect=10
+)
+_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("MODEL_HTTP_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=20,
+    keepalive_expiry=60,
+)
+
+_clients: Dict[Tuple[Hashable, ...], Any] = {}
+_lock = threading.Lock()
+_loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def credentials_key(*values: Optional[str]) -> str:
+    """A short, non-reversible stand-in for credentials in a registry key."""
+    joined = "\0".join(value or "" for value in values)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def env_credentials(*names: str) -> str:
+    return credentials_key(*(os.environ.get(name) for name in names))
+
+
+def shared_client(key: Tuple[Hashable, ...], factory: Callable[[], T]) -> T:
+    """The client registered under key, created by factory on first use."""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+
+def loop_shared(key: Hashable, factory: Callable[[], T]) -> T:
+    """
+    The object stored under key for the running event loop, created on first use.
+    """
+    state: Dict[Hashable, Any] = _loop_clients.setdefault(
+        asyncio.get_running_loop(), {}
+    )
+    if key not in state:
+        state[key] = factory()
+    return state[key]
+
+
+def http_client(base_url: str = "") -> httpx.Client:
+    return shared_client(
+        ("httpx", base_url),
+        lambda: httpx.Client(
+            base_url=base_url, http2=HTTP2, timeout=_TIMEOUT, limits=_LIMITS
+        ),
+    )
+
+
+def async_http_client(base_url: str = "") -> httpx.AsyncClient:
+    return loop_shared(
+        ("httpx", base_url),
+        lambda: httpx.AsyncClient(
+            base_url=base_url, http2=HTTP2, timeout=_TIMEOUT, limits=_LIMITS
+        ),
+    )
+
+
+_OPENAI_ENV = (
+    "OPENAI_API_KEY",
+    "OPENAI_BASE_URL",
+    "OPENAI_ORG_ID",
+    "OPENAI_PROJECT_ID",
+)
+
+
+def openai_client():
+    from openai import DefaultHttpxClient, OpenAI
+
+    return shared_client(
+        ("openai", env_credentials(*_OPENAI_ENV)),
+        lambda: OpenAI(http_client=DefaultHttpxClient(http2=HTTP2, limits=_LIMITS)),
+    )
+
+
+def async_openai_client():
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    return loop_shared(
+        ("openai", env_credentials(*_OPENAI_ENV)),
+        lambda: AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(http2=HTTP2, limits=_LIMITS)
+        ),
+    )
+
+
+def groq_client():
+    from groq import Groq
+
+    return shared_client(
+        ("groq", env_credentials("GROQ_API_KEY", "GROQ_BASE_URL")), Groq
+    )
@@ -0,0 +1,264 @@
+"""
+Adaptive concurrency and retries for requests to embedding providers.
+
+Each provider gets one AdaptiveLimiter, shared by every thread and event loop
+in the process. Its limit follows AIMD: it grows by about one request per
+round of successes while latency stays near the best seen, shrinks a little
+when latency climbs, and halves when the provider throttles (429) or fails
+(5xx), pausing new requests for the Retry-After the provider asked for.
+with_retries and awith_retries retry one request on those transient errors.
+"""
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+_RETRY_STATUS = {408, 429}
+_TRANSIENT_ERRORS = (
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectError",
+    "ConnectionError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "TooManyRequests",
+    "Timeout",
+    "TimeoutError",
+    "TransportError",
+)
+
+
+class TransientError(Exception):
+    """A request failure worth retrying, with the delay the provider asked for."""
+
+    def __init__(self, error: BaseException, retry_after: Optional[float] = None):
+        super().__init__(str(error))
+        self.error = error
+        self.retry_after = retry_after
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for value in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        # An HTTP date; the default backoff is close enough
+        return None
+
+
+def classify(error: BaseException) -> Optional[TransientError]:
+    """A TransientError if error is a throttle, server error or dropped connection."""
+    if isinstance(error, TransientError):
+        return error
+    status = _status_code(error)
+    if status is not None:
+        if status in _RETRY_STATUS or 500 <= status < 600:
+            return TransientError(error, _retry_after(error))
+        return None
+    if any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__):
+        return TransientError(error)
+    return None
+
+
+class AdaptiveLimiter:
+    """AIMD limit on the requests in flight to one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 2,
+        maximum: int = 16,
+        minimum: int = 1,
+        tolerance: float = 2.0,
+    ):
+        self.name = name
+        self.maximum = max(maximum, 1)
+        self.minimum = max(min(minimum, self.maximum), 1)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.throttled = 0
+        self._baseline: Optional[float] = None
+        self._paused_until = 0.0
+        # in_flight counts the requests of every thread and event loop; threads
+        # wait on the condition, coroutines on a future resolved from _wake
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def pause_remaining(self) -> float:
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+    def on_success(self, latency: float, size: int = 1) -> None:
+        """Record a request that took latency seconds for size texts."""
+        latency /= max(size, 1)
+        with self._lock:
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                # Let the baseline drift up slowly, so a provider that simply got
+                # slower is not treated as overloaded forever
+                self._baseline += 0.01 * (latency - self._baseline)
+            if latency <= self._baseline * self.tolerance:
+                self.limit = min(self.limit + 1 / self.limit, self.maximum)
+            else:
+                self.limit = max(self.limit * 0.9, self.minimum)
+            self._wake()
+
+    def on_throttle(self, retry_after: Optional[float]) -> None:
+        """Halve the limit and hold new requests for retry_after seconds."""
+        with self._lock:
+            self.throttled += 1
+            self.limit = max(self.limit / 2, self.minimum)
+            if retry_after:
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + retry_after
+                )
+        logger.warning(
+            f"{self.name} is throttling or failing, concurrency down to "
+            f"{int(self.limit)}" + (f", pausing {retry_after:.1f}s" if retry_after else "")
+        )
+
+    def _acquire(self) -> bool:
+        # Called with the lock held
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        # Called with the lock held; every waiter checks the limit again
+        self._available.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # Its loop is closed
+
+    @contextlib.contextmanager
+    def slot(self):
+        time.sleep(self.pause_remaining())
+        with self._available:
+            self._available.wait_for(self._acquire)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.pause_remaining())
+        while True:
+            with self._lock:
+                if self._acquire():
+                    break
+                woken = loop.create_future()
+                self._waiters.append((loop, woken))
+            await woken
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            limit=int(self.limit),
+            maximum=self.maximum,
+            in_flight=self.in_flight,
+            throttled=self.throttled,
+            baseline_latency=self._baseline,
+        )
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _backoff(attempt: int, transient: TransientError) -> float:
+    if transient.retry_after is not None:
+        return transient.retry_after
+    return min(0.5 * 2**attempt, 30.0) * random.uniform(0.5, 1.0)
+
+
+def with_retries(
+    limiter: AdaptiveLimiter, request: Callable[[], T], size: int, retries: int
+) -> T:
+    """Run request within the limiter, retrying transient failures."""
+    attempt = 0
+    while True:
+        with limiter.slot():
+            started = time.monotonic()
+            try:
+                result = request()
+            except Exception as e:
+                transient = classify(e)
+                if transient is None or attempt >= retries:
+                    raise
+            else:
+                limiter.on_success(time.monotonic() - started, size)
+                return result
+        limiter.on_throttle(transient.retry_after)
+        time.sleep(_backoff(attempt, transient))
+        attempt += 1
+
+
+async def awith_retries(
+    limiter: AdaptiveLimiter,
+    request: Callable[[], Awaitable[T]],
+    size: int,
+    retries: int,
+) -> T:
+    """Async with_retries."""
+    attempt = 0
+    while True:
+        async with limiter.aslot():
+            started = time.monotonic()
+            try:
+                result = await request()
+            except Exception as e:
+                transient = classify(e)
+                if transient is None or attempt >= retries:
+                    raise
+            else:
+                limiter.on_success(time.monotonic() - started, size)
+                return result
+        limiter.on_throttle(transient.retry_after)
+        await asyncio.sleep(_backoff(attempt, transient))
+        attempt += 1
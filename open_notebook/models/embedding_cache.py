@@ -0,0 +1,229 @@
+"""
+Persistent cache of embeddings, so identical text is only embedded once.
+
+Entries are keyed by (provider, model name, sha256 of the normalized text)
+and hold the vector packed as float32, in a SQLite file under DATA_FOLDER
+shared by every process. When the stored vectors exceed
+EMBEDDING_CACHE_MAX_MB, the least recently used entries are evicted. Lookups
+only read: the time of each hit is kept in memory and written along with the
+next insert, before an eviction, or at most once a minute otherwise.
+EmbeddingModel.embed_many and aembed_many look texts up here before calling
+the provider; EMBEDDING_CACHE=false turns the cache off.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+# Bound variables per statement, well below SQLite's limit
+_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    # Whitespace differences (re-flowed lines, trailing newlines) do not change
+    # what the text means, so they should not cause a miss
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """Thread-safe, size-bounded LRU cache of embeddings in a SQLite file."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        touch_interval: float = 60.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Time of the last hit of each entry, not written to the file yet
+        self._touched: Dict[Tuple[str, str, str], float] = {}
+        self._touched_written = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (provider, model, hash)
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS embedding_last_used ON embedding (last_used)"
+        )
+        self._db.commit()
+        self._size = self._stored_bytes()
+
+    def _stored_bytes(self) -> int:
+        row = self._db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embedding")
+        return int(row.fetchone()[0])
+
+    def get_many(
+        self, provider: str, model: str, texts: Sequence[str]
+    ) -> List[Optional[List[float]]]:
+        """The cached vector for each text, or None where there is none."""
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), _CHUNK):
+                chunk = unique[start : start + _CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embedding WHERE provider = ? AND model = ? "
+                    f"AND hash IN ({placeholders})",
+                    [provider, model, *chunk],
+                )
+                found.update(rows.fetchall())
+            for h in found:
+                self._touched[(provider, model, h)] = now
+            if time.monotonic() - self._touched_written >= self.touch_interval:
+                self._write_touched()
+                self._db.commit()
+            hits = sum(1 for h in hashes if h in found)
+            self.hits += hits
+            self.misses += len(hashes) - hits
+        return [unpack_vector(found[h]) if h in found else None for h in hashes]
+
+    def put_many(
+        self,
+        provider: str,
+        model: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        rows = [
+            (provider, model, text_hash(text), pack_vector(vector), time.time())
+            for text, vector in zip(texts, vectors)
+            if vector
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._write_touched()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embedding "
+                "(provider, model, hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            self._size += sum(len(row[3]) for row in rows)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _write_touched(self) -> None:
+        # Called with the lock held; the caller commits
+        self._touched_written = time.monotonic()
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._db.executemany(
+            "UPDATE embedding SET last_used = MAX(last_used, ?) "
+            "WHERE provider = ? AND model = ? AND hash = ?",
+            [(used, *key) for key, used in touched.items()],
+        )
+
+    def _evict(self) -> None:
+        # Other processes write to the same file, so count again before deleting
+        self._size = self._stored_bytes()
+        if self._size <= self.max_bytes:
+            return
+        count = self._db.execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+        if not count:
+            return
+        # Make room for a tenth of the cache, so eviction does not run on every put
+        target = self.max_bytes * 0.9
+        excess = math.ceil((self._size - target) / (self._size / count))
+        deleted = self._db.execute(
+            "DELETE FROM embedding WHERE rowid IN "
+            "(SELECT rowid FROM embedding ORDER BY last_used LIMIT ?)",
+            (excess,),
+        ).rowcount
+        self._db.commit()
+        self.evictions += deleted
+        self._size = self._stored_bytes()
+        logger.debug(f"Evicted {deleted} embeddings from the cache")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._touched.clear()
+            self._db.execute("DELETE FROM embedding")
+            self._db.commit()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_touched()
+            self._db.commit()
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return dict(
+            size_bytes=self._size,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+        )
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """The process-wide cache, or None if EMBEDDING_CACHE is disabled."""
+    global _cache
+    if os.environ.get("EMBEDDING_CACHE", "true").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from open_notebook.config import DATA_FOLDER
+
+                _cache = EmbeddingCache(
+                    os.environ.get(
+                        "EMBEDDING_CACHE_PATH",
+                        f"{DATA_FOLDER}/sqlite-db/embeddings.sqlite",
+                    ),
+                    max_bytes=int(
+                        float(os.environ.get("EMBEDDING_CACHE_MAX_MB", 512)) * 1024 * 1024
+                    ),
+                )
+    return _cache
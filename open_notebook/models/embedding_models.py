@@ -4,16 +4,39 @@ Classes for supporting different embedding models
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
 
-import requests
 from loguru import logger
 from litellm import embedding
 
-# todo: add support for multiple embeddings (array)
+from open_notebook.models.clients import (
+    async_http_client,
+    async_openai_client,
+    credentials_key,
+    http_client,
+    openai_client,
+    shared_client,
+)
+from open_notebook.models.concurrency import (
+    AdaptiveLimiter,
+    awith_retries,
+    with_retries,
+)
+from open_notebook.models.embedding_cache import EmbeddingCache, get_embedding_cache
+from open_notebook.models.local_embeddings import LocalEncoder, local_backend
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for batching, without loading a tokenizer.
+    """
+    return len(text) // 4 + 1
 
 
 @dataclass
@@ -24,52 +47,271 @@ class EmbeddingModel(ABC):
 
     model_name: Optional[str] = None
 
-    @abstractmethod
+    # Most texts a provider accepts in one request; 1 means no batching
+    max_batch_size: ClassVar[int] = 1
+    # Most (estimated) tokens a provider accepts in one request, if limited
+    max_batch_tokens: ClassVar[Optional[int]] = None
+    # Requests in flight to the provider at once, shared by every model of the
+    # provider: the limit starts at initial_concurrency and adapts to latency
+    # and throttling, up to max_concurrency (EMBEDDING_MAX_CONCURRENCY overrides it)
+    initial_concurrency: ClassVar[int] = 2
+    max_concurrency: ClassVar[int] = 16
+
     def embed(self, text: str) -> List[float]:
         """
-        Generates an embedding
+        Generates an embedding, through embed_many and so the embedding cache
+        """
+        return self.embed_many([text])[0]
+
+    def embed_many(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Generates embeddings for texts, in order, with as few requests as the
+        provider allows. batch_size can lower the provider's maximum batch size.
+        Texts already in the embedding cache are not sent.
+        """
+        cache, cached, missing = self._cache_lookup(texts)
+        batches = list(self._batches(missing, batch_size))
+        done: Dict[str, List[float]] = {}
+        try:
+            if len(batches) > 1:
+                with ThreadPoolExecutor(self._limiter().maximum) as pool:
+                    embed = functools.partial(self._embed_resilient, done=done)
+                    list(pool.map(embed, batches))
+            elif batches:
+                self._embed_resilient(batches[0], done)
+        finally:
+            # Whatever was embedded is kept even if some chunks failed, so a
+            # retry only sends those again
+            self._cache_store(cache, done)
+        return [v if v is not None else done[t] for t, v in zip(texts, cached)]
+
+    def _embed_resilient(self, texts: List[str], done: Dict[str, List[float]]) -> None:
+        """
+        Embeds one batch into done, retrying throttling and server errors. If
+        the batch still fails, its texts are retried one at a time, so only the
+        text that keeps failing raises.
+        """
+        limiter, retries = self._limiter(), self._retries()
+        try:
+            done.update(
+                zip(
+                    texts,
+                    with_retries(
+                        limiter, lambda: self._embed_batch(texts), len(texts), retries
+                    ),
+                )
+            )
+            return
+        except Exception as e:
+            if len(texts) == 1:
+                raise
+            logger.warning(
+                f"Batch of {len(texts)} texts failed, embedding them one at a time: {e}"
+            )
+        for text in texts:
+            done[text] = with_retries(
+                limiter, lambda: self._embed_batch([text]), 1, retries
+            )[0]
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds one batch with a single request to the provider
         """
         raise NotImplementedError
 
+    def _cache_lookup(
+        self, texts: List[str]
+    ) -> Tuple[Optional[EmbeddingCache], List[Optional[List[float]]], List[str]]:
+        """
+        Returns the cache, the cached vector (or None) for each text, and the
+        distinct texts that still have to be embedded.
+        """
+        cache = get_embedding_cache() if texts else None
+        cached: List[Optional[List[float]]] = [None] * len(texts)
+        if cache is not None:
+            try:
+                cached = cache.get_many(type(self).__name__, self.model_name or "", texts)
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed, embedding everything: {e}")
+                cache = None
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        return cache, cached, missing
+
+    def _cache_store(
+        self, cache: Optional[EmbeddingCache], embedded: Dict[str, List[float]]
+    ) -> None:
+        if cache is not None and embedded:
+            try:
+                cache.put_many(
+                    type(self).__name__,
+                    self.model_name or "",
+                    list(embedded),
+                    list(embedded.values()),
+                )
+            except Exception as e:
+                logger.warning(f"Could not store embeddings in the cache: {e}")
+
+    async def aembed(self, text: str) -> List[float]:
+        """
+        Generates an embedding without blocking the event loop
+        """
+        return (await self.aembed_many([text]))[0]
+
+    async def aembed_many(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Async embed_many. Batches are sent concurrently, up to the provider's
+        concurrency limit.
+        """
+        cache, cached, missing = self._cache_lookup(texts)
+        done: Dict[str, List[float]] = {}
+        results = await asyncio.gather(
+            *(
+                self._aembed_resilient(batch, done)
+                for batch in self._batches(missing, batch_size)
+            ),
+            return_exceptions=True,
+        )
+        self._cache_store(cache, done)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return [v if v is not None else done[t] for t, v in zip(texts, cached)]
+
+    async def _aembed_resilient(
+        self, texts: List[str], done: Dict[str, List[float]]
+    ) -> None:
+        """
+        Async _embed_resilient.
+        """
+        limiter, retries = self._limiter(), self._retries()
+        try:
+            embeddings = await awith_retries(
+                limiter, lambda: self._aembed_batch(texts), len(texts), retries
+            )
+            done.update(zip(texts, embeddings))
+            return
+        except Exception as e:
+            if len(texts) == 1:
+                raise
+            logger.warning(
+                f"Batch of {len(texts)} texts failed, embedding them one at a time: {e}"
+            )
+        for text in texts:
+            done[text] = (
+                await awith_retries(
+                    limiter, lambda: self._aembed_batch([text]), 1, retries
+                )
+            )[0]
+
+    def _limiter(self) -> AdaptiveLimiter:
+        maximum = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", self.max_concurrency))
+        return shared_client(
+            ("embedding-limiter", type(self)),
+            lambda: AdaptiveLimiter(
+                type(self).__name__, initial=self.initial_concurrency, maximum=maximum
+            ),
+        )
+
+    def _retries(self) -> int:
+        return int(os.environ.get("EMBEDDING_MAX_RETRIES", 5))
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Async _embed_batch. Providers without an async client run the
+        synchronous request in a worker thread.
+        """
+        return await asyncio.to_thread(self._embed_batch, texts)
+
+    def _batches(
+        self, texts: List[str], batch_size: Optional[int]
+    ) -> Iterator[List[str]]:
+        limit = min(batch_size or self.max_batch_size, self.max_batch_size)
+        batch: List[str] = []
+        tokens = 0
+        for text in texts:
+            cost = estimate_tokens(text)
+            if batch and (
+                len(batch) >= limit
+                or (self.max_batch_tokens and tokens + cost > self.max_batch_tokens)
+            ):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(text)
+            tokens += cost
+        if batch:
+            yield batch
+
 
 @dataclass
 class OllamaEmbeddingModel(EmbeddingModel):
     model_name: str
     base_url: str = os.environ.get("OLLAMA_API_BASE", "http://localhost:11434")
 
+    max_batch_size: ClassVar[int] = 256
+    # A local server embeds one batch at a time; more requests only queue up
+    initial_concurrency: ClassVar[int] = 1
+    max_concurrency: ClassVar[int] = 4
+
     def __post_init__(self):
         if self.base_url is None:
             self.base_url = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 
-    def embed(self, text: str) -> List[float]:
-        """
-        Embeds the content using Open AI embedding
-        """
-        text = text.replace("\n", " ")
-        response = requests.post(
-            f"{self.base_url}/api/embed",
-            json={"model": self.model_name, "input": [text]},
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = http_client(self.base_url).post(
+            "/api/embed",
+            json={
+                "model": self.model_name,
+                "input": [text.replace("\n", " ") for text in texts],
+            },
         )
-        return response.json()["embeddings"][0]
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = await async_http_client(self.base_url).post(
+            "/api/embed",
+            json={
+                "model": self.model_name,
+                "input": [text.replace("\n", " ") for text in texts],
+            },
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
 
 
 @dataclass
 class GeminiEmbeddingModel(EmbeddingModel):
     model_name: str
 
-    def embed(self, text: str) -> List[float]:
-        import google.generativeai as genai
+    # batchEmbedContents takes at most 100 requests
+    max_batch_size: ClassVar[int] = 100
+    initial_concurrency: ClassVar[int] = 4
 
-        """
-        Embeds the content using Open AI embedding
-        """
-        model_name = (
+    def _qualified_name(self) -> str:
+        return (
             self.model_name
             if self.model_name.startswith("models/")
             else f"models/{self.model_name}"
         )
-        result = genai.embed_content(model=model_name, content=text)
 
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        import google.generativeai as genai
+
+        # A list of contents is sent as one batch request
+        result = genai.embed_content(model=self._qualified_name(), content=texts)
+        return result["embedding"]
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        import google.generativeai as genai
+
+        result = await genai.embed_content_async(
+            model=self._qualified_name(), content=texts
+        )
         return result["embedding"]
 
 
@@ -77,31 +319,45 @@ class GeminiEmbeddingModel(EmbeddingModel):
 class VertexEmbeddingModel(EmbeddingModel):
     model_name: str = "textembedding-gecko@001"
 
-    def embed(self, text: str) -> List[float]:
+    max_batch_size: ClassVar[int] = 250
+    max_batch_tokens: ClassVar[Optional[int]] = 20000
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # The task type embed_query uses, so stored and query vectors match
+        return self._client().embed(
+            texts, batch_size=len(texts), embeddings_task_type="RETRIEVAL_QUERY"
+        )
+
+    def _client(self):
         from langchain_google_vertexai import VertexAIEmbeddings
 
-        client = VertexAIEmbeddings(model_name=self.model_name)
-        return client.embed_query(text)
+        # Credentials come from the environment's application default credentials
+        return shared_client(
+            ("vertex-embeddings", self.model_name),
+            lambda: VertexAIEmbeddings(model_name=self.model_name),
+        )
 
 
 @dataclass
 class OpenAIEmbeddingModel(EmbeddingModel):
     model_name: str = "text-embedding-ada-002"
 
-    def embed(self, text: str) -> List[float]:
-        from openai import OpenAI
+    max_batch_size: ClassVar[int] = 2048
+    max_batch_tokens: ClassVar[Optional[int]] = 300000
+    initial_concurrency: ClassVar[int] = 8
+    max_concurrency: ClassVar[int] = 64
 
-        """
-        Embeds the content using Open AI embedding
-        """
-        # todo: make this Singleton
-        client = OpenAI()
-        text = text.replace("\n", " ")
-        return (
-            client.embeddings.create(input=[text], model=self.model_name)
-            .data[0]
-            .embedding
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = openai_client().embeddings.create(
+            input=[text.replace("\n", " ") for text in texts], model=self.model_name
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = await async_openai_client().embeddings.create(
+            input=[text.replace("\n", " ") for text in texts], model=self.model_name
         )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
 
 
 @dataclass
@@ -116,10 +372,30 @@ class LMStudioEmbeddingModel(EmbeddingModel):
 
     model_name: str  # This will be the model identifier from LM Studio.
 
-    def embed(self, text: str) -> List[float]:
-        """
-        Generates an embedding using an LM Studio model via LiteLLM.
-        """
+    max_batch_size: ClassVar[int] = 256
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        try:
+            response = embedding(input=texts, **self._litellm_kwargs())
+            logger.debug(f"Raw response from LM Studio embedding: {response}")
+        except Exception as e:
+            logger.error(f"Error during litellm.embedding call for LM Studio: {e}")
+            # You might want to reraise or handle specific LiteLLM exceptions here
+            raise
+        return self._parse_response(response, texts)
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        from litellm import aembedding
+
+        try:
+            response = await aembedding(input=texts, **self._litellm_kwargs())
+            logger.debug(f"Raw response from LM Studio embedding: {response}")
+        except Exception as e:
+            logger.error(f"Error during litellm.aembedding call for LM Studio: {e}")
+            raise
+        return self._parse_response(response, texts)
+
+    def _litellm_kwargs(self) -> Dict[str, Any]:
         api_base_url = os.environ.get("LM_STUDIO_API_BASE")
         if not api_base_url:
             logger.error("LM_STUDIO_API_BASE environment variable not set.")
@@ -141,30 +417,27 @@ class LMStudioEmbeddingModel(EmbeddingModel):
         qualified_model_name = f"openai/{self.model_name}"
 
         logger.info(f"Attempting LM Studio embedding with model='{qualified_model_name}', api_base='{api_base_url}'")
-        
-        try:
-            response = embedding(
-                model=qualified_model_name, # Use openai/ prefix
-                input=[text],
-                api_base=api_base_url,
-                api_key=api_key_to_use
-            )
-            logger.debug(f"Raw response from LM Studio embedding: {response}")
-        except Exception as e:
-            logger.error(f"Error during litellm.embedding call for LM Studio: {e}")
-            # You might want to reraise or handle specific LiteLLM exceptions here
-            raise
 
+        return dict(
+            model=qualified_model_name, # Use openai/ prefix
+            api_base=api_base_url,
+            api_key=api_key_to_use
+        )
+
+    def _parse_response(self, response: Any, texts: List[str]) -> List[List[float]]:
         # According to LiteLLM documentation, the response object for embeddings has a 'data' attribute,
         # which is a list of objects, each having an 'embedding' attribute.
-        if response and hasattr(response, 'data') and response.data and len(response.data) > 0:
-            first_embedding_object = response.data[0]
-            if hasattr(first_embedding_object, "embedding") and isinstance(first_embedding_object.embedding, list):
-                return first_embedding_object.embedding
-            # Sometimes, the embedding might be directly in first_embedding_object if it's a dict (less common for new versions)
-            elif isinstance(first_embedding_object, dict) and "embedding" in first_embedding_object and isinstance(first_embedding_object["embedding"], list):
-                 return first_embedding_object["embedding"]
-        
+        if response and hasattr(response, 'data') and response.data and len(response.data) == len(texts):
+            embeddings = []
+            for embedding_object in response.data:
+                if hasattr(embedding_object, "embedding") and isinstance(embedding_object.embedding, list):
+                    embeddings.append(embedding_object.embedding)
+                # Sometimes, the embedding might be directly in embedding_object if it's a dict (less common for new versions)
+                elif isinstance(embedding_object, dict) and "embedding" in embedding_object and isinstance(embedding_object["embedding"], list):
+                    embeddings.append(embedding_object["embedding"])
+            if len(embeddings) == len(texts):
+                return embeddings
+
         logger.error(f"Failed to extract embedding from LM Studio response. Response structure not as expected: {response}")
         raise ValueError(f"Failed to extract embedding from LM Studio response. Unexpected data format or empty response: {response}")
 
@@ -178,10 +451,16 @@ class HFInferenceEmbeddingModel(EmbeddingModel):
 
     model_name: str  # This will be the Hugging Face model ID, e.g., "sentence-transformers/all-MiniLM-L6-v2"
 
-    def embed(self, text: str) -> List[float]:
-        """
-        Generates an embedding using a Hugging Face Inference API model.
-        """
+    max_batch_size: ClassVar[int] = 32
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # One feature-extraction request for the whole batch
+        return self._client().embed_documents(texts)
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await self._client().aembed_documents(texts)
+
+    def _client(self):
         from langchain_huggingface import HuggingFaceEndpointEmbeddings
         import os
 
@@ -189,8 +468,42 @@ class HFInferenceEmbeddingModel(EmbeddingModel):
         if not api_key:
             raise ValueError("HF_API_KEY or HUGGING_FACE_HUB_TOKEN environment variable not set.")
 
-        client = HuggingFaceEndpointEmbeddings(
-            huggingfacehub_api_token=api_key,
-            model=self.model_name
+        return shared_client(
+            ("hf-embeddings", self.model_name, credentials_key(api_key)),
+            lambda: HuggingFaceEndpointEmbeddings(
+                huggingfacehub_api_token=api_key,
+                model=self.model_name
+            ),
+        )
+
+
+@dataclass
+class LocalEmbeddingModel(EmbeddingModel):
+    """
+    Embedding model run in this process on the CPU with sentence-transformers,
+    so ingestion needs no network round trip per chunk. model_name is a
+    sentence-transformers model id or a local path; LOCAL_EMBEDDING_BACKEND=onnx
+    runs its ONNX export with ONNX Runtime instead of the PyTorch weights.
+    """
+
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+
+    max_batch_size: ClassVar[int] = 256
+    # Concurrent batches are merged again by the encoder's batcher, so a few
+    # in flight keep it fed without competing for the cores
+    initial_concurrency: ClassVar[int] = 4
+    max_concurrency: ClassVar[int] = 8
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._encoder().encode(texts)
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        # Waits for the batcher without holding a worker thread
+        return await asyncio.wrap_future(self._encoder().submit(texts))
+
+    def _encoder(self) -> LocalEncoder:
+        backend = local_backend()
+        return shared_client(
+            ("local-embeddings", self.model_name, backend),
+            lambda: LocalEncoder.from_env(self.model_name, backend),
         )
-        return client.embed_query(text)
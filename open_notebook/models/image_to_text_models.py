@@ -5,6 +5,7 @@ import os
 from typing import List, Dict, Any, Optional
 
 from open_notebook.models.base import BaseModel
+from open_notebook.models.clients import http_client
 
 class ImageToTextModel(BaseModel, ABC):
     """Abstract base class for image-to-text models."""
@@ -67,9 +68,8 @@ class OpenrouterImageToTextModel(ImageToTextModel):
         }
 
         try:
-            with httpx.Client() as client:
-                response = client.post(self.api_url, headers=headers, json=payload)
-                response.raise_for_status()  # Raise an exception for bad status codes
+            response = http_client().post(self.api_url, headers=headers, json=payload)
+            response.raise_for_status()  # Raise an exception for bad status codes
             
             response_data = response.json()
             
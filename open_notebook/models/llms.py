@@ -2,10 +2,12 @@
 Classes for supporting different language models
 """
 
+import asyncio
+import functools
 import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from dataclasses import astuple, dataclass, field
+from typing import Any, ClassVar, Dict, Optional, Tuple
 
 from langchain_anthropic import ChatAnthropic
 from langchain_community.chat_models import ChatLiteLLM
@@ -20,6 +22,7 @@ from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
 from pydantic import SecretStr
 from loguru import logger
 from open_notebook.config import CONFIG
+from open_notebook.models.clients import env_credentials, loop_shared, shared_client
 
 # future: is there a value on returning langchain specific models?
 
@@ -38,6 +41,36 @@ class LanguageModel(ABC):
     kwargs: Dict[str, Any] = field(default_factory=dict)
     json: bool = False
 
+    # Environment variables the provider's client reads its credentials and
+    # endpoint from; a change to any of them gets a new client
+    credential_env: ClassVar[Tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # LangChain chat models hold the provider's HTTP connection pool, so the
+        # one built for a given configuration is kept and handed out again
+        build = cls.__dict__.get("to_langchain")
+        if build is None or getattr(build, "_shared", False):
+            return
+
+        @functools.wraps(build)
+        def to_langchain(self) -> BaseChatModel:
+            key = (
+                "langchain",
+                type(self),
+                repr(astuple(self)),
+                env_credentials(*self.credential_env),
+            )
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return shared_client(key, lambda: build(self))
+            # Async clients are bound to the event loop they were made on
+            return loop_shared(key, lambda: build(self))
+
+        to_langchain._shared = True  # type: ignore[attr-defined]
+        cls.to_langchain = to_langchain  # type: ignore[method-assign]
+
     @abstractmethod
     def to_langchain(self) -> BaseChatModel:
         """
@@ -57,6 +90,8 @@ class OllamaLanguageModel(LanguageModel):
     max_tokens: Optional[int] = 650
     json: bool = False
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("OLLAMA_API_BASE",)
+
     def to_langchain(self) -> ChatOllama:
         """
         Convert the language model to a LangChain chat model.
@@ -83,6 +118,8 @@ class VertexAnthropicLanguageModel(LanguageModel):
     project: Optional[str] = os.environ.get("VERTEX_PROJECT", "no-project")
     location: Optional[str] = os.environ.get("VERTEX_LOCATION", "us-central1")
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("GOOGLE_APPLICATION_CREDENTIALS",)
+
     def to_langchain(self) -> ChatAnthropicVertex:
         """
         Convert the language model to a LangChain chat model.
@@ -130,6 +167,8 @@ class VertexAILanguageModel(LanguageModel):
     project: Optional[str] = os.environ.get("VERTEX_PROJECT", "no-project")
     location: Optional[str] = os.environ.get("VERTEX_LOCATION", "us-central1")
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("GOOGLE_APPLICATION_CREDENTIALS",)
+
     def to_langchain(self) -> ChatVertexAI:
         """
         Convert the language model to a LangChain chat model.
@@ -154,6 +193,8 @@ class GeminiLanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("GOOGLE_API_KEY",)
+
     def to_langchain(self) -> ChatGoogleGenerativeAI:
         """
         Convert the language model to a LangChain chat model.
@@ -173,11 +214,16 @@ class OpenRouterLanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = (
+        "OPENROUTER_API_KEY",
+        "OPENROUTER_BASE_URL",
+    )
+
     def to_langchain(self) -> ChatOpenAI:
         """
         Convert the language model to a LangChain chat model for Open Router.
         """
-        kwargs = self.kwargs
+        kwargs = self.kwargs.copy()
         if self.json:
             kwargs["response_format"] = {"type": "json_object"}
         
@@ -205,11 +251,13 @@ class GroqLanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("GROQ_API_KEY", "GROQ_API_BASE")
+
     def to_langchain(self) -> ChatGroq:
         """
         Convert the language model to a LangChain chat model for Groq.
         """
-        kwargs = self.kwargs
+        kwargs = self.kwargs.copy()
         kwargs["top_p"] = self.top_p
 
         return ChatGroq(
@@ -229,11 +277,13 @@ class XAILanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = ("XAI_API_KEY", "XAI_BASE_URL")
+
     def to_langchain(self) -> ChatOpenAI:
         """
         Convert the language model to a LangChain chat model.
         """
-        kwargs = self.kwargs
+        kwargs = self.kwargs.copy()
         if self.json:
             kwargs["response_format"] = {"type": "json_object"}
 
@@ -257,6 +307,11 @@ class AnthropicLanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = (
+        "ANTHROPIC_API_KEY",
+        "ANTHROPIC_API_URL",
+    )
+
     def to_langchain(self) -> ChatAnthropic:
         """
         Convert the language model to a LangChain chat model.
@@ -280,6 +335,12 @@ class OpenAILanguageModel(LanguageModel):
 
     model_name: str
 
+    credential_env: ClassVar[Tuple[str, ...]] = (
+        "OPENAI_API_KEY",
+        "OPENAI_API_BASE",
+        "OPENAI_ORGANIZATION",
+    )
+
     def to_langchain(self) -> ChatOpenAI:
         """
         Convert the language model to a LangChain chat model.
@@ -307,6 +368,11 @@ class LMStudioLanguageModel(LanguageModel):
 
     model_name: str  # This will be the model identifier within LM Studio, e.g., "llama-3-8b-instruct"
 
+    credential_env: ClassVar[Tuple[str, ...]] = (
+        "LM_STUDIO_API_BASE",
+        "LM_STUDIO_API_KEY",
+    )
+
     def to_langchain(self) -> ChatLiteLLM:
         """
         Convert the language model to a LangChain chat model for LM Studio.
@@ -337,6 +403,11 @@ class HFInferenceLanguageModel(LanguageModel):
     # It's better to set it to False for now or handle it carefully if a specific model supports it.
     streaming: bool = False # Default to False for HF Inference API general use
 
+    credential_env: ClassVar[Tuple[str, ...]] = (
+        "HF_API_KEY",
+        "HUGGING_FACE_HUB_TOKEN",
+    )
+
     def to_langchain(self) -> BaseChatModel:
         """
         Convert the language model to a LangChain chat model for Hugging Face Inference API.
@@ -0,0 +1,240 @@
+"""
+In-process embedding inference on the CPU, for LocalEmbeddingModel.
+
+A sentence-transformers model (its PyTorch weights, or its ONNX export run by
+ONNX Runtime) is loaded once per process and shared by every caller. Requests
+go through a dynamic batcher: texts submitted by concurrent callers within
+LOCAL_EMBEDDING_BATCH_WAIT_MS are run as one inference call, which
+sentence-transformers splits into length-sorted micro-batches to keep padding
+low. Inference uses LOCAL_EMBEDDING_THREADS cores; with
+LOCAL_EMBEDDING_PROCESSES > 0 batches run in a pool of worker processes
+instead, each with its own copy of the model and a share of the threads.
+
+The model libraries are only imported when a model is loaded.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    InvalidStateError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+ModelKey = Tuple[str, str]
+
+# Models loaded in this process, by (model name, backend)
+_models: Dict[ModelKey, Any] = {}
+_models_lock = threading.Lock()
+
+
+def _load(key: ModelKey, threads: int) -> Any:
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            try:
+                import torch
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "Local embeddings need sentence-transformers "
+                    "(pip install 'sentence-transformers[onnx]')"
+                ) from e
+            if threads:
+                torch.set_num_threads(threads)
+            model_name, backend = key
+            started = time.monotonic()
+            model = _models[key] = SentenceTransformer(
+                model_name, device="cpu", backend=backend
+            )
+            logger.info(
+                f"Loaded local embedding model {model_name} ({backend}) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+    return model
+
+
+def _encode(
+    key: ModelKey, threads: int, batch_size: int, texts: List[str]
+) -> List[List[float]]:
+    # Runs in a worker process or in the encoder's inference thread
+    return (
+        _load(key, threads)
+        .encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        .tolist()
+    )
+
+
+def _settings() -> Dict[str, int]:
+    return dict(
+        threads=int(os.environ.get("LOCAL_EMBEDDING_THREADS", os.cpu_count() or 1)),
+        processes=int(os.environ.get("LOCAL_EMBEDDING_PROCESSES", 0)),
+        batch_size=int(os.environ.get("LOCAL_EMBEDDING_BATCH_SIZE", 32)),
+        max_batch=int(os.environ.get("LOCAL_EMBEDDING_MAX_BATCH", 256)),
+        wait_ms=int(os.environ.get("LOCAL_EMBEDDING_BATCH_WAIT_MS", 5)),
+    )
+
+
+def _settle(
+    future: Future, result: Any = None, error: Optional[BaseException] = None
+) -> None:
+    # One caller's future must not stop the others of the batch from getting
+    # their results
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass  # Settled since the check
+
+
+class LocalEncoder:
+    """Dynamic batcher in front of one local model."""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        threads: int = 1,
+        processes: int = 0,
+        batch_size: int = 32,
+        max_batch: int = 256,
+        wait_ms: int = 5,
+    ):
+        self.key: ModelKey = (model_name, backend)
+        self.batch_size = max(batch_size, 1)
+        self.max_batch = max(max_batch, 1)
+        self.wait = wait_ms / 1000
+        self.processes = max(processes, 0)
+        self.threads = (
+            max(threads // self.processes, 1) if self.processes else max(threads, 1)
+        )
+        self.batches = 0
+        self.texts = 0
+        self._executor: Executor
+        if self.processes:
+            # Forking a process that already runs inference threads can deadlock
+            self._executor = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                1, thread_name_prefix="local-embeddings"
+            )
+        # Batches running at once: one per worker process
+        self._slots = threading.Semaphore(max(self.processes, 1))
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run, name="local-embedding-batcher", daemon=True
+        )
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls, model_name: str, backend: str) -> "LocalEncoder":
+        return cls(model_name, backend, **_settings())
+
+    def submit(self, texts: List[str]) -> "Future[List[List[float]]]":
+        future: "Future[List[List[float]]]" = Future()
+        if not texts:
+            future.set_result([])
+        else:
+            self._queue.put((texts, future))
+        return future
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    def _run(self) -> None:
+        held = None
+        while True:
+            requests = [held or self._queue.get()]
+            held = None
+            size = len(requests[0][0])
+            # Wait briefly for other callers, up to a full batch
+            deadline = time.monotonic() + self.wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if size + len(request[0]) > self.max_batch:
+                    # Starts the next batch instead
+                    held = request
+                    break
+                requests.append(request)
+                size += len(request[0])
+
+            # Callers that gave up (e.g. a cancelled asyncio.wrap_future) drop
+            # out; the others can no longer be cancelled
+            requests = [
+                (texts, future)
+                for texts, future in requests
+                if future.set_running_or_notify_cancel()
+            ]
+            if not requests:
+                continue
+            self._slots.acquire()
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                result = self._executor.submit(
+                    _encode, self.key, self.threads, self.batch_size, texts
+                )
+            except Exception as e:
+                self._slots.release()
+                for _, future in requests:
+                    _settle(future, error=e)
+                continue
+            result.add_done_callback(
+                lambda done, requests=requests: self._deliver(requests, done)
+            )
+
+    def _deliver(
+        self, requests: List[Tuple[List[str], Future]], result: Future
+    ) -> None:
+        self._slots.release()
+        error = result.exception()
+        if error is not None:
+            for _, future in requests:
+                _settle(future, error=error)
+            return
+        vectors = result.result()
+        self.batches += 1
+        self.texts += len(vectors)
+        start = 0
+        for texts, future in requests:
+            _settle(future, vectors[start : start + len(texts)])
+            start += len(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            model=self.key[0],
+            backend=self.key[1],
+            processes=self.processes,
+            threads=self.threads,
+            batches=self.batches,
+            texts=self.texts,
+            queued=self._queue.qsize(),
+        )
+
+
+def local_backend() -> str:
+    backend = os.environ.get("LOCAL_EMBEDDING_BACKEND", "torch").lower()
+    return backend if backend in ("torch", "onnx") else "torch"
+
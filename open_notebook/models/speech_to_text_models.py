@@ -10,6 +10,8 @@ import os
 from huggingface_hub import InferenceClient
 from loguru import logger # Add logger import
 
+from open_notebook.models.clients import groq_client, openai_client
+
 
 @dataclass
 class SpeechToTextModel(ABC):
@@ -35,10 +37,7 @@ class OpenAISpeechToTextModel(SpeechToTextModel):
         """
         Transcribes an audio file into text
         """
-        from openai import OpenAI
-
-        # todo: make this Singleton
-        client = OpenAI()
+        client = openai_client()
         with open(audio_file_path, "rb") as audio:
             transcription = client.audio.transcriptions.create(
                 model=self.model_name, file=audio
@@ -54,10 +53,7 @@ class GroqSpeechToTextModel(SpeechToTextModel):
         """
         Transcribes an audio file into text
         """
-        from groq import Groq
-
-        # todo: make this Singleton
-        client = Groq()
+        client = groq_client()
         with open(audio_file_path, "rb") as audio:
             transcription = client.audio.transcriptions.create(
                 model=self.model_name, file=audio
@@ -0,0 +1,297 @@
+"""
+Re-embedding of the stored vectors when the default embedding model changes.
+
+Vectors from two models cannot be compared, so search keeps using the serving
+model (EmbeddingState.serving_model) and the vectors it made while this job
+fills the shadow field next_embedding of every row with the new model, in
+throttled batches. Each batch is written together with the model that made
+it, so rows already done drop out of the next query: a job that stopped or
+crashed resumes where it left off. Once every row has a new vector, one
+transaction moves next_embedding into embedding on all tables and makes the
+new model the serving one.
+
+Rows written by the application during the run are embedded with the serving
+model and have their next_embedding cleared, so the job picks them up again.
+Other processes may go on writing with the old model until they read the
+state again (EMBEDDING_STATE_TTL), so the job waits that long after the switch
+before it re-embeds what was written with the old model meanwhile.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.database.repository import (
+    records_written,
+    repo_merge_many,
+    repo_query,
+)
+from open_notebook.database.vectors import vector_fields
+from open_notebook.domain.models import (
+    DefaultModels,
+    EmbeddingState,
+    embedding_state_ttl,
+    model_manager,
+)
+
+TABLES = ("source_embedding", "source_insight", "note")
+
+_job: Optional[threading.Thread] = None
+_job_lock = threading.Lock()
+
+
+def _batch_size() -> int:
+    return max(int(os.environ.get("EMBEDDING_MIGRATION_BATCH_SIZE", 256)), 1)
+
+
+def _pause() -> float:
+    return float(os.environ.get("EMBEDDING_MIGRATION_PAUSE_MS", 0)) / 1000
+
+
+_EMBEDDED = 'embedding != NONE AND content != NONE AND content != ""'
+
+
+def _pending_query(table: str, field: str) -> str:
+    return f"""
+        SELECT id, content FROM {table}
+        WHERE {_EMBEDDED} AND {field}_model != $target
+        LIMIT $limit;
+    """
+
+
+def _count(table: str, where: str, vars: Optional[Dict[str, Any]] = None) -> int:
+    result = repo_query(
+        f"SELECT count() FROM {table} WHERE {where} GROUP ALL;", vars, read_only=False
+    )
+    return result[0]["count"] if result else 0
+
+
+def _switch_query() -> str:
+    statements = [
+        f"""
+        UPDATE {table} SET
+            embedding = next_embedding,
+            embedding_packed = next_embedding_packed,
+            embedding_model = next_embedding_model,
+            next_embedding = NONE,
+            next_embedding_packed = NONE,
+            next_embedding_model = NONE
+        WHERE next_embedding_model = $target RETURN NONE;
+        """
+        for table in TABLES
+    ]
+    return (
+        "BEGIN TRANSACTION;\n"
+        + "".join(statements)
+        + f"UPSERT {EmbeddingState.record_id} MERGE $state RETURN NONE;\n"
+        + "COMMIT TRANSACTION;"
+    )
+
+
+def _target_model_id() -> Optional[str]:
+    # Read again on every batch: the default may be changed while the job runs,
+    # possibly from another process
+    DefaultModels.clear_instance()
+    model_manager.refresh_defaults()
+    return model_manager.defaults.default_embedding_model
+
+
+def _save(state: EmbeddingState, **fields: Any) -> None:
+    for name, value in fields.items():
+        setattr(state, name, value)
+    state.update()
+
+
+def _stored_model() -> Optional[str]:
+    for table in TABLES:
+        rows = repo_query(
+            f"SELECT embedding_model FROM {table} WHERE embedding_model != NONE LIMIT 1;",
+            read_only=False,
+        )
+        if rows:
+            return rows[0]["embedding_model"]
+    return None
+
+
+def pin_serving_model() -> Optional[str]:
+    """
+    Records the serving model if none is recorded yet: the model the stored
+    vectors were made with, or the default embedding model if there are none.
+    From then on, a change of the default is a migration.
+    """
+    state = model_manager.embedding_state
+    if state.serving_model:
+        return state.serving_model
+    serving = _stored_model() or _target_model_id()
+    if serving:
+        _save(state, serving_model=serving)
+    return serving
+
+
+def _embed_table(
+    table: str,
+    model: Any,
+    target: str,
+    state: EmbeddingState,
+    stop: threading.Event,
+    field: str = "next_embedding",
+) -> bool:
+    """
+    Writes vectors made by model into field of the table's rows that do not
+    have one from it yet, batch by batch. Returns False if the job was
+    stopped or the default model changed before it finished.
+    """
+    batch_size, pause = _batch_size(), _pause()
+    while not stop.is_set():
+        if _target_model_id() != target:
+            return False
+        rows: List[Dict[str, Any]] = (
+            repo_query(
+                _pending_query(table, field),
+                {"target": target, "limit": batch_size},
+                read_only=False,
+            )
+            or []
+        )
+        if not rows:
+            return True
+        embeddings = model.embed_many([row["content"] for row in rows])
+        repo_merge_many(
+            {
+                row["id"]: {
+                    **vector_fields(embedding, field, merge=True),
+                    f"{field}_model": target,
+                }
+                for row, embedding in zip(rows, embeddings)
+            }
+        )
+        state.done = {**state.done, table: state.done.get(table, 0) + len(rows)}
+        state.update()
+        if pause:
+            stop.wait(pause)
+    return False
+
+
+def _catch_up(
+    model: Any, target: str, state: EmbeddingState, stop: threading.Event
+) -> bool:
+    # Rows written with the old model while the switch was being made
+    for table in TABLES:
+        if not _embed_table(table, model, target, state, stop, field="embedding"):
+            return False
+        # Left behind by an earlier run towards another model
+        repo_query(
+            f"""
+            UPDATE {table} SET
+                next_embedding = NONE,
+                next_embedding_packed = NONE,
+                next_embedding_model = NONE
+            WHERE next_embedding_model != NONE RETURN NONE;
+            """
+        )
+    _save(state, status="complete", error=None)
+    return True
+
+
+def _switch(target: str) -> EmbeddingState:
+    repo_query(
+        _switch_query(),
+        {
+            "target": target,
+            "state": {"serving_model": target, "target_model": None, "error": None},
+        },
+    )
+    # Cached records still hold the vectors and model from before the switch
+    records_written()
+    EmbeddingState.clear_instance()
+    return model_manager.embedding_state
+
+
+def run_embedding_migration(stop: Optional[threading.Event] = None) -> EmbeddingState:
+    """
+    Re-embeds every stored vector with the default embedding model and switches
+    search over to it. Safe to run again after a failure or stop: work already
+    written is kept.
+    """
+    stop = stop or threading.Event()
+    serving = pin_serving_model()
+    state = model_manager.embedding_state
+    target = _target_model_id()
+    if not target or (target == serving and state.status not in ("running", "failed")):
+        return state
+
+    model = model_manager.get_model(target)
+    started = time.monotonic()
+    try:
+        if target != serving:
+            logger.info(f"Re-embedding stored vectors from {serving} to {target}")
+            total = {table: _count(table, _EMBEDDED) for table in TABLES}
+            done = {
+                table: _count(table, "next_embedding_model = $target", {"target": target})
+                for table in TABLES
+            }
+            _save(
+                state,
+                target_model=target,
+                status="running",
+                total=total,
+                done=done,
+                error=None,
+            )
+            for table in TABLES:
+                if not _embed_table(table, model, target, state, stop):
+                    logger.info("Re-embedding stopped; the next run resumes it")
+                    return state
+            # Search moves to the new vectors and model in the same transaction
+            state = _switch(target)
+            stop.wait(embedding_state_ttl())
+        else:
+            # Switched over before, but the catch-up did not finish
+            _save(state, status="running", error=None)
+
+        if _catch_up(model, target, state, stop):
+            logger.info(
+                f"Re-embedded {sum(state.done.values())} vectors with {target} "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        return state
+    except Exception as e:
+        logger.error(f"Re-embedding with {target} failed: {str(e)}")
+        logger.exception(e)
+        _save(state, status="failed", error=str(e))
+        raise
+
+
+def _run_in_background() -> None:
+    try:
+        run_embedding_migration()
+    except Exception:
+        pass  # Logged and recorded in the state; the next start resumes it
+
+
+def start_embedding_migration() -> bool:
+    """
+    Starts the re-embedding job in a background thread if the default embedding
+    model differs from the serving one, or a previous run did not finish.
+    Returns whether a job is running in this process.
+    """
+    global _job
+    with _job_lock:
+        if _job is not None and _job.is_alive():
+            return True
+        serving = pin_serving_model()
+        state = model_manager.embedding_state
+        if _target_model_id() == serving and state.status != "running":
+            return False
+        _job = threading.Thread(
+            target=_run_in_background, name="embedding-migration", daemon=True
+        )
+        _job.start()
+        return True
+
+
+if __name__ == "__main__":
+    run_embedding_migration()
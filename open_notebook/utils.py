@@ -43,6 +43,18 @@ def token_cost(token_count, cost_per_million=0.150) -> float:
     return cost_per_million * (token_count / 1_000_000)
 
 
+CHUNK_OVERLAP_RATIO = 0.15
+
+
+def chunker_id(chunk_size=500) -> str:
+    """
+    Identifies how split_text chunks text, stored next to each embedded chunk.
+    Chunks stored under a different id have different boundaries and can't be
+    matched against freshly split ones.
+    """
+    return f"recursive-tokens:{chunk_size}:{int(chunk_size * CHUNK_OVERLAP_RATIO)}"
+
+
 def split_text(txt: str, chunk_size=500):
     """
     Split the input text into chunks.
@@ -56,7 +68,7 @@ def split_text(txt: str, chunk_size=500):
     Returns:
         list: A list of text chunks.
     """
-    overlap = int(chunk_size * 0.15)
+    overlap = int(chunk_size * CHUNK_OVERLAP_RATIO)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=overlap,
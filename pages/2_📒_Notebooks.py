@@ -82,8 +82,11 @@ def notebook_page(current_notebook: Notebook):
     # Pre-populate context_config for notes with default "🟢 full content"
     # if they aren't already set (e.g., from query_params on a previous run).
     # This ensures build_context, called soon after, sees the intended default.
+    # Sources with insight lists and notes for the whole page, loaded up front
+    graph = current_notebook.load_graph(include=["sources.insights", "notes"])
+
     default_note_status = note_context_icons[1]  # "🟢 full content"
-    for note_item in current_notebook.notes:
+    for note_item in graph.notes:
         if note_item.id not in st.session_state[current_notebook.id]["context_config"]:
             st.session_state[current_notebook.id]["context_config"][note_item.id] = default_note_status
             # The note_card will later ensure query_params are also set to this default if needed,
@@ -105,7 +108,7 @@ def notebook_page(current_notebook: Notebook):
     with st.container(border=True):
         if st.button("Add Source", icon="➕"):
             add_source(current_notebook.id)
-        sources = current_notebook.sources
+        sources = graph.sources
         if not sources:
             st.info("No sources here yet. Time to add some knowledge!", icon="💡")
         for source in sources:
@@ -116,7 +119,7 @@ def notebook_page(current_notebook: Notebook):
     with st.container(border=True):
         if st.button("Write a Note", icon="📝"):
             add_note(current_notebook.id)
-        notes = current_notebook.notes
+        notes = graph.notes
         if not notes:
             st.info("This notebook is looking a bit empty. Jot down some notes!", icon="✍️")
         for note in notes:
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 from typing import Dict, List
 
@@ -6,6 +7,7 @@ import streamlit as st
 from open_notebook.config import CONFIG
 from open_notebook.domain.models import DefaultModels, Model, model_manager
 from open_notebook.models import MODEL_CLASS_MAP, ImageToTextModel
+from open_notebook.services.embedding_migration import start_embedding_migration
 from pages.components.model_selector import model_selector
 from pages.stream_app.utils import setup_page
 
@@ -50,6 +52,8 @@ provider_status["anthropic"] = os.environ.get("ANTHROPIC_API_KEY") is not None
 provider_status["elevenlabs"] = os.environ.get("ELEVENLABS_API_KEY") is not None
 provider_status["lmstudio"] = os.environ.get("LM_STUDIO_API_BASE") is not None
 provider_status["huggingface"] = os.environ.get("HF_API_KEY") is not None
+# Runs in this process, so it only needs the library
+provider_status["local"] = importlib.util.find_spec("sentence_transformers") is not None
 provider_status["litellm"] = (
     provider_status["ollama"]
     or provider_status["vertexai"]
@@ -331,9 +335,24 @@ with model_defaults_tab:
     )
     if selected_embedding_model:
         default_models.default_embedding_model = selected_embedding_model.id
-    st.warning(
-        "Caution: you cannot change the embedding model once there is embeddings or they will need to be regenerated"
+    st.caption(
+        "Changing it re-embeds everything already stored in the background. "
+        "Search keeps using the current model until all vectors are ready."
     )
+    embedding_state = model_manager.embedding_state
+    if embedding_state.status == "running":
+        # Picks the job up again if the app was restarted while it ran
+        start_embedding_migration()
+        done, total = sum(embedding_state.done.values()), sum(embedding_state.total.values())
+        st.progress(
+            min(done / total, 1.0) if total else 0.0,
+            text=f"Re-embedding with {embedding_state.target_model or embedding_state.serving_model}: {done}/{total}",
+        )
+    elif embedding_state.status == "failed":
+        st.error(
+            f"Re-embedding stopped: {embedding_state.error}. "
+            "Save the defaults again to resume it."
+        )
     st.divider()
 
     # Handle Image-to-Text model selection
@@ -378,5 +397,6 @@ with model_defaults_tab:
         default_models.patch(defs)
         model_manager.refresh_defaults()
         model_manager.clear_cache()
+        start_embedding_migration()
         st.success("Default models saved!")
         st.rerun()
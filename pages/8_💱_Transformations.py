@@ -187,10 +187,12 @@ def aggregate_notebook_content(notebook: Notebook, source_config: dict) -> str:
     Notes are always included with 'Full Content'.
     """
     aggregated_texts = []
+    # Insights and note contents for the whole notebook in a fixed number of queries
+    graph = notebook.load_graph(include=["sources.insights", "notes.content"])
 
     # Process Sources
-    if notebook.sources:
-        for source in notebook.sources:
+    if graph.sources:
+        for source in graph.sources:
             selection = source_config.get(str(source.id), "Not in Context") 
             
             text_to_add = None
@@ -218,8 +220,8 @@ def aggregate_notebook_content(notebook: Notebook, source_config: dict) -> str:
                 aggregated_texts.append(f"--- Source: {source_title_for_header} ({selection}) ---\n{text_to_add}")
 
     # Process Notes (always full content)
-    if notebook.notes:
-        for note in notebook.notes:
+    if graph.notes:
+        for note in graph.notes:
             note_content = note.content # Direct access to note content
             if note_content: 
                 note_title_for_header = note.title or f"Note ID: {note.id}"
@@ -247,16 +249,17 @@ with notebook_transform_tab:
 
     # Initialize or update source configuration when notebook changes
     if selected_notebook:
+        notebook_sources = selected_notebook.sources
         if st.session_state.nb_transform_selected_notebook_id != selected_notebook.id:
             # Notebook has changed, reset or initialize source config for the new notebook
             st.session_state.nb_transform_selected_notebook_id = selected_notebook.id
             st.session_state.notebook_transform_source_config = {
-                src.id: "Insights" for src in selected_notebook.sources
+                src.id: "Insights" for src in notebook_sources
             } # Default to "Insights"
         elif "notebook_transform_source_config" not in st.session_state:
             # Initialize if accessing for the first time with this notebook already selected
              st.session_state.notebook_transform_source_config = {
-                src.id: "Insights" for src in selected_notebook.sources
+                src.id: "Insights" for src in notebook_sources
             }
         
         st.markdown(f"Selected Notebook: **{selected_notebook.name}** (ID: {selected_notebook.id})")
@@ -264,10 +267,10 @@ with notebook_transform_tab:
         st.markdown("---")
         st.subheader("Configure Source Content Inclusion")
         
-        if not selected_notebook.sources:
+        if not notebook_sources:
             st.info("This notebook has no sources.")
         else:
-            for source in selected_notebook.sources:
+            for source in notebook_sources:
                 # Ensure each source has an entry in the config, defaulting if somehow missed
                 if source.id not in st.session_state.notebook_transform_source_config:
                     st.session_state.notebook_transform_source_config[source.id] = "Insights"
@@ -338,7 +341,7 @@ with notebook_transform_tab:
             # Ensure source config is available; it should be due to UI flow
             source_config = st.session_state.get("notebook_transform_source_config", {})
             
-            if not source_config and selected_notebook.sources: 
+            if not source_config and notebook_sources: 
                 st.warning("Source configuration is missing. Please re-select the notebook.")
                 st.stop()
 
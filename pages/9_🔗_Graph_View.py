@@ -22,9 +22,12 @@ def display_notebook_graph(notebook_id: str):
                       label=current_notebook.name or f"Notebook ({current_notebook.id.split(':')[-1][:6]})",
                       size=30, shape="hexagon", color="#007bff")) # Modern Blue
 
+    # Sources with their insights, and notes, in a fixed number of queries
+    graph = current_notebook.load_graph(include=["sources.insights", "notes"])
+
     # Sources and their Insights
-    if current_notebook.sources:
-        for source in current_notebook.sources:
+    if graph.sources:
+        for source in graph.sources:
             nodes.append(Node(id=source.id,
                               label=source.title or f"Source ({source.id.split(':')[-1][:6]})",
                               size=20, shape="box", color="#6c757d")) # Muted Grey
@@ -38,8 +41,8 @@ def display_notebook_graph(notebook_id: str):
                     edges.append(Edge(source=source.id, target=insight.id))
 
     # Notes and their link to Insights (if any)
-    if current_notebook.notes:
-        for note in current_notebook.notes:
+    if graph.notes:
+        for note in graph.notes:
             note_label = note.title or f"Note ({note.id.split(':')[-1][:6]})"
             if len(note_label) > 30:
                 note_label = note_label[:27] + "..."
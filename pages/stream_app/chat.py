@@ -12,7 +12,6 @@ from open_notebook.domain.transformation import Transformation
 from open_notebook.graphs.chat import graph as chat_graph
 from open_notebook.plugins.podcasts import PodcastConfig
 from open_notebook.utils import token_count
-from open_notebook.exceptions import NotFoundError
 from pages.stream_app.utils import (
     convert_source_references,
     create_session_for_notebook,
@@ -32,6 +31,7 @@ def build_context(notebook_id):
     st.session_state[notebook_id]["context"] = dict(note=[], source=[])
     ids_to_remove = [] # New list to store IDs for removal
 
+    selected = {}
     for id, status in st.session_state[notebook_id]["context_config"].items():
         if not id:
             continue
@@ -42,19 +42,26 @@ def build_context(notebook_id):
 
         if "not in" in status:
             continue
+        selected[id] = status
 
-        try:
-            item: Union[Note, Source] = ObjectModel.get(id)
-        except NotFoundError:
+    # One query per table for all selected items
+    try:
+        items: Dict[str, Union[Note, Source]] = {
+            item.id: item for item in ObjectModel.get_many(list(selected))
+        }
+    except Exception as e:
+        print(f"Warning: Error fetching context items: {e}. Skipping.")
+        items = {}
+        selected = {}
+
+    for id, status in selected.items():
+        item = items.get(id)
+        if item is None:
             print(f"Warning: Context item {id} not found. Skipping.")
             ids_to_remove.append(id) # Add to list instead of deleting here
             continue
-        except Exception as e:
-            print(f"Warning: Error fetching context item {id}: {e}. Skipping.")
-            # Optionally, decide if this error type should also lead to removal
-            # ids_to_remove.append(id)
-            continue
 
+        item_type = id.split(":")[0]
         if "insights" in status:
             st.session_state[notebook_id]["context"][item_type] += [
                 item.get_context(context_size="short")
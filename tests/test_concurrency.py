@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from open_notebook.models.concurrency import AdaptiveLimiter
+
+
+def test_threads_and_event_loops_share_the_limit():
+    limiter = AdaptiveLimiter("test", initial=3, maximum=3)
+    peak = 0
+    lock = threading.Lock()
+
+    def track():
+        nonlocal peak
+        with lock:
+            peak = max(peak, limiter.in_flight)
+
+    def sync_requests():
+        for _ in range(5):
+            with limiter.slot():
+                track()
+                time.sleep(0.005)
+
+    async def async_request():
+        async with limiter.aslot():
+            track()
+            await asyncio.sleep(0.005)
+
+    async def async_requests():
+        await asyncio.gather(*(async_request() for _ in range(10)))
+
+    threads = [threading.Thread(target=sync_requests) for _ in range(3)]
+    threads += [
+        threading.Thread(target=asyncio.run, args=(async_requests(),)) for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    limiter = AdaptiveLimiter("test", initial=1, maximum=1)
+
+    async def run():
+        async with limiter.aslot():
+            waiter = asyncio.create_task(limiter.aslot().__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+        assert limiter.in_flight == 0
+        async with limiter.aslot():
+            assert limiter.in_flight == 1
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import asyncio
+from typing import ClassVar, Optional, Tuple
+
+import pytest
+
+from open_notebook.database.memory import MemoryBackend
+from open_notebook.database.repository import repo_query, set_backend
+from open_notebook.domain.base import ObjectModel
+
+
+class Document(ObjectModel):
+    table_name: ClassVar[str] = "test_document"
+    deferred_fields: ClassVar[Tuple[str, ...]] = ("body",)
+    title: Optional[str] = None
+    body: Optional[str] = None
+
+
+@pytest.fixture(autouse=True)
+def backend():
+    previous = set_backend(MemoryBackend())
+    repo_query(
+        "CREATE test_document:a CONTENT $data;", {"data": {"title": "A", "body": "text"}}
+    )
+    yield
+    set_backend(previous)
+
+
+def test_aload_fields_loads_deferred_fields():
+    async def run():
+        (document,) = await Document.aget_all()
+        assert "body" not in document.__dict__
+        await document.aload_fields()
+        assert document.__dict__["body"] == "text"
+        # Loaded values are not changes
+        assert document._changed_fields() == []
+
+    asyncio.run(run())
+
+
+def test_attribute_access_still_loads_synchronously():
+    (document,) = Document.get_all()
+    assert document.body == "text"
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from open_notebook.models.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _last_used(cache):
+    with sqlite3.connect(cache.path) as db:
+        return dict(db.execute("SELECT hash, last_used FROM embedding").fetchall())
+
+
+def test_lookups_do_not_write(cache):
+    cache.put_many("openai", "small", ["a"], [[0.1, 0.2]])
+    written = _last_used(cache)
+    assert cache.get_many("openai", "small", ["a", "b"]) == [
+        pytest.approx([0.1, 0.2]),
+        None,
+    ]
+    assert _last_used(cache) == written
+    assert cache.stats()["hits"] == 1
+
+
+def test_access_times_are_written_with_the_next_put(cache):
+    cache.put_many("openai", "small", ["a"], [[0.1]])
+    written = _last_used(cache)
+    cache.get_many("openai", "small", ["a"])
+    cache.put_many("openai", "small", ["b"], [[0.2]])
+    (key,) = written
+    assert _last_used(cache)[key] > written[key]
+
+
+def test_access_times_are_written_after_the_interval(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), touch_interval=0)
+    cache.put_many("openai", "small", ["a"], [[0.1]])
+    written = _last_used(cache)
+    cache.get_many("openai", "small", ["a"])
+    (key,) = written
+    assert _last_used(cache)[key] > written[key]
+    cache.close()
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    # Room for two single-float vectors
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_bytes=8)
+    cache.put_many("openai", "small", ["a"], [[0.1]])
+    cache.put_many("openai", "small", ["b"], [[0.2]])
+    cache.get_many("openai", "small", ["a"])
+    cache.put_many("openai", "small", ["c"], [[0.3]])
+    assert cache.get_many("openai", "small", ["a", "b", "c"])[1] is None
+    assert cache.stats()["evictions"] >= 1
+    cache.close()
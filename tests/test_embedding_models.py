@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import ClassVar
+
+import pytest
+
+from open_notebook.models import embedding_models
+from open_notebook.models.embedding_cache import EmbeddingCache
+from open_notebook.models.embedding_models import EmbeddingModel
+
+
+@dataclass
+class CountingModel(EmbeddingModel):
+    model_name: str = "counting"
+    max_batch_size: ClassVar[int] = 2
+
+    def __post_init__(self):
+        self.batches = []
+
+    def _embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(embedding_models, "get_embedding_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def test_embed_goes_through_the_cache(cache):
+    model = CountingModel()
+    assert model.embed("abc") == [3.0]
+    assert model.embed("abc") == [3.0]
+    assert model.batches == [["abc"]]
+
+
+def test_embed_many_batches(cache):
+    model = CountingModel()
+    assert model.embed_many(["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    assert sorted(map(len, model.batches)) == [1, 2]
+
+
+def test_providers_must_embed_batches():
+    @dataclass
+    class NoBatches(EmbeddingModel):
+        pass
+
+    with pytest.raises(TypeError):
+        NoBatches()
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from open_notebook.database import repository
+from open_notebook.database.memory import MemoryBackend
+from open_notebook.database.repository import (
+    arepo_insert_many,
+    repo_insert_many,
+    repo_query,
+    set_backend,
+)
+
+
+class FailingBackend(MemoryBackend):
+    """Fails the second INSERT, and every DELETE if fail_delete is set."""
+
+    def __init__(self, fail_delete=False):
+        super().__init__()
+        self.fail_delete = fail_delete
+        self.inserts = 0
+
+    def query(self, query_str, vars=None):
+        if query_str.startswith("INSERT"):
+            self.inserts += 1
+            if self.inserts == 2:
+                raise ValueError("insert failed")
+        if query_str.startswith("DELETE") and self.fail_delete:
+            raise ConnectionError("delete failed")
+        return super().query(query_str, vars)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        repository, "_write_listeners", [lambda *ids: written.extend(ids)]
+    )
+    return written
+
+
+ROWS = [{"title": str(i)} for i in range(4)]
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_failed_batch_removes_earlier_batches(written, run_async):
+    previous = set_backend(FailingBackend())
+    try:
+        with pytest.raises(ValueError, match="insert failed"):
+            if run_async:
+                asyncio.run(arepo_insert_many("note", ROWS, batch_size=2))
+            else:
+                repo_insert_many("note", ROWS, batch_size=2)
+        assert repo_query("SELECT * FROM note") == []
+        assert len(written) == 2
+    finally:
+        set_backend(previous)
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_failed_cleanup_raises_the_insert_error(written, run_async):
+    previous = set_backend(FailingBackend(fail_delete=True))
+    try:
+        with pytest.raises(ValueError, match="insert failed"):
+            if run_async:
+                asyncio.run(arepo_insert_many("note", ROWS, batch_size=2))
+            else:
+                repo_insert_many("note", ROWS, batch_size=2)
+        # The first batch stays, and listeners still hear about it
+        assert len(repo_query("SELECT * FROM note")) == 2
+        assert len(written) == 2
+    finally:
+        set_backend(previous)
@@ -0,0 +1,67 @@
+import pytest
+
+from open_notebook.database.memory import MemoryBackend
+from open_notebook.database.repository import repo_query, set_backend
+from open_notebook.domain.pagination import encode_cursor
+from open_notebook.exceptions import InvalidInputError
+
+
+@pytest.fixture
+def notebooks():
+    previous = set_backend(MemoryBackend())
+    # Importing the domain reads the default models, so a backend comes first
+    from open_notebook.domain.notebook import Notebook
+
+    # Two notebooks were stored without timestamps
+    for key, created in [
+        ("a", None),
+        ("b", "2024-01-01T00:00:00Z"),
+        ("c", None),
+        ("d", "2024-01-02T00:00:00Z"),
+        ("e", "2024-01-02T00:00:00Z"),
+    ]:
+        data = {"name": key, "description": ""}
+        if created:
+            data["created"] = created
+        repo_query(f"CREATE notebook:{key} CONTENT $data;", {"data": data})
+    yield Notebook
+    set_backend(previous)
+
+
+def _pages(Notebook, order_by):
+    names, cursor = [], None
+    while True:
+        page = Notebook.get_page(limit=1, cursor=cursor, order_by=order_by)
+        names += [notebook.name for notebook in page.items]
+        if page.next_cursor is None:
+            return names
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize(
+    "order_by, expected",
+    [
+        ("created asc", ["a", "c", "b", "d", "e"]),
+        ("created desc", ["e", "d", "b", "c", "a"]),
+    ],
+)
+def test_keyset_pages_continue_past_rows_without_the_column(
+    notebooks, order_by, expected
+):
+    assert _pages(notebooks, order_by) == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(order_by="name; DELETE notebook"),
+        dict(order_by="secret asc"),
+        dict(fields=["name", "(SELECT * FROM user)"]),
+        dict(omit=["description, password"]),
+        dict(order_by="name", cursor=encode_cursor({"o": "1; DELETE notebook"})),
+    ],
+)
+def test_query_text_only_takes_model_fields(notebooks, kwargs):
+    with pytest.raises(InvalidInputError):
+        notebooks.get_page(limit=1, **kwargs)
+    assert len(repo_query("SELECT * FROM notebook")) == 5
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from open_notebook.database.pool import (
+    AsyncSurrealConnectionPool,
+    SurrealConnectionPool,
+)
+
+
+class FakeSocket:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncFakeSocket(FakeSocket):
+    async def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, socket):
+        self.socket = socket
+
+
+def test_query_error_returns_connection():
+    pool = SurrealConnectionPool(factory=lambda: FakeConnection(FakeSocket()))
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("query failed")
+    assert pool.size == 1 and pool.idle == 1
+
+
+def test_interrupted_query_discards_connection():
+    pool = SurrealConnectionPool(factory=lambda: FakeConnection(FakeSocket()))
+    with pytest.raises(KeyboardInterrupt):
+        with pool.connection() as connection:
+            raise KeyboardInterrupt
+    assert connection.socket.closed
+    assert pool.size == 0 and pool.idle == 0
+
+
+def test_cancelled_query_discards_connection():
+    async def factory():
+        return FakeConnection(AsyncFakeSocket())
+
+    async def run():
+        pool = AsyncSurrealConnectionPool(factory=factory, max_size=1)
+        started = asyncio.Event()
+        connections = []
+
+        async def query():
+            async with pool.connection() as connection:
+                connections.append(connection)
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(query())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert connections[0].socket.closed
+        assert pool.idle == 0
+        # The slot is free again
+        async with pool.connection() as connection:
+            assert connection is not connections[0]
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import pytest
+
+from open_notebook.database.memory import MemoryBackend
+from open_notebook.database.repository import (
+    records_written,
+    repo_delete_many,
+    repo_merge,
+    repo_merge_many,
+    repo_query,
+    set_backend,
+)
+from open_notebook.domain.cache import process_cache
+
+
+@pytest.fixture(autouse=True)
+def backend():
+    previous = set_backend(MemoryBackend())
+    process_cache.clear()
+    for key in ("a", "b"):
+        repo_query(f"CREATE note:{key} CONTENT $data;", {"data": {"title": key}})
+        process_cache.put(f"note:{key}", {"id": f"note:{key}", "title": key})
+    yield
+    process_cache.clear()
+    set_backend(previous)
+
+
+def test_merge_drops_cached_row():
+    repo_merge("note:a", {"title": "new"})
+    assert process_cache.get("note:a") is None
+    assert process_cache.get("note:b") is not None
+
+
+def test_bulk_writes_drop_cached_rows():
+    repo_merge_many({"note:a": {"title": "new"}})
+    repo_delete_many(["note:b"])
+    assert process_cache.get("note:a") is None
+    assert process_cache.get("note:b") is None
+
+
+def test_unknown_records_drop_everything():
+    records_written()
+    assert len(process_cache) == 0
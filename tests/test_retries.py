@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+import pytest
+
+from open_notebook.database import repository
+
+
+class DroppingConnection:
+    """Loses the connection on the first query, like a socket the server closed."""
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, query_str, vars=None):
+        self.queries.append(query_str)
+        if len(self.queries) == 1:
+            raise ConnectionError("connection reset")
+        return [{"id": "note:a"}]
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = DroppingConnection()
+
+    @contextmanager
+    def db_connection(endpoint=None):
+        yield connection
+
+    monkeypatch.setenv("SURREAL_ADDRESS", "localhost")
+    monkeypatch.setenv("SURREAL_PORT", "8000")
+    monkeypatch.setattr(repository, "get_backend", lambda: None)
+    monkeypatch.setattr(repository, "db_connection", db_connection)
+    return connection
+
+
+def test_idempotent_query_is_sent_again(connection):
+    assert repository._run_query("UPDATE $id MERGE $data;") == [{"id": "note:a"}]
+    assert len(connection.queries) == 2
+
+
+def test_create_is_not_sent_again(connection):
+    with pytest.raises(ConnectionError):
+        repository._run_query("CREATE note CONTENT $data;")
+    assert len(connection.queries) == 1
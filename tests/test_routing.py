@@ -0,0 +1,35 @@
+import time
+
+from open_notebook.database.routing import (
+    Endpoint,
+    ReadRouter,
+    is_idempotent_query,
+    is_read_query,
+)
+
+REPLICAS = [Endpoint("replica-1", 8000), Endpoint("replica-2", 8000)]
+
+
+def test_reads_and_writes_are_told_apart():
+    assert is_read_query("SELECT * FROM note;")
+    assert not is_read_query("UPDATE note:a SET title = 'SELECT';")
+    assert not is_read_query("SELECT * FROM note; DELETE note:a;")
+
+
+def test_only_queries_that_can_run_twice_are_idempotent():
+    assert is_idempotent_query("SELECT * FROM note;")
+    assert is_idempotent_query("UPDATE $id MERGE $data RETURN NONE;")
+    assert is_idempotent_query("BEGIN TRANSACTION; UPSERT x:a CONTENT $d; COMMIT TRANSACTION;")
+    assert not is_idempotent_query("CREATE note CONTENT $data;")
+    assert not is_idempotent_query("INSERT INTO note $rows;")
+    assert not is_idempotent_query("UPDATE x:a SET hits += 1;")
+    assert not is_idempotent_query("BEGIN; UPDATE x:a SET b = 1; CREATE y; COMMIT;")
+
+
+def test_reads_go_to_the_primary_after_a_write():
+    router = ReadRouter(REPLICAS, read_after_write=0.05)
+    assert router.candidates()
+    router.wrote()
+    assert router.candidates() == []
+    time.sleep(0.06)
+    assert sorted(router.candidates()) == REPLICAS
@@ -0,0 +1,93 @@
+"""
+Writes into SCHEMAFULL tables never send NULL.
+
+SurrealDB rejects NULL for the option<> fields of SCHEMAFULL tables; a field
+is cleared with NONE. The MemoryBackend applies the same rule to the tables
+the migrations define SCHEMAFULL, so these tests run without a server.
+"""
+
+import pytest
+
+from open_notebook.database.memory import MemoryBackend, schemafull_tables
+from open_notebook.database.repository import (
+    repo_insert_many,
+    repo_merge,
+    repo_merge_many,
+    repo_query,
+    set_backend,
+)
+from open_notebook.database.vectors import vector_fields
+from open_notebook.exceptions import DatabaseOperationError
+
+
+@pytest.fixture
+def backend():
+    backend = MemoryBackend()
+    previous = set_backend(backend)
+    yield backend
+    set_backend(previous)
+
+
+def test_vector_tables_are_schemafull():
+    assert {"source_embedding", "source_insight", "note"} <= set(schemafull_tables())
+
+
+def test_null_is_rejected(backend):
+    repo_query("CREATE note:a CONTENT $data;", {"data": {"title": "A"}})
+    with pytest.raises(DatabaseOperationError):
+        repo_query("UPDATE note:a MERGE $data;", {"data": {"title": None}})
+
+
+def test_merge_removes_cleared_fields(backend):
+    repo_query(
+        "CREATE note:a CONTENT $data;", {"data": {"title": "A", "content": "text"}}
+    )
+    repo_merge("note:a", {"title": None, "content": "new"})
+    assert backend.get_record("note:a") == {"id": "note:a", "content": "new"}
+
+
+def test_merge_many_removes_cleared_fields(backend):
+    for key in ("a", "b"):
+        repo_query(
+            f"CREATE note:{key} CONTENT $data;", {"data": {"title": key, "content": key}}
+        )
+    repo_merge_many({"note:a": {"title": None}, "note:b": {"content": "new"}})
+    assert backend.get_record("note:a") == {"id": "note:a", "content": "a"}
+    assert backend.get_record("note:b")["content"] == "new"
+
+
+@pytest.mark.parametrize("storage", ["float", "int8"])
+def test_vector_rows_insert(backend, monkeypatch, storage):
+    monkeypatch.setenv("SURREAL_VECTOR_STORAGE", storage)
+    rows = [
+        {"source": "source:a", "content": "chunk", **vector_fields([0.1, -0.2, 0.3])}
+    ]
+    (record_id,) = repo_insert_many("source_embedding", rows, record_fields=["source"])
+    stored = backend.get_record(record_id)
+    assert ("embedding_packed" in stored) == (storage == "int8")
+
+
+def test_float_merge_clears_packed_copy(backend, monkeypatch):
+    monkeypatch.setenv("SURREAL_VECTOR_STORAGE", "int8")
+    repo_query(
+        "CREATE source_embedding:a CONTENT $data;",
+        {"data": {"content": "chunk", **vector_fields([0.1, -0.2, 0.3])}},
+    )
+    monkeypatch.setenv("SURREAL_VECTOR_STORAGE", "float")
+    repo_merge_many(
+        {"source_embedding:a": vector_fields([0.3, 0.2, 0.1], merge=True)}
+    )
+    stored = backend.get_record("source_embedding:a")
+    assert stored["embedding"] == [0.3, 0.2, 0.1]
+    assert "embedding_packed" not in stored
+
+
+def test_insight_without_embedding_model(backend):
+    from open_notebook.domain.notebook import Source
+
+    source = Source(title="A", full_text="text")
+    source.save()
+    (record_id,) = source.add_insight("Summary", "some content")
+    stored = backend.get_record(record_id)
+    assert stored["content"] == "some content"
+    assert "embedding_model" not in stored
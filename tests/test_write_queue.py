@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from open_notebook.database.memory import MemoryBackend
+from open_notebook.database.write_queue import WriteBehindQueue
+from open_notebook.exceptions import WriteBehindError
+
+
+@pytest.fixture
+def backend():
+    return MemoryBackend(schemafull=["note"])
+
+
+def test_flush_commits_queued_writes(backend):
+    queue = WriteBehindQueue(execute=backend.query, interval=60)
+    for key in ("a", "b"):
+        queue.enqueue(f"CREATE note:{key} CONTENT $data;", {"data": {"title": key}})
+    queue.flush()
+    assert backend.get_record("note:a")["title"] == "a"
+    assert backend.get_record("note:b")["title"] == "b"
+    queue.close()
+
+
+def test_failed_statement_does_not_drop_its_batch(backend):
+    queue = WriteBehindQueue(execute=backend.query, interval=60)
+    queue.enqueue("CREATE note:a CONTENT $data;", {"data": {"title": "a"}})
+    queue.enqueue("CREATE note:b CONTENT $data;", {"data": {"title": None}})
+    queue.enqueue("CREATE note:c CONTENT $data;", {"data": {"title": "c"}})
+    with pytest.raises(WriteBehindError) as raised:
+        queue.flush()
+    assert [statement for statement, _, _ in raised.value.failed] == [
+        "CREATE note:b CONTENT $data;"
+    ]
+    assert backend.get_record("note:a") is not None
+    assert backend.get_record("note:b") is None
+    assert backend.get_record("note:c") is not None
+    # Reported once
+    queue.flush()
+    queue.close()
+
+
+def test_background_failures_are_reported_by_flush(backend):
+    queue = WriteBehindQueue(execute=backend.query, interval=0.01)
+    queue.enqueue("CREATE note:b CONTENT $data;", {"data": {"title": None}})
+    time.sleep(0.2)  # The worker flushes on its own
+    assert len(queue) == 0
+    assert queue.busy()
+    with pytest.raises(WriteBehindError):
+        queue.flush()
+    queue.close()